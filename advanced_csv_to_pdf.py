@@ -1,4 +1,5 @@
 import csv
+import os
 import re
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
@@ -8,6 +9,12 @@ from reportlab.lib.colors import black, darkblue
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import textwrap
+import time
+
+import metrics
+from contents import add_contents, record_entries, report_overhead, tag_entry
+from crossref import CrossReferences
+from segmentation import finish, paragraphs
 
 def clean_text_advanced(text):
     """Advanced text cleaning to handle all edge cases"""
@@ -39,78 +46,10 @@ def clean_text_advanced(text):
     
     return text.strip()
 
-def split_into_paragraphs(text, max_chars_per_para=300):
-    """Intelligently split long text into readable paragraphs"""
-    if not text:
-        return []
-    
-    # First try to split by sentences
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    paragraphs = []
-    current_para = []
-    current_length = 0
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-            
-        # If sentence is very long, split it further
-        if len(sentence) > max_chars_per_para:
-            if current_para:
-                paragraphs.append(' '.join(current_para))
-                current_para = []
-                current_length = 0
-            
-            # Split long sentence by clauses
-            clauses = re.split(r'(?<=,)\s+|(?<=;)\s+', sentence)
-            for clause in clauses:
-                clause = clause.strip()
-                if len(clause) > max_chars_per_para:
-                    # Split by words if still too long
-                    words = clause.split()
-                    temp_clause = []
-                    temp_length = 0
-                    
-                    for word in words:
-                        if temp_length + len(word) + 1 > max_chars_per_para and temp_clause:
-                            paragraphs.append(' '.join(temp_clause))
-                            temp_clause = [word]
-                            temp_length = len(word)
-                        else:
-                            temp_clause.append(word)
-                            temp_length += len(word) + 1
-                    
-                    if temp_clause:
-                        current_para.extend(temp_clause)
-                        current_length = sum(len(w) + 1 for w in temp_clause)
-                else:
-                    if current_length + len(clause) + 1 > max_chars_per_para and current_para:
-                        paragraphs.append(' '.join(current_para))
-                        current_para = [clause]
-                        current_length = len(clause)
-                    else:
-                        current_para.append(clause)
-                        current_length += len(clause) + 1
-        else:
-            if current_length + len(sentence) + 1 > max_chars_per_para and current_para:
-                paragraphs.append(' '.join(current_para))
-                current_para = [sentence]
-                current_length = len(sentence)
-            else:
-                current_para.append(sentence)
-                current_length += len(sentence) + 1
-    
-    if current_para:
-        paragraphs.append(' '.join(current_para))
-    
-    return paragraphs
-
-def create_advanced_pdf_from_csv(csv_file, output_pdf):
-    """Create an advanced, perfectly formatted PDF from CSV data"""
-    
+def make_document(output_pdf):
+    """The page setup used for the cases compilation"""
     # Set up the document with better margins
-    doc = SimpleDocTemplate(
+    return SimpleDocTemplate(
         output_pdf, 
         pagesize=A4,
         rightMargin=60, 
@@ -119,7 +58,39 @@ def create_advanced_pdf_from_csv(csv_file, output_pdf):
         bottomMargin=40,
         allowSplitting=1
     )
-    
+
+def read_rows(csv_file):
+    """Yield the data rows of a cases CSV"""
+    with open(csv_file, 'r', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        next(reader)  # Skip header
+        yield from reader
+
+def count_cases(csv_file):
+    """Number of rows with a case name and an explanation"""
+    return sum(1 for row in read_rows(csv_file) if len(row) >= 3 and row[0].strip() and row[1].strip())
+
+def index_fields(row):
+    """(case name, source PDF) a row is filed under by csv_index"""
+    return (clean_text_advanced(row[0].strip()) if row else "",
+            clean_text_advanced(row[2].strip()) if len(row) >= 3 else "")
+
+def read_selected(csv_file, letters=None, sources=None, rows=None):
+    """The rows picked by case name initial, source PDF and row number, read through the CSV's index"""
+    from csv_index import read_selected
+    return list(read_selected(csv_file, index_fields, "cases", letters, sources, rows))
+
+# A new page is started every this many cases, so each group of cases is laid
+# out independently of the others (which is what lets incremental rebuilds
+# reuse the pages of unchanged groups)
+CASES_PER_GROUP = 8
+
+# Bump whenever make_document, the styles or the entry layout change, so that
+# incremental rebuilds do not splice in pages rendered the old way
+STYLE_VERSION = 2
+
+def make_styles():
+    """Paragraph styles for the cases compilation"""
     # Get styles
     styles = getSampleStyleSheet()
     
@@ -175,71 +146,177 @@ def create_advanced_pdf_from_csv(csv_file, output_pdf):
         textColor=darkblue
     )
     
-    # Build the story (content)
-    story = []
+    subtitle_style = ParagraphStyle('Subtitle', parent=styles['Normal'], 
+                                    fontSize=12, alignment=1, spaceAfter=50)
     
-    # Add title page
-    story.append(Paragraph("Legal Cases Compilation", title_style))
-    story.append(Spacer(1, 40))
-    story.append(Paragraph("Comprehensive collection of legal cases with detailed explanations", 
-                          ParagraphStyle('Subtitle', parent=styles['Normal'], 
-                                        fontSize=12, alignment=1, spaceAfter=50)))
-    story.append(PageBreak())
+    return {'title': title_style, 'subtitle': subtitle_style, 'case': case_style,
+            'explanation': explanation_style, 'source': source_style}
+
+def title_page(styles):
+    """Yield the flowables of the title page"""
+    yield Paragraph("Legal Cases Compilation", styles['title'])
+    yield Spacer(1, 40)
+    yield Paragraph("Comprehensive collection of legal cases with detailed explanations", 
+                    styles['subtitle'])
+    yield PageBreak()
+
+def usable_cases(rows):
+    """Yield cleaned (case name, explanation, source PDF) for rows worth rendering"""
+    for row in rows:
+        if len(row) >= 3:
+            case_name = clean_text_advanced(row[0].strip())
+            explanation = clean_text_advanced(row[1].strip())
+            source_pdf = clean_text_advanced(row[2].strip())
+            
+            if case_name and explanation:
+                yield case_name, explanation, source_pdf
+
+def explanation_paragraphs(explanation):
+    """The paragraphs an explanation is laid out in, each ending with punctuation"""
+    return [finish(para) for para in paragraphs(explanation, 350)]
+
+def source_text(source_pdf):
+    return f"Source: {source_pdf.replace('.pdf', '')}" if source_pdf else ""
+
+def case_entry(case_name, explanation, source_pdf, styles, links=None):
+    """Yield the flowables of one case (with ``links``, mentions of other cases link to them)"""
+    # Add case name with proper formatting
+    section = source_pdf.replace('.pdf', '') or "Unknown source"
+    heading = f"<b>{case_name}</b>"
+    if links:
+        heading = links.heading(case_name, heading)
+    yield tag_entry(Paragraph(heading, styles['case']), case_name, section)
     
-    # Read CSV and add content
-    case_count = 0
-    total_cases = 0
+    # Split explanation into readable paragraphs
+    for para in explanation_paragraphs(explanation):
+        if links:
+            para = links.link(para, case_name)
+        yield Paragraph(para, styles['explanation'])
     
-    # First pass to count total cases
-    with open(csv_file, 'r', encoding='utf-8-sig') as file:
-        reader = csv.reader(file)
-        next(reader)  # Skip header
-        total_cases = sum(1 for row in reader if len(row) >= 3 and row[0].strip() and row[1].strip())
+    # Add source information
+    if source_pdf:
+        yield Paragraph(f"<i>{source_text(source_pdf)}</i>", styles['source'])
+
+def report_progress(case_count, total_cases):
+    # Add progress indicator (every 20 cases)
+    if case_count % 20 == 0:
+        if total_cases:
+            print(f"Processed {case_count}/{total_cases} cases...")
+        else:
+            print(f"Processed {case_count} cases...")
+
+def build_story(rows, stats, total_cases=None, links=None):
+    """Yield the flowables for the title page and one entry per usable row.
+
+    Rows are consumed lazily, so the story can be laid out while later rows
+    are still being produced; stats['entries'] counts the cases rendered.
+    ``links`` is a CrossReferences over every case name, to link mentions.
+    """
+    styles = make_styles()
+    yield from title_page(styles)
     
-    # Second pass to process content
-    with open(csv_file, 'r', encoding='utf-8-sig') as file:
-        reader = csv.reader(file)
-        next(reader)  # Skip header
+    case_count = 0
+    stats['entries'] = 0
+    
+    for case_name, explanation, source_pdf in usable_cases(rows):
+        # Add page break every 8 cases for better readability
+        if case_count and case_count % CASES_PER_GROUP == 0:
+            yield PageBreak()
         
-        for row_num, row in enumerate(reader, 1):
-            if len(row) >= 3:
-                case_name = clean_text_advanced(row[0].strip())
-                explanation = clean_text_advanced(row[1].strip())
-                source_pdf = clean_text_advanced(row[2].strip())
-                
-                if case_name and explanation:
-                    # Add case name with proper formatting
-                    story.append(Paragraph(f"<b>{case_name}</b>", case_style))
-                    
-                    # Split explanation into readable paragraphs
-                    paragraphs = split_into_paragraphs(explanation, 350)
-                    
-                    for para in paragraphs:
-                        if para.strip():
-                            # Ensure proper sentence endings
-                            if not para.endswith(('.', '!', '?', '"', "'")):
-                                para += '.'
-                            story.append(Paragraph(para, explanation_style))
-                    
-                    # Add source information
-                    if source_pdf:
-                        source_text = f"Source: {source_pdf.replace('.pdf', '')}"
-                        story.append(Paragraph(f"<i>{source_text}</i>", source_style))
-                    
-                    case_count += 1
-                    
-                    # Add progress indicator (every 20 cases)
-                    if case_count % 20 == 0:
-                        print(f"Processed {case_count}/{total_cases} cases...")
-                    
-                    # Add page break every 8 cases for better readability
-                    if case_count % 8 == 0 and case_count < total_cases:
-                        story.append(PageBreak())
+        yield from case_entry(case_name, explanation, source_pdf, styles, links)
+        
+        case_count += 1
+        stats['entries'] = case_count
+        report_progress(case_count, total_cases)
+
+def create_advanced_pdf_incremental(csv_file, output_pdf, cache_dir=None, contents=False):
+    """Rebuild the cases PDF, laying out only the page groups that changed.
+
+    Every group of CASES_PER_GROUP cases starts on a new page, so each group
+    is rendered to its own small PDF, cached under its content hash, and the
+    output is spliced together from the cached groups. Editing or appending
+    cases re-renders only the affected groups; inserting or deleting a case
+    shifts the groups after it, which then have to be laid out again.
+    """
+    from render_cache import build_from_groups, group_key
+    
+    cache_dir = cache_dir or os.path.splitext(output_pdf)[0] + "_render_cache"
+    styles = make_styles()
+    cases = list(usable_cases(read_rows(csv_file)))
+    total_cases = len(cases)
+    
+    def render_group(group, path):
+        start, entries = group
+        story = []
+        if start is None:
+            story.extend(title_page(styles))
+            story.pop()  # the page break comes with the end of the group
+        for offset, entry in enumerate(entries, 1):
+            story.extend(case_entry(*entry, styles))
+            report_progress(start + offset, total_cases)
+        doc = make_document(path)
+        recorded = record_entries(doc)
+        doc.build(story)
+        return recorded
+    
+    groups = [(group_key(STYLE_VERSION, [("title",)]), (None, []))]
+    for start in range(0, total_cases, CASES_PER_GROUP):
+        entries = cases[start:start + CASES_PER_GROUP]
+        groups.append((group_key(STYLE_VERSION, entries), (start, entries)))
+    
+    print("Building PDF from cached page groups...")
+    build_start = time.perf_counter()
+    reused, rendered, placed = build_from_groups(output_pdf, groups, render_group, cache_dir)
+    build_time = time.perf_counter() - build_start
+    
+    if contents:
+        entries = [(title, section, first_page + page)
+                   for first_page, recorded in placed for title, section, page in recorded]
+        report_overhead(add_contents(output_pdf, entries, "Sources"), build_time)
+    
+    print(f"✅ PDF created successfully: {output_pdf}")
+    print(f"📊 Total cases included: {total_cases}")
+    print(f"♻️ Page groups reused: {reused}, laid out: {rendered} (cache: {cache_dir})")
+    
+    return total_cases
+
+def create_advanced_pdf_from_csv(csv_file, output_pdf, contents=False, links=False,
+                                 letters=None, sources=None, rows=None):
+    """Create an advanced, perfectly formatted PDF from CSV data.
+
+    ``letters`` ("A-C"), ``sources`` (source PDF names) and ``rows`` ("1-200")
+    render only the matching cases, seeking straight to them through a
+    byte-offset index of the CSV (see csv_index.py).
+    """
+    
+    doc = make_document(output_pdf)
+    entries = record_entries(doc) if contents else None
+    
+    if letters or sources or rows:
+        subset = read_selected(csv_file, letters, sources, rows)
+        total_cases = sum(1 for _ in usable_cases(subset))
+        read = lambda: subset
+    else:
+        # First pass to count total cases, second pass to process content
+        total_cases = count_cases(csv_file)
+        read = lambda: read_rows(csv_file)
+    if links:
+        links = CrossReferences(case_name for case_name, _, _ in usable_cases(read()))
+        print(f"🔗 Linking mentions of {len(links.anchors)} case names")
+    stats = {}
+    story = list(build_story(read(), stats, total_cases, links or None))
+    case_count = stats['entries']
     
     # Build the PDF
     print("Building PDF...")
+    build_start = time.perf_counter()
+    metrics.watch_layout("advanced_csv_to_pdf", story)
     doc.build(story)
     
+    if contents:
+        build_time = time.perf_counter() - build_start
+        report_overhead(add_contents(output_pdf, entries, "Sources"), build_time)
+    
     print(f"✅ PDF created successfully: {output_pdf}")
     print(f"📊 Total cases included: {case_count}")
     print(f"📄 PDF pages: ~{max(1, case_count // 8)}")
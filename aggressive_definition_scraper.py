@@ -1,11 +1,34 @@
-import fitz  # PyMuPDF
 import re
 import csv
-import os
+
+import metrics
+from batch import iter_records
+from documents import scan_document
+from external_sort import RUN_SIZE, Tally, sorted_unique
 
 # SETTINGS
 pdf_folder = r"C:\Users\BACKY\Downloads\YOUR-FILE-NAME"      # Folder containing all your PDFs
 output_csv = "every_single_definition.csv"
+# Bump to make --memo rescan after a change outside this file (its own source is hashed in)
+EXTRACTOR_VERSION = 1
+
+# ANY line that has these patterns = probably a definition.
+# A "(.+?)" prefix can stretch back to the start of the line, so those patterns
+# can only ever match at position 0 and are anchored with ^. The "A|An|The"
+# pattern can only match at the first article in the line, so it skips straight
+# there. Unanchored, a line with no match was rescanned from every position,
+# which is quadratic in the line length (seconds for one long line).
+definition_indicators = [
+    re.compile(r'^(.+?)\s+(?:is|are|means?|refers? to|can be defined as|described as|defined as|involves|consists of|includes|comprises)\s+(.+)', re.IGNORECASE),
+    re.compile(r'^(?:(?!(?:A|An|The)\s).)*(?:A|An|The)\s+(.+?)\s+(?:is|means?|refers? to)\s+(.+)', re.IGNORECASE),
+    re.compile(r'^(.+?)\s*[:\-]\s+(.+)', re.IGNORECASE),  # Term: Definition
+    re.compile(r'What\s+(?:is|are)\s+(.+?)\??\s*(?:[:\-]?\s*(.+))?', re.IGNORECASE),
+    re.compile(r'Definition[:\s]*(.+?)\s*(?:[:\-]?\s*(.+))?', re.IGNORECASE),
+    re.compile(r'^(.+?)\s+can\s+be\s+(?:described|explained)\s+as\s+(.+)', re.IGNORECASE),
+]
+
+# Stops the look-ahead that appends following lines to a definition
+continuation_stop = re.compile(r'(?:is|means|refers|defined|described)', re.IGNORECASE)
 
 def clean_text(text):
     """Basic text cleaning"""
@@ -25,18 +48,8 @@ def extract_anything_that_looks_like_definition(text, source_pdf, page_num):
         if len(line) < 10:
             continue
         
-        # ANY line that has these patterns = probably a definition
-        definition_indicators = [
-            r'(.+?)\s+(?:is|are|means?|refers? to|can be defined as|described as|defined as|involves|consists of|includes|comprises)\s+(.+)',
-            r'(?:A|An|The)\s+(.+?)\s+(?:is|means?|refers? to)\s+(.+)',
-            r'(.+?)\s*[:\-]\s+(.+)',  # Term: Definition
-            r'What\s+(?:is|are)\s+(.+?)\??\s*(?:[:\-]?\s*(.+))?',
-            r'Definition[:\s]*(.+?)\s*(?:[:\-]?\s*(.+))?',
-            r'(.+?)\s+can\s+be\s+(?:described|explained)\s+as\s+(.+)',
-        ]
-        
         for pattern in definition_indicators:
-            matches = re.finditer(pattern, line, re.IGNORECASE)
+            matches = pattern.finditer(line)
             for match in matches:
                 groups = match.groups()
                 if len(groups) >= 2:
@@ -51,7 +64,7 @@ def extract_anything_that_looks_like_definition(text, source_pdf, page_num):
                             next_line = clean_text(lines[j])
                             if next_line and len(next_line) > 15:
                                 # Stop if we hit another definition-like line
-                                if re.search(r'(?:is|means|refers|defined|described)', next_line, re.IGNORECASE):
+                                if continuation_stop.search(next_line):
                                     break
                                 full_def += " " + next_line
                                 j += 1
@@ -68,66 +81,83 @@ def extract_anything_that_looks_like_definition(text, source_pdf, page_num):
     
     return definitions
 
-def main():
-    print("🔥 AGGRESSIVE MODE: Extracting EVERYTHING that looks like a definition...")
-    
-    all_definitions = []
-    
-    # Loop through all PDFs
-    for filename in os.listdir(pdf_folder):
-        if filename.lower().endswith(".pdf"):
-            print(f"📄 RIPPING: {filename}")
-            pdf_path = os.path.join(pdf_folder, filename)
-            
-            try:
-                doc = fitz.open(pdf_path)
-                
-                for page_num, page in enumerate(doc):
-                    text = page.get_text("text")
-                    if text.strip():
-                        page_defs = extract_anything_that_looks_like_definition(text, filename, page_num)
-                        all_definitions.extend(page_defs)
-                
-                doc.close()
-                
-            except Exception as e:
-                print(f"❌ Error with {filename}: {e}")
-                continue
-    
-    # Remove duplicates
+def scan_page(text, filename, page_num):
+    """Run the aggressive extractor over the text of one page"""
+    if not text.strip():
+        return []
+    return extract_anything_that_looks_like_definition(text, filename, page_num)
+
+def scan_pdf(pdf_path, filename, data=None):
+    """Run the aggressive extractor over every page of one PDF (running headers/footers stripped)"""
+    return scan_document(scan_page, pdf_path, filename, data)
+
+def dedupe_key(def_item):
+    """A definition is unique by term plus the start of its text"""
+    return (def_item['term'].lower(), def_item['definition'].lower()[:50])
+
+def remove_duplicates(all_definitions):
+    """Keep one definition per (term, start of definition) pair"""
     unique_definitions = []
     seen = set()
     
     for def_item in all_definitions:
-        key = (def_item['term'].lower(), def_item['definition'].lower()[:50])
+        key = dedupe_key(def_item)
         if key not in seen:
             seen.add(key)
             unique_definitions.append(def_item)
     
-    # Sort by term
-    unique_definitions.sort(key=lambda x: x['term'])
-    
-    # Save to CSV
+    return unique_definitions
+
+def sort_key(def_item):
+    return def_item['term']
+
+def finalize_records(all_definitions):
+    """Dedupe and sort definitions the way they are written to the CSV"""
+    unique_definitions = remove_duplicates(all_definitions)
+    unique_definitions.sort(key=sort_key)
+    return unique_definitions
+
+def finalize_stream(all_definitions, run_size=RUN_SIZE):
+    """Same as finalize_records, but streamed through sorted runs on disk for huge result sets"""
+    return sorted_unique(all_definitions, dedupe_key, sort_key, run_size)
+
+def csv_rows(unique_definitions):
+    """Yield the CSV row for each definition"""
+    for def_item in unique_definitions:
+        yield [
+            def_item['term'],
+            def_item['definition'],
+            def_item['source_pdf'],
+            def_item['page'],
+            def_item['raw_line']
+        ]
+
+def save_to_csv(unique_definitions, output_csv):
     with open(output_csv, mode="w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["Term", "Definition", "Source PDF", "Page", "Raw Line"])
-        
-        for def_item in unique_definitions:
-            writer.writerow([
-                def_item['term'],
-                def_item['definition'],
-                def_item['source_pdf'],
-                def_item['page'],
-                def_item['raw_line']
-            ])
+        writer.writerows(csv_rows(unique_definitions))
+
+def main(pdf_folder=pdf_folder, output_csv=output_csv, run_size=RUN_SIZE, **batch_options):
+    print("🔥 AGGRESSIVE MODE: Extracting EVERYTHING that looks like a definition...")
+    
+    # Loop through all PDFs
+    all_definitions = iter_records(scan_pdf, pdf_folder, "RIPPING", **batch_options)
+    
+    # Remove duplicates and sort by term, streaming into the CSV
+    unique_definitions = Tally(finalize_stream(all_definitions, run_size), 20)
+    
+    # Save to CSV
+    save_to_csv(unique_definitions, output_csv)
     
     print(f"\n🔥 AGGRESSIVE EXTRACTION COMPLETE!")
-    print(f"📊 Found {len(unique_definitions)} potential definitions")
+    metrics.record_dedupe(__name__, unique_definitions.count)
+    print(f"📊 Found {unique_definitions.count} potential definitions")
     print(f"💾 Saved to: {output_csv}")
     
     # Show first 20 results
     print(f"\n🔥 FIRST 20 RESULTS:")
-    for i, def_item in enumerate(unique_definitions[:20]):
+    for i, def_item in enumerate(unique_definitions.kept):
         print(f"{i+1:2d}. {def_item['term'][:30]:30s} = {def_item['definition'][:60]}...")
 
 if __name__ == "__main__":
@@ -1,9 +1,24 @@
 import csv
+import itertools
+import os
+from xml.sax.saxutils import escape
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.colors import black, darkblue
 
+import metrics
+from contents import index_letter
+from crossref import CrossReferences
+from segmentation import finish, sentences
+
+INDEX_LETTERS = "#ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+# Default volume size for each --volume-by mode: index letters, pages, megabytes
+VOLUME_DEFAULTS = {"letter": 4, "pages": 500, "mb": 20}
+# Height (points) allowed per page boundary an entry crosses, for the line
+# left unused where a paragraph is split and the spacing around the split
+SPLIT_SLACK = 40
+
 def clean_text(text):
     if not text:
         return ""
@@ -14,56 +29,245 @@ def clean_text(text):
     text = ' '.join(text.split())
     return text.strip()
 
-def create_aggressive_pdf(csv_file, output_pdf):
-    doc = SimpleDocTemplate(output_pdf, pagesize=A4, rightMargin=50, leftMargin=50, topMargin=50, bottomMargin=30)
-    
+def make_document(output_pdf):
+    return SimpleDocTemplate(output_pdf, pagesize=A4, rightMargin=50, leftMargin=50, topMargin=50, bottomMargin=30)
+
+def read_rows(csv_file):
+    with open(csv_file, 'r', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        next(reader)  # Skip header
+        yield from reader
+
+def make_styles():
     styles = getSampleStyleSheet()
     
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=18, spaceAfter=20, textColor=darkblue, alignment=1)
-    term_style = ParagraphStyle('Term', parent=styles['Heading2'], fontSize=12, spaceAfter=8, spaceBefore=15, textColor=darkblue)
-    definition_style = ParagraphStyle('Definition', parent=styles['Normal'], fontSize=10, spaceAfter=12, leftIndent=15, rightIndent=15)
-    source_style = ParagraphStyle('Source', parent=styles['Normal'], fontSize=8, spaceAfter=15, leftIndent=15, rightIndent=15, textColor=darkblue)
+    return {
+        'title': ParagraphStyle('Title', parent=styles['Heading1'], fontSize=18, spaceAfter=20, textColor=darkblue, alignment=1),
+        'subtitle': ParagraphStyle('Subtitle', parent=styles['Normal'], fontSize=11, alignment=1, spaceAfter=30),
+        'term': ParagraphStyle('Term', parent=styles['Heading2'], fontSize=12, spaceAfter=8, spaceBefore=15, textColor=darkblue),
+        'definition': ParagraphStyle('Definition', parent=styles['Normal'], fontSize=10, spaceAfter=12, leftIndent=15, rightIndent=15),
+        'source': ParagraphStyle('Source', parent=styles['Normal'], fontSize=8, spaceAfter=15, leftIndent=15, rightIndent=15, textColor=darkblue),
+    }
+
+def usable_entries(rows):
+    """Yield cleaned (term, definition, source) for rows worth rendering"""
+    for row in rows:
+        if len(row) >= 3:
+            term = clean_text(row[0])
+            definition = clean_text(row[1])
+            source = clean_text(row[2])
+            
+            if term and definition:
+                yield term, definition, source
+
+def definition_paragraphs(definition):
+    """The paragraphs a definition is laid out in: one per sentence for long definitions"""
+    # Split long definitions
+    if len(definition) <= 300:
+        return [definition]
+    return [finish(sent) for sent in sentences(definition)]
+
+def entry_flowables(term, definition, source, styles, links=None):
+    heading = f"<b>{term}</b>"
+    if links:
+        heading = links.heading(term, heading)
+    yield Paragraph(heading, styles['term'])
     
-    story = []
-    story.append(Paragraph("Complete Definition Collection", title_style))
-    story.append(Paragraph("All extracted definitions from legal documents", ParagraphStyle('Subtitle', parent=styles['Normal'], fontSize=11, alignment=1, spaceAfter=30)))
-    story.append(PageBreak())
+    for para in definition_paragraphs(definition):
+        yield Paragraph(links.link(para, term) if links else para, styles['definition'])
+    
+    if source:
+        yield Paragraph(f"<i>Source: {source}</i>", styles['source'])
+
+class FitCheck(Flowable):
+    """Zero-height flowable laid out just before an entry, asking ``full`` whether the entry still fits.
+
+    It is asked at layout time, when the page and the height left on it are
+    known; ``full(entry height, height left on this page)`` returns True to
+    end the volume before the entry.
+    """
+
+    def __init__(self, flowables, full, new_page=False):
+        super().__init__()
+        self.flowables = flowables
+        self.full = full
+        self.new_page = new_page  # the entry will start on a new page
+        self.stop = False
+
+    def wrap(self, availWidth, availHeight):
+        height = 0
+        for flowable in self.flowables:
+            height += flowable.wrap(availWidth, 1e9)[1] + flowable.getSpaceBefore() + flowable.getSpaceAfter()
+        self.stop = self.full(height, 0 if self.new_page else availHeight)
+        return 0, 0
+
+    def draw(self):
+        pass
+
+def volume_story(entries, stats, subtitle="All extracted definitions from legal documents", full=None,
+                 links=None):
+    """Yield a title page and entries until ``entries`` runs out or ``full`` says stop.
+
+    ``full`` is given to a FitCheck laid out before every entry but the
+    first, so the story must be laid out as it is produced (no look-ahead).
+    An entry that does not fit is not laid out and is left in
+    stats['left_over'] for the next volume. ``links`` is a CrossReferences
+    over every term, to link mentions.
+    """
+    styles = make_styles()
+    
+    yield Paragraph("Complete Definition Collection", styles['title'])
+    yield Paragraph(subtitle, styles['subtitle'])
+    yield PageBreak()
     
     count = 0
-    with open(csv_file, 'r', encoding='utf-8-sig') as file:
-        reader = csv.reader(file)
-        next(reader)  # Skip header
+    stats['entries'] = 0
+    for term, definition, source in entries:
+        flowables = list(entry_flowables(term, definition, source, styles, links))
+        # Page break every 20 definitions, only once the next one is known to go into this volume
+        new_page = count and count % 20 == 0
+        if full and count:
+            check = FitCheck(flowables, full, new_page)
+            yield check
+            if check.stop:
+                stats['left_over'] = (term, definition, source)
+                break
+        if new_page:
+            yield PageBreak()
+        yield from flowables
         
-        for row in reader:
-            if len(row) >= 3:
-                term = clean_text(row[0])
-                definition = clean_text(row[1])
-                source = clean_text(row[2])
-                
-                if term and definition:
-                    story.append(Paragraph(f"<b>{term}</b>", term_style))
-                    
-                    # Split long definitions
-                    if len(definition) > 300:
-                        sentences = definition.split('. ')
-                        for sent in sentences:
-                            if sent.strip():
-                                if not sent.endswith('.'):
-                                    sent += '.'
-                                story.append(Paragraph(sent, definition_style))
-                    else:
-                        story.append(Paragraph(definition, definition_style))
-                    
-                    if source:
-                        story.append(Paragraph(f"<i>Source: {source}</i>", source_style))
-                    
-                    count += 1
-                    if count % 20 == 0:
-                        story.append(PageBreak())
+        count += 1
+        stats['entries'] = count
+        stats.setdefault('first', term)
+        stats['last'] = term
+
+def build_story(rows, stats, links=None):
+    """Yield the title page and entry flowables, consuming rows lazily"""
+    return volume_story(usable_entries(rows), stats, links=links)
+
+def create_aggressive_pdf(csv_file, output_pdf, links=False):
+    doc = make_document(output_pdf)
+    
+    if links:
+        links = CrossReferences(term for term, _, _ in usable_entries(read_rows(csv_file)))
+        print(f"🔗 Linking mentions of {len(links.anchors)} terms")
     
+    stats = {}
+    story = list(build_story(read_rows(csv_file), stats, links or None))
+    count = stats['entries']
+    
+    metrics.watch_layout("aggressive_to_pdf", story)
     doc.build(story)
     print(f"✅ Created PDF with {count} definitions: {output_pdf}")
     return count
 
+def letter_ranges(csv_file, letters_per_volume):
+    """Split the index letters into ranges of ``letters_per_volume``, dropping empty ones"""
+    present = {index_letter(term) for term, _, _ in usable_entries(read_rows(csv_file))}
+    letters = [letter for letter in INDEX_LETTERS if letter in present]
+    return [letters[i:i + letters_per_volume] for i in range(0, len(letters), letters_per_volume)]
+
+def render_volume(path, entries, subtitle, page_limit=None):
+    """Lay out one volume, streaming its entries; returns its stats.
+
+    With ``page_limit``, the volume ends before the first entry that would
+    run past that page (only an entry longer than a whole volume can, as
+    the first entry of its volume). stats['left_over'] is that entry.
+    """
+    from pipeline import StreamingStory
+    
+    doc = make_document(path)
+    stats = {}
+    # Frame height less its padding
+    page_height = doc.height - 12
+    
+    def full(height, available):
+        pages_left = page_limit - doc.page
+        return height > available + pages_left * (page_height - SPLIT_SLACK) - SPLIT_SLACK
+    
+    story = volume_story(entries, stats, subtitle, full if page_limit else None)
+    # No look-ahead: each FitCheck is laid out before the entry after it is produced
+    doc.build(StreamingStory(story, lookahead=1 if page_limit else 32))
+    stats['pages'] = doc.page
+    stats['bytes'] = os.path.getsize(path)
+    stats['path'] = path
+    return stats
+
+def create_aggressive_volumes(csv_file, output_pdf, volume_by="pages", volume_size=None):
+    """Render the definitions as a series of volumes plus a master index PDF.
+
+    ``volume_by`` is "letter" (``volume_size`` index letters per volume),
+    "pages" (start a new volume after about ``volume_size`` pages) or "mb"
+    (about ``volume_size`` megabytes per volume). Each volume is laid out and
+    written on its own, so renderer memory is bounded by the volume size
+    rather than by the size of the CSV. Returns the number of definitions.
+    """
+    volume_size = volume_size or VOLUME_DEFAULTS[volume_by]
+    base, ext = os.path.splitext(output_pdf)
+    volumes = []
+    
+    if volume_by == "letter":
+        # One cheap pass over the CSV per volume keeps this right for CSVs that are not sorted by term
+        for letters in letter_ranges(csv_file, max(1, int(volume_size))):
+            label = letters[0] if len(letters) == 1 else f"{letters[0]}-{letters[-1]}"
+            entries = (entry for entry in usable_entries(read_rows(csv_file)) if index_letter(entry[0]) in letters)
+            print(f"📘 Volume {len(volumes) + 1}: {label}")
+            volumes.append(render_volume(f"{base}_{label.replace('#', '0')}{ext}", entries,
+                                         f"Volume {len(volumes) + 1}: {label}"))
+    else:
+        entries = usable_entries(read_rows(csv_file))
+        # Byte targets are turned into page targets using the bytes per page of the volumes so far
+        bytes_per_page = 1500
+        left_over = None
+        while True:
+            first = left_over or next(entries, None)
+            if first is None:
+                break
+            if volume_by == "pages":
+                page_limit = max(1, int(volume_size))
+            else:
+                page_limit = max(1, int(volume_size * 1024 * 1024 / bytes_per_page))
+            number = len(volumes) + 1
+            print(f"📘 Volume {number}")
+            volumes.append(render_volume(f"{base}_vol{number:02d}{ext}", itertools.chain([first], entries),
+                                         f"Volume {number}", page_limit))
+            left_over = volumes[-1].pop('left_over', None)
+            bytes_per_page = sum(v['bytes'] for v in volumes) / sum(v['pages'] for v in volumes)
+    
+    index_pdf = f"{base}_index{ext}"
+    create_volume_index(volumes, index_pdf)
+    count = sum(volume['entries'] for volume in volumes)
+    print(f"✅ Created {len(volumes)} volumes with {count} definitions, index: {index_pdf}")
+    return count
+
+def create_volume_index(volumes, index_pdf):
+    """Small master PDF listing every volume's term range, linked to the volume file"""
+    import fitz  # PyMuPDF
+    
+    styles = make_styles()
+    story = [Paragraph("Complete Definition Collection", styles['title']),
+             Paragraph(f"Index of {len(volumes)} volumes", styles['subtitle'])]
+    for number, volume in enumerate(volumes, 1):
+        filename = os.path.basename(volume['path'])
+        story.append(Paragraph(f'<a href="volume:{escape(filename)}"><b>Volume {number}: '
+                               f'{escape(volume["first"])} &ndash; {escape(volume["last"])}</b></a>', styles['term']))
+        story.append(Paragraph(f"{filename} &middot; {volume['entries']:,} definitions &middot; "
+                               f"{volume['pages']:,} pages &middot; {volume['bytes'] / 1024 / 1024:.1f} MB",
+                               styles['definition']))
+    make_document(index_pdf).build(story)
+    
+    # Turn the placeholder links into links that open the volume files,
+    # which are looked up next to the index
+    pdf = fitz.open(index_pdf)
+    for page in pdf:
+        for xref, annot_type, _ in page.annot_xrefs():
+            if annot_type != fitz.PDF_ANNOT_LINK:
+                continue
+            kind, uri = pdf.xref_get_key(xref, "A/URI")
+            if kind == "string" and uri.startswith("volume:"):
+                pdf.xref_set_key(xref, "A", f"<</S/GoToR/F{fitz.get_pdf_str(uri[7:])}/D[0/Fit]>>")
+    pdf.saveIncr()
+    pdf.close()
+
 if __name__ == "__main__":
     create_aggressive_pdf("every_single_definition.csv", "Complete_Definitions.pdf")
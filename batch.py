@@ -0,0 +1,419 @@
+"""Batch runner shared by the scrapers.
+
+Documents are scheduled largest first among those discovered so far (file
+size is used as the cost estimate, since opening a malformed PDF just to
+count its pages can hang too), so a huge casebook rarely starts last and
+defines the wall time of the run, while scanning still starts as soon as the
+first PDF is found. With ``jobs`` > 1 or a ``timeout`` each document is scanned in a worker
+process; a worker that runs past the timeout or crashes is killed and
+replaced, and the document is quarantined instead of stalling the batch.
+With ``shard_pages`` a document longer than that is split into page ranges
+that several workers extract and scan, so one giant casebook no longer
+keeps a single worker busy while the others sit idle. With ``memo`` every
+process reads pages it has already scanned back from a page_memo file, and
+with ``keep_boilerplate`` no process strips running headers and footers.
+"""
+import csv
+import heapq
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+import documents
+import metrics
+from documents import PREFETCH_FILES, PREFETCH_MB, find_pdfs, prefetched, skip_duplicate_files
+
+def estimate_cost(pdf_path):
+    """Cheap cost estimate for scheduling: file size in bytes"""
+    try:
+        return os.path.getsize(pdf_path)
+    except OSError:
+        return 0
+
+def load_quarantine(quarantine_file):
+    """Paths already quarantined by an earlier run"""
+    if not quarantine_file or not os.path.exists(quarantine_file):
+        return set()
+    with open(quarantine_file, newline="", encoding="utf-8") as f:
+        return {row[0] for row in csv.reader(f) if row and row[0] != "Path"}
+
+def save_quarantine(quarantine_file, offenders):
+    """Append newly quarantined documents to the quarantine CSV"""
+    new_file = not os.path.exists(quarantine_file)
+    with open(quarantine_file, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(["Path", "Reason", "Detail"])
+        for pdf_path, reason, detail in offenders:
+            writer.writerow([pdf_path, reason, detail])
+
+def report_duplicates(duplicates):
+    """Print the exact duplicate files being skipped"""
+    if not duplicates:
+        return
+    size = sum(estimate_cost(pdf_path) for pdf_path, _ in duplicates)
+    print(f"⏭️ Skipped {len(duplicates)} duplicate PDF(s), {size / 1e6:.1f} MB not rescanned:")
+    for pdf_path, original in duplicates:
+        print(f"    {pdf_path} = {original}")
+
+def _scan_page(scan_pdf):
+    """The per-page extractor behind a scraper's scan_pdf (None if it has none)"""
+    return getattr(sys.modules.get(scan_pdf.__module__), "scan_page", None)
+
+def _run_task(scan_pdf, task):
+    """One task in a worker: a whole document, or one page range of a split document.
+
+    Returns (status, payload). A document with more than ``shard_pages``
+    pages is not scanned here: the text of its first range and its page
+    count come back with status "split", and the rest is done as tasks of
+    the other two kinds.
+    """
+    kind, filename, pdf_path, *args = task
+    if kind == "document":
+        shard_pages, = args
+        if shard_pages:
+            count = documents.page_count(pdf_path)
+            if count > shard_pages:
+                return "split", (documents.page_texts(pdf_path, 0, shard_pages), count)
+        return "ok", scan_pdf(pdf_path, filename)
+    if kind == "pages":
+        start, stop = args
+        return "ok", documents.page_texts(pdf_path, start, stop)
+    texts, first_page = args
+    return "ok", documents.scan_pages(_scan_page(scan_pdf), texts, filename, first_page)
+
+def _worker_loop(scan_pdf, conn, memo=None, keep_boilerplate=False):
+    """Worker process: run one task per message until told to stop"""
+    documents.use_memo(memo)
+    documents.keep_boilerplate(keep_boilerplate)
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        pages_before = documents.pages_scanned
+        try:
+            status, payload = _run_task(scan_pdf, task)
+        except Exception as e:
+            status, payload = "error", f"{type(e).__name__}: {e}"
+        conn.send((status, payload, documents.pages_scanned - pages_before))
+    conn.close()
+
+class _Worker:
+    def __init__(self, context, scan_pdf, memo=None, keep_boilerplate=False):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_loop, args=(scan_pdf, child_conn, memo, keep_boilerplate),
+                                       daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task = None
+        self.started = None
+
+    def assign(self, task):
+        self.task = task
+        self.started = time.monotonic()
+        self.conn.send(task)
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.kill()
+
+def _scan_serial(scan_pdf, pdf_files, label, prefetch, prefetch_mb):
+    for filename, pdf_path, data in prefetched(pdf_files, prefetch, prefetch_mb):
+        print(f"📄 {label}: {filename}")
+        pages_before = documents.pages_scanned
+        try:
+            records = scan_pdf(pdf_path, filename, data)
+        except Exception as e:
+            print(f"❌ Error with {filename}: {e}")
+            yield pdf_path, "error", f"{type(e).__name__}: {e}", documents.pages_scanned - pages_before
+        else:
+            yield pdf_path, "ok", records, documents.pages_scanned - pages_before
+
+class _Split:
+    """A document scanned as page ranges by several workers.
+
+    The ranges' texts come back to this process, where the running
+    headers and footers are found over the whole document exactly as in a
+    serial scan; the stripped ranges then go back out to be scanned, and
+    their records are joined in page order.
+    """
+
+    def __init__(self, filename, first_texts, page_count, shard_pages):
+        self.filename = filename
+        self.ranges = [(start, min(start + shard_pages, page_count)) for start in range(0, page_count, shard_pages)]
+        self.texts = {0: first_texts}
+        self.records = {}
+        self.pages = len(first_texts)
+        self.elapsed = 0.0
+        self.stripped = None
+
+    def add_texts(self, start, texts, pages):
+        """Store one range's texts; returns the stripped ranges to scan once every range is in"""
+        self.texts[start] = texts
+        self.pages += pages
+        if len(self.texts) < len(self.ranges):
+            return []
+        texts = [text for start, _ in self.ranges for text in self.texts[start]]
+        texts, *self.stripped = documents.strip_boilerplate(texts)
+        self.texts = None
+        return [(start, texts[start:stop]) for start, stop in self.ranges]
+
+    def add_records(self, start, records, elapsed):
+        """Store one range's records; returns every record in page order once all ranges are scanned"""
+        self.records[start] = records
+        self.elapsed += elapsed
+        if len(self.records) < len(self.ranges):
+            return None
+        documents.report_stripped(self.filename, *self.stripped, self.elapsed)
+        return [record for start, _ in self.ranges for record in self.records[start]]
+
+def _worker_context():
+    """Multiprocessing context for a new worker: the default, or spawn once other threads are running.
+
+    Forking while another thread runs (the pipeline's layout, a metrics
+    server) can copy locks it holds into the child, where they are never
+    released. This is checked for every worker, replacements included.
+    """
+    if threading.active_count() > 1:
+        return multiprocessing.get_context("spawn")
+    return multiprocessing.get_context()
+
+def _scan_isolated(scan_pdf, pdf_files, label, jobs, timeout, shard_pages=None, memo=None, keep_boilerplate=False):
+    if not _scan_page(scan_pdf):
+        shard_pages = None
+    # Files are discovered one at a time while the workers are busy, and the
+    # largest file discovered so far is always the next one handed out.
+    # Scanning the stripped ranges of a split document comes before
+    # anything else, since it is all that stands between it and its results.
+    discovered = iter(pdf_files)
+    order = itertools.count()
+    exhausted = False
+    pending = []   # (0 for range scans, -cost, seq, task)
+    workers = []
+    splits = {}    # pdf_path -> _Split
+    costs = {}
+
+    try:
+        while True:
+            idle = [w for w in workers if w.task is None]
+            while pending and (idle or len(workers) < jobs):
+                if idle:
+                    worker = idle.pop()
+                else:
+                    worker = _Worker(_worker_context(), scan_pdf, memo, keep_boilerplate)
+                    workers.append(worker)
+                task = heapq.heappop(pending)[3]
+                kind, filename = task[:2]
+                if kind == "document":
+                    print(f"📄 {label}: {filename}")
+                elif kind == "pages":
+                    print(f"📄 {label}: {filename} (pages {task[3] + 1}-{task[4]})")
+                worker.assign(task)
+
+            busy = [w for w in workers if w.task]
+            if not exhausted:
+                ready = wait([w.conn for w in busy], 0) if busy else []
+                if not ready:
+                    item = next(discovered, None)
+                    if item is None:
+                        exhausted = True
+                    else:
+                        filename, pdf_path = item
+                        costs[pdf_path] = estimate_cost(pdf_path)
+                        heapq.heappush(pending, (1, -costs[pdf_path], next(order),
+                                                 ("document", filename, pdf_path, shard_pages)))
+            elif busy:
+                wait_for = None
+                if timeout:
+                    wait_for = max(0, min(w.started + timeout for w in busy) - time.monotonic())
+                ready = wait([w.conn for w in busy], wait_for)
+            else:
+                break
+
+            for i, worker in enumerate(workers):
+                if worker.task is None:
+                    continue
+                task = worker.task
+                kind, filename, pdf_path = task[:3]
+                pages = 0
+                if worker.conn in ready:
+                    try:
+                        status, payload, pages = worker.conn.recv()
+                    except (EOFError, OSError):
+                        worker.process.join(1)
+                        status, payload = "crashed", f"worker exited with code {worker.process.exitcode}"
+                elif timeout and time.monotonic() - worker.started > timeout:
+                    status, payload = "timeout", f"no result after {timeout:g}s"
+                else:
+                    continue
+
+                # A result for a range of a document that has already failed is dropped
+                stale = kind != "document" and pdf_path not in splits
+                if status in ("ok", "error", "split"):
+                    if status == "error" and not stale:
+                        print(f"❌ Error with {filename}: {payload}")
+                    worker.task = None
+                else:
+                    if not stale:
+                        print(f"⏱️ Quarantined {filename}: {payload}")
+                    worker.kill()
+                    workers[i] = _Worker(_worker_context(), scan_pdf, memo, keep_boilerplate)
+
+                if stale:
+                    continue
+                if kind == "document" and status != "split":
+                    yield pdf_path, status, payload, pages
+                elif kind == "document":
+                    first_texts, page_count = payload
+                    split = splits[pdf_path] = _Split(filename, first_texts, page_count, shard_pages)
+                    print(f"🔀 {filename}: {page_count} pages split into {len(split.ranges)} ranges")
+                    for start, stop in split.ranges[1:]:
+                        cost = costs[pdf_path] * (stop - start) // page_count
+                        heapq.heappush(pending, (1, -cost, next(order), ("pages", filename, pdf_path, start, stop)))
+                elif status != "ok":
+                    # One failed range fails the document; its other queued ranges are dropped
+                    split = splits.pop(pdf_path)
+                    pending = [entry for entry in pending if entry[3][2] != pdf_path]
+                    heapq.heapify(pending)
+                    yield pdf_path, status, payload, split.pages + pages
+                elif kind == "pages":
+                    for start, texts in splits[pdf_path].add_texts(task[3], payload, pages):
+                        heapq.heappush(pending, (0, 0, next(order), ("scan", filename, pdf_path, texts, start)))
+                else:
+                    records = splits[pdf_path].add_records(task[4], *payload)
+                    if records is not None:
+                        yield pdf_path, "ok", records, splits.pop(pdf_path).pages
+    finally:
+        for worker in workers:
+            worker.stop()
+
+def iter_documents(scan_pdf, pdf_folder, label="Scanning", jobs=1, timeout=None, quarantine_file=None,
+                   isolate=False, skip_duplicates=True, include=None, exclude=None, max_depth=None,
+                   prefetch=PREFETCH_FILES, prefetch_mb=PREFETCH_MB, shard_pages=None, memo=None,
+                   keep_boilerplate=False):
+    """Run ``scan_pdf(pdf_path, filename)`` over every PDF, yielding (pdf_path, records).
+
+    Documents are yielded as soon as they and every document discovered
+    before them are finished, so results always come back in discovery
+    order whatever the scheduling order was, and the scrapers' first-seen
+    dedupe keeps giving the same result. ``isolate`` forces worker
+    processes even for a single job without a timeout. Byte-identical
+    copies of a PDF are scanned once unless ``skip_duplicates`` is False.
+    ``include``, ``exclude`` and ``max_depth`` are passed to find_pdfs;
+    scanning starts on the first PDF found, while discovery goes on. A
+    serial run reads ``prefetch`` PDFs (up to ``prefetch_mb`` MB) ahead on a
+    background thread; worker processes already overlap each other's reads.
+    With worker processes, a document of more than ``shard_pages`` pages is
+    split into ranges of that many pages that separate workers extract and
+    scan; its records are the same as from one worker. ``memo`` is the path
+    of a page_memo SQLite file: pages whose text and extractor have not
+    changed since they were stored are read back instead of scanned. With
+    ``keep_boilerplate`` running headers and footers are not stripped.
+    """
+    skip = load_quarantine(quarantine_file)
+    order = deque()
+    skipped = []
+    duplicates = []
+    sizes = {}
+    finished = {}
+    extractor = scan_pdf.__module__
+
+    counted_duplicates = 0
+
+    def count_duplicates():
+        # skip_duplicate_files appends to ``duplicates``; the counter only ever goes up by the new ones
+        nonlocal counted_duplicates
+        if len(duplicates) > counted_duplicates:
+            metrics.inc("documents_skipped_total", len(duplicates) - counted_duplicates, reason="duplicate")
+            counted_duplicates = len(duplicates)
+
+    def discovered():
+        pdf_files = find_pdfs(pdf_folder, include=include, exclude=exclude, max_depth=max_depth)
+        if skip_duplicates:
+            pdf_files = skip_duplicate_files(pdf_files, duplicates)
+        for filename, pdf_path in pdf_files:
+            if pdf_path in skip:
+                skipped.append(pdf_path)
+                metrics.inc("documents_skipped_total", reason="quarantined")
+                continue
+            order.append(pdf_path)
+            sizes[pdf_path] = estimate_cost(pdf_path)
+            metrics.inc("documents_discovered_total")
+            metrics.inc("bytes_discovered_total", sizes[pdf_path])
+            metrics.set_gauge("documents_queued", len(order) - len(finished))
+            count_duplicates()
+            yield filename, pdf_path
+        count_duplicates()
+        metrics.set_gauge("discovery_complete", 1)
+
+    metrics.set_gauge("discovery_complete", 0)
+    metrics.mark_started("extract")
+    run_start = time.time()
+    page_memo = documents.use_memo(memo)
+    documents.keep_boilerplate(keep_boilerplate)
+    if jobs <= 1 and not timeout and not isolate:
+        outcomes = _scan_serial(scan_pdf, discovered(), label, prefetch, prefetch_mb)
+    else:
+        outcomes = _scan_isolated(scan_pdf, discovered(), label, max(1, jobs), timeout, shard_pages, memo,
+                                  keep_boilerplate)
+
+    offenders = []
+    for pdf_path, status, payload, pages in outcomes:
+        metrics.inc("documents_total", status=status)
+        metrics.inc("bytes_done_total", sizes.get(pdf_path, 0))
+        metrics.inc("pages_total", pages)
+        if status == "ok":
+            finished[pdf_path] = payload
+            metrics.inc("records_total", len(payload), extractor=extractor)
+        else:
+            finished[pdf_path] = []
+            offenders.append((pdf_path, status, payload))
+        while order and order[0] in finished:
+            done = order.popleft()
+            yield done, finished.pop(done)
+        metrics.set_gauge("documents_queued", len(order) - len(finished))
+    metrics.mark_finished("extract")
+    if page_memo is not None:
+        reused, scanned = page_memo.summary(run_start)
+        print(f"🧠 Page memo: {reused} page(s) reused, {scanned} scanned ({memo})")
+        documents.use_memo(None)
+    documents.keep_boilerplate(False)
+
+    if skipped:
+        print(f"⏭️ Skipped {len(skipped)} quarantined document(s) listed in {quarantine_file}")
+    report_duplicates(duplicates)
+    if offenders:
+        print(f"\n⚠️ {len(offenders)} document(s) failed:")
+        for pdf_path, reason, detail in offenders:
+            print(f"    [{reason}] {pdf_path} - {detail}")
+        stuck = [o for o in offenders if o[1] != "error"]
+        if quarantine_file and stuck:
+            save_quarantine(quarantine_file, stuck)
+            print(f"    Timeouts and crashes recorded in {quarantine_file}")
+
+def iter_records(scan_pdf, pdf_folder, label="Scanning", **batch_options):
+    """Run ``scan_pdf`` over every PDF and yield the records one by one in discovery order"""
+    for _, document_records in iter_documents(scan_pdf, pdf_folder, label, **batch_options):
+        yield from document_records
+
+def collect_records(scan_pdf, pdf_folder, label="Scanning", **batch_options):
+    """Run ``scan_pdf`` over every PDF and return all records in discovery order"""
+    return list(iter_records(scan_pdf, pdf_folder, label, **batch_options))
@@ -0,0 +1,546 @@
+"""Timing benchmarks for the toolkit.
+
+    python benchmarks.py startup [--runs 5]
+    python benchmarks.py pipeline cases [PDF_FOLDER_OR_FILE...] [--jobs 2]
+    python benchmarks.py extractors [--pages 300] [--save-golden]
+    python benchmarks.py prefetch [--latency-ms 40 --mb-per-s 20 --files 4]
+    python benchmarks.py render [--rows 1000 10000 100000] [--words 40] [--renderers render-bullet ...]
+                                [--save-baseline]
+    python benchmarks.py segmentation [--words 1000 10000 100000 1000000]
+    python benchmarks.py volumes [--rows 921] [--sizes 3 5 20]
+
+startup: cold-start wall time of every cli.py subcommand on a one-page PDF
+or a one-row CSV, each run in a fresh interpreter.
+pipeline: end-to-end time of scraper -> CSV -> renderer against the
+overlapped pipeline on the same documents (a synthetic corpus by default).
+extractors: per-page time of the structured and bullet extractors on a
+synthetic dense glossary and on bullet-heavy lecture slides. Their output is
+checked against the digests in extractor_golden.json (written by
+--save-golden), so a faster extractor is known to find the same definitions.
+prefetch: a serial bullet scan of a synthetic corpus on simulated slow
+storage (every read waits for latency plus size / bandwidth), with and
+without read-ahead.
+render: every CSV-to-PDF renderer on synthetic CSVs of the given sizes with
+explanations of a fixed number of words, each run in a fresh interpreter.
+Reports entries/s, pages/s, peak RSS and output size, and compares them
+with render_baseline.json (written by --save-baseline).
+segmentation: sentence and paragraph splitting (segmentation.py) on single
+explanations of the given lengths, with citations, abbreviations and
+over-long sentences mixed in.
+volumes: render-aggressive --volume-by pages on a synthetic CSV with
+definitions of mixed lengths, for each volume size; exits with an error if
+any volume has more pages than its size.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RENDER_BASELINE = os.path.join(HERE, "render_baseline.json")
+# Slowdown (or growth in memory or output size) against the baseline that is flagged
+RENDER_TOLERANCE = 0.10
+EXTRACTOR_GOLDEN = os.path.join(HERE, "extractor_golden.json")
+
+SAMPLE_LINES = [
+    "Donoghue v Stevenson [1932]",
+    "A manufacturer owes a duty of care to the ultimate consumer of its products.",
+    "Negligence",
+    "• A breach of a duty of care which results in damage",
+    "• Requires duty, breach, causation and remoteness",
+    "Contract: An agreement that is enforceable at law between the parties",
+]
+
+SAMPLE_CSVS = {
+    "render-cases": (["Case Name", "Explanation", "Source PDF"],
+                     ["Donoghue v Stevenson", "A manufacturer owes a duty of care to the consumer.", "torts.pdf"]),
+    "render-simple": (["Case Name", "Explanation", "Source PDF"],
+                      ["Donoghue v Stevenson", "A manufacturer owes a duty of care to the consumer.", "torts.pdf"]),
+    "render-bullet": (["Term", "Explanation 1", "Explanation 2", "Explanation 3", "Explanation 4",
+                       "Source PDF", "Page", "Line Count"],
+                      ["Negligence", "A breach of duty", "Causing damage", "", "", "torts.pdf", "1", "2"]),
+    "render-aggressive": (["Term", "Definition", "Source PDF", "Page", "Raw Line"],
+                          ["Contract", "An agreement that is enforceable at law", "contract.pdf", "1", ""]),
+}
+
+def write_sample_pdf(path, lines=SAMPLE_LINES, pages=1):
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        y = 72
+        for line in lines:
+            page.insert_text((72, y), line, fontsize=10)
+            y += 14
+    doc.save(path)
+    doc.close()
+
+def write_sample_csv(path, header, row):
+    import csv
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerow(row)
+
+def time_command(argv, runs):
+    """Median wall time of running argv in a fresh interpreter"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=HERE, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def bench_startup(runs):
+    from cli import RENDERERS, SCRAPERS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "sample.pdf")
+        write_sample_pdf(pdf_path)
+
+        commands = [("python (bare)", [sys.executable, "-c", "pass"]),
+                    ("cli.py --help", [sys.executable, "cli.py", "--help"])]
+        for name in SCRAPERS:
+            out = os.path.join(tmp, f"{name}.csv")
+            commands.append((name, [sys.executable, "cli.py", name, pdf_path, "-o", out]))
+        for name in RENDERERS:
+            csv_path = os.path.join(tmp, f"{name}.csv")
+            write_sample_csv(csv_path, *SAMPLE_CSVS[name])
+            out = os.path.join(tmp, f"{name}.pdf")
+            commands.append((name, [sys.executable, "cli.py", name, csv_path, "-o", out]))
+
+        print(f"⏱️  Cold start, median of {runs} runs")
+        for label, argv in commands:
+            seconds = time_command(argv, runs)
+            print(f"  {label:20s} {seconds * 1000:8.1f} ms")
+
+def write_synthetic_corpus(folder, documents=6, pages=40):
+    """Multi-page PDFs full of distinct cases, bullet definitions and "Term: ..." lines"""
+    import fitz  # PyMuPDF
+
+    explanation = ("The court held that a duty of care was owed because the harm was reasonably "
+                   "foreseeable and the relationship between the parties was sufficiently proximate.")
+    paths = []
+    for d in range(documents):
+        doc = fitz.open()
+        for p in range(pages):
+            page = doc.new_page()
+            y = 60
+            for n in range(6):
+                tag = "".join(chr(97 + int(c)) for c in f"{d}{p:03d}{n}")
+                lines = [f"Claimant{tag} v Defendant{tag}",
+                         explanation[:80], explanation[80:],
+                         f"Concept{tag}",
+                         "• A rule that applies between parties and is enforced by the courts",
+                         "• Requires an offer, acceptance and consideration to be present",
+                         f"Term{tag}: a definition that is long enough to be picked up"]
+                for line in lines:
+                    page.insert_text((50, y), line, fontsize=8)
+                    y += 11
+        path = os.path.join(folder, f"synthetic_{d}.pdf")
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths
+
+def bench_pipeline(scraper_name, inputs, jobs):
+    import importlib
+    from pipeline import PIPELINES, run_pipeline
+
+    scraper_module, renderer_module = PIPELINES[scraper_name]
+    scraper = importlib.import_module(scraper_module)
+    renderer = importlib.import_module(renderer_module)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not inputs:
+            inputs = write_synthetic_corpus(tmp)
+        csv_path = os.path.join(tmp, "two_step.csv")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            scraper.main(inputs, csv_path, jobs=jobs)
+            extracted = time.perf_counter()
+            doc = renderer.make_document(os.path.join(tmp, "two_step.pdf"))
+            doc.build(list(renderer.build_story(renderer.read_rows(csv_path), {})))
+            two_step = time.perf_counter()
+
+            run_pipeline(scraper_name, inputs, os.path.join(tmp, "pipeline.pdf"), jobs=jobs)
+            pipelined = time.perf_counter()
+
+    print(f"⏱️  {scraper_name}: end-to-end latency ({jobs} extraction worker(s))")
+    print(f"  two-step (scrape {extracted - start:.2f}s + render {two_step - extracted:.2f}s) {two_step - start:8.2f} s")
+    print(f"  pipeline                                  {pipelined - two_step:8.2f} s")
+
+def glossary_pages(pages=300, lines_per_page=60, seed=0):
+    """Page texts of a dense synthetic glossary: short terms followed by bullets and explanations"""
+    import random
+
+    rng = random.Random(seed)
+    words = ("contract offer acceptance consideration duty care breach damage remoteness causation "
+             "liability tort equity trust estoppel agency").split()
+    explanations = ["• A rule that applies between the parties and is enforced by the courts",
+                    "- Requires an offer, acceptance and consideration to be present",
+                    "1. The claimant must show that the loss was reasonably foreseeable",
+                    "which is shared jointly and severally by the defendants",
+                    "The term means an obligation recognised by law.",
+                    "and also covers any later variation of the agreement"]
+    texts = []
+    for page in range(pages):
+        lines = []
+        while len(lines) < lines_per_page:
+            lines.append(" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))).title())
+            lines.extend(rng.choice(explanations) for _ in range(rng.randint(1, 5)))
+            if rng.random() < 0.2:
+                lines.append("")
+        lines.append(str(page + 1))
+        texts.append("\n".join(lines))
+    return texts
+
+def slide_pages(pages=300, seed=0):
+    """Page texts of dense lecture slides: headings over runs of short bullets, with the odd stray line"""
+    import random
+
+    rng = random.Random(seed)
+    words = ("offer acceptance consideration duty care breach damage remoteness causation "
+             "liability tort equity trust estoppel agency claimant defendant").split()
+    bullets = ["• Must be communicated", "• Objective test", "- Reasonable person standard",
+               "* Joint and several liability", "• Sharing the loss", "1. Offer", "2. Acceptance",
+               "• Duty is owed to the neighbour", "‣ Little or no longer relevant", "◦ Remedies"]
+    strays = ["", "", "Page 4", "Section 3", "Chapter 2", "Key Points:", "Summary",
+              "The claimant must prove loss.", "Is there a duty?", "Caparo v Dickman 1990",
+              "Contract Law Act", "and", "Held"]
+    texts = []
+    for page in range(pages):
+        lines = []
+        while len(lines) < rng.randint(25, 45):
+            roll = rng.random()
+            if roll < 0.35:
+                lines.append(" ".join(rng.choice(words) for _ in range(rng.randint(1, 4))).title()
+                             + rng.choice(["", "", ":"]))
+            elif roll < 0.85:
+                lines.append(rng.choice(bullets))
+            else:
+                lines.append(rng.choice(strays))
+        texts.append("\n".join(lines))
+    return texts
+
+def extractor_digest(results):
+    """Short fingerprint of an extractor's output over a corpus"""
+    import hashlib
+
+    return hashlib.sha256(json.dumps(results, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+def bench_extractors(pages, runs, save_golden):
+    import structured_definition_scraper
+    import bullet_definition_scraper
+
+    corpora = [("glossary", glossary_pages(pages)), ("slides", slide_pages(pages))]
+    extractors = [("structured", structured_definition_scraper.extract_structured_definitions),
+                  ("bullet", bullet_definition_scraper.extract_bullet_point_definitions)]
+    golden = {}
+    if os.path.exists(EXTRACTOR_GOLDEN):
+        with open(EXTRACTOR_GOLDEN, encoding="utf-8") as f:
+            golden = json.load(f)
+    print(f"⏱️  Extractors on a dense glossary and on bullet-heavy slides ({pages} pages each), best of {runs}")
+    for corpus, texts in corpora:
+        for name, extract in extractors:
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                results = [extract(text, "glossary.pdf", n) for n, text in enumerate(texts)]
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            found = sum(map(len, results))
+            key = f"{corpus}/{name}/{pages}"
+            digest = extractor_digest(results)
+            if save_golden:
+                golden[key] = digest
+                check = ""
+            elif key not in golden:
+                check = "  (no golden output yet)"
+            else:
+                check = "  output matches golden" if golden[key] == digest else "  ⚠️ output differs from golden"
+            print(f"  {corpus:9s}{name:11s} {best * 1000 / pages:8.3f} ms/page {pages / best:10.0f} pages/s  "
+                  f"({found} definitions){check}")
+    if save_golden:
+        with open(EXTRACTOR_GOLDEN, "w", encoding="utf-8") as f:
+            json.dump(golden, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 Golden output saved to {EXTRACTOR_GOLDEN}")
+
+def bench_prefetch(latency_ms, mb_per_s, files, documents_count):
+    import bullet_definition_scraper
+    import documents
+    from batch import iter_records
+
+    read_pdf = documents.read_pdf
+
+    def slow_read(path):
+        data = read_pdf(path)
+        time.sleep(latency_ms / 1000 + len(data or b"") / (mb_per_s * 1e6))
+        return data
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_corpus(tmp, documents=documents_count)
+        documents.read_pdf = slow_read
+        timings = {}
+        try:
+            for depth in (0, files):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    found = sum(1 for _ in iter_records(bullet_definition_scraper.scan_pdf, tmp, prefetch=depth))
+                timings[depth] = time.perf_counter() - start
+        finally:
+            documents.read_pdf = read_pdf
+
+    print(f"⏱️  Serial bullet scan of {documents_count} PDFs, storage at {latency_ms:g} ms + {mb_per_s:g} MB/s "
+          f"({found} records)")
+    print(f"  no read-ahead        {timings[0]:8.2f} s")
+    print(f"  read-ahead {files:2d} files  {timings[files]:8.2f} s  ({timings[0] / timings[files]:.2f}x)")
+
+def write_render_csv(path, renderer, rows, words, seed=0):
+    """A synthetic CSV for ``renderer``: sorted distinct terms, explanations of exactly ``words`` words"""
+    import csv
+    import random
+
+    rng = random.Random(seed)
+    vocabulary = ("contract offer acceptance consideration duty care breach damage remoteness causation "
+                  "liability tort equity trust estoppel agency claimant defendant court held that the "
+                  "harm was reasonably foreseeable and relationship parties sufficiently proximate").split()
+
+    def text(count):
+        return " ".join(rng.choice(vocabulary) for _ in range(count))
+
+    # Two-word names with a numeric suffix: distinct, and spread over the alphabet like real output
+    names = sorted(f"{text(2).title()} {i}" for i in range(rows))
+    header = SAMPLE_CSVS[renderer][0]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i, name in enumerate(names):
+            source = f"source_{i % 50:02d}.pdf"
+            if renderer in ("render-cases", "render-simple"):
+                writer.writerow([name.replace(" ", " v ", 1), text(words), source])
+            elif renderer == "render-bullet":
+                share = max(1, words // 3)
+                writer.writerow([name, text(share), text(share), text(words - 2 * share), "",
+                                 source, i % 300 + 1, 3])
+            else:
+                definition = text(words)
+                writer.writerow([name, definition, source, i % 300 + 1, f"{name}: {definition}"])
+
+# Run in a fresh interpreter: imports the renderer first, so the timing is of the rendering alone
+RENDER_CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {here!r})
+import cli
+cli.load_command(sys.argv[1])
+start = time.perf_counter()
+cli.main(sys.argv[1:])
+seconds = time.perf_counter() - start
+try:
+    # ru_maxrss would include the benchmark process itself on Linux (it survives fork + exec)
+    with open("/proc/self/status") as f:
+        peak = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except OSError:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak // 1024 if sys.platform == "darwin" else peak
+print(json.dumps({{"seconds": seconds, "peak_kb": peak}}))
+"""
+
+def pdf_pages(path):
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+def render_once(renderer, csv_path, pdf_path):
+    """(seconds, peak RSS in MB) of one renderer run in a fresh interpreter"""
+    result = subprocess.run([sys.executable, "-c", RENDER_CHILD.format(here=HERE), renderer, csv_path, "-o", pdf_path],
+                            cwd=HERE, check=True, capture_output=True, text=True)
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    return measured["seconds"], measured["peak_kb"] / 1024
+
+def compare_render(result, baseline):
+    """Changes against the baseline, flagged when beyond RENDER_TOLERANCE in the bad direction"""
+    if not baseline:
+        return ""
+    notes = []
+    for field, label, higher_is_better in (("entries_per_s", "speed", True), ("peak_mb", "RSS", False),
+                                           ("output_mb", "size", False)):
+        if not baseline.get(field):
+            continue
+        change = result[field] / baseline[field] - 1
+        worse = -change if higher_is_better else change
+        notes.append(f"{label} {change:+.0%}{' ⚠️' if worse > RENDER_TOLERANCE else ''}")
+    return "  vs baseline: " + ", ".join(notes)
+
+def bench_render(renderers, sizes, words, save_baseline):
+    baseline = {}
+    if os.path.exists(RENDER_BASELINE):
+        with open(RENDER_BASELINE, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = dict(baseline) if save_baseline else {}
+    print(f"⏱️  Renderers on synthetic CSVs ({words}-word explanations), each in a fresh interpreter")
+    print(f"  {'renderer':18s} {'rows':>7s} {'entries/s':>10s} {'pages/s':>8s} {'pages':>7s} "
+          f"{'peak RSS':>9s} {'output':>9s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for renderer in renderers:
+            for rows in sizes:
+                csv_path = os.path.join(tmp, f"{renderer}_{rows}.csv")
+                pdf_path = os.path.join(tmp, f"{renderer}_{rows}.pdf")
+                write_render_csv(csv_path, renderer, rows, words)
+                seconds, peak_mb = render_once(renderer, csv_path, pdf_path)
+                pages = pdf_pages(pdf_path)
+                result = {"entries_per_s": rows / seconds, "pages_per_s": pages / seconds, "pages": pages,
+                          "peak_mb": peak_mb, "output_mb": os.path.getsize(pdf_path) / 1e6}
+                key = f"{renderer}/{rows}/{words}"
+                print(f"  {renderer:18s} {rows:7d} {result['entries_per_s']:10.0f} {result['pages_per_s']:8.1f} "
+                      f"{pages:7d} {peak_mb:6.0f} MB {result['output_mb']:6.1f} MB"
+                      f"{compare_render(result, baseline.get(key))}")
+                results[key] = {field: round(value, 2) for field, value in result.items()}
+                os.remove(pdf_path)
+                os.remove(csv_path)
+
+    if save_baseline:
+        with open(RENDER_BASELINE, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 Baseline saved to {RENDER_BASELINE}")
+    elif not baseline:
+        print("  (no baseline yet: run with --save-baseline to record one)")
+
+def long_explanation(words, seed=0):
+    """One explanation of about ``words`` words, written like a judgment: citations, abbreviations, long sentences"""
+    import random
+
+    rng = random.Random(seed)
+    vocabulary = ("the court held that a duty of care was owed because harm was reasonably foreseeable "
+                  "and the relationship between the parties sufficiently proximate").split()
+    asides = ["in Donoghue v. Stevenson [1932] A.C. 562", "under s. 2 of the Act", "per Lord Atkin, J.",
+              "against Caparo Industries plc v. Dickman", "as Smith Ltd. conceded", "(cf. para. 14)"]
+    sentences = []
+    count = 0
+    while count < words:
+        # Now and then a sentence far longer than a paragraph, strung together with commas
+        length = rng.randint(150, 400) if rng.random() < 0.05 else rng.randint(5, 40)
+        chunk = []
+        for i in range(length):
+            chunk.append(rng.choice(vocabulary))
+            if rng.random() < 0.04:
+                chunk.append(rng.choice(asides))
+            elif i and rng.random() < 0.08:
+                chunk[-1] += ","
+        sentences.append(" ".join(chunk).capitalize() + rng.choice(".....?!"))
+        count += length
+    return " ".join(sentences)
+
+def bench_segmentation(sizes, runs):
+    import segmentation
+
+    print(f"⏱️  Segmentation of single long explanations, best of {runs}")
+    for words in sizes:
+        text = long_explanation(words)
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            paragraphs = segmentation.paragraphs(text, 350)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"  {words:>9,} words {best * 1000:9.1f} ms {len(text) / best / 1e6:7.1f} MB/s  "
+              f"({len(paragraphs)} paragraphs, longest {max(map(len, paragraphs))} chars)")
+
+def check_volumes(rows, sizes):
+    import aggressive_to_pdf
+    import csv
+    import random
+
+    rng = random.Random(0)
+    failed = []
+    with tempfile.TemporaryDirectory() as folder:
+        csv_path = os.path.join(folder, "definitions.csv")
+        write_render_csv(csv_path, "render-aggressive", rows, 40)
+        # Mixed lengths, so entries split across pages at every possible point
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            table = list(csv.reader(f))
+        for row in table[1:]:
+            row[1] = " ".join([row[1]] * rng.choice([1, 1, 2, 5, 12]))
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(table)
+        print(f"📚 Volumes of {rows} definitions by page count")
+        for size in sizes:
+            output = os.path.join(folder, f"volumes_{size}", "definitions.pdf")
+            os.makedirs(os.path.dirname(output))
+            with contextlib.redirect_stdout(io.StringIO()):
+                aggressive_to_pdf.create_aggressive_volumes(csv_path, output, "pages", size)
+            counts = sorted(pdf_pages(os.path.join(os.path.dirname(output), name))
+                            for name in os.listdir(os.path.dirname(output)) if "_vol" in name)
+            over = [count for count in counts if count > size]
+            print(f"  --volume-size {size:<4g} {len(counts):4d} volumes, {counts[0]}-{counts[-1]} pages"
+                  + (f"  ⚠️ {len(over)} over the limit" if over else ""))
+            if over:
+                failed.append(size)
+    if failed:
+        sys.exit(f"❌ Volumes longer than --volume-size {', '.join(map(str, failed))}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    startup = subparsers.add_parser("startup", help="Cold-start time of each cli.py subcommand")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.set_defaults(run=lambda args: bench_startup(args.runs))
+
+    pipeline = subparsers.add_parser("pipeline", help="Two-step scrape+render vs the overlapped pipeline")
+    pipeline.add_argument("scraper", choices=["cases", "structured", "bullet", "aggressive"])
+    pipeline.add_argument("inputs", nargs="*", help="PDFs or folders (default: a synthetic corpus)")
+    pipeline.add_argument("--jobs", type=int, default=1)
+    pipeline.set_defaults(run=lambda args: bench_pipeline(args.scraper, args.inputs, args.jobs))
+
+    extractors = subparsers.add_parser("extractors", help="Structured and bullet extractors on a dense glossary and slides")
+    extractors.add_argument("--pages", type=int, default=300)
+    extractors.add_argument("--runs", type=int, default=5)
+    extractors.add_argument("--save-golden", action="store_true",
+                            help="Record the extractors' output digests in extractor_golden.json")
+    extractors.set_defaults(run=lambda args: bench_extractors(args.pages, args.runs, args.save_golden))
+
+    prefetch = subparsers.add_parser("prefetch", help="Read-ahead vs none on simulated slow storage")
+    prefetch.add_argument("--latency-ms", type=float, default=40)
+    prefetch.add_argument("--mb-per-s", type=float, default=20)
+    prefetch.add_argument("--files", type=int, default=4)
+    prefetch.add_argument("--documents", type=int, default=12)
+    prefetch.set_defaults(run=lambda args: bench_prefetch(args.latency_ms, args.mb_per_s, args.files, args.documents))
+
+    render = subparsers.add_parser("render", help="Renderer throughput, memory and output size against a baseline")
+    render.add_argument("--renderers", nargs="+", choices=list(SAMPLE_CSVS), default=list(SAMPLE_CSVS))
+    render.add_argument("--rows", nargs="+", type=int, default=[1000, 10000, 100000])
+    render.add_argument("--words", type=int, default=40, help="Words per explanation")
+    render.add_argument("--save-baseline", action="store_true",
+                        help="Record these results in render_baseline.json for later comparisons")
+    render.set_defaults(run=lambda args: bench_render(args.renderers, args.rows, args.words, args.save_baseline))
+
+    segmentation = subparsers.add_parser("segmentation", help="Sentence and paragraph splitting of long explanations")
+    segmentation.add_argument("--words", nargs="+", type=int, default=[1000, 10000, 100000, 1000000])
+    segmentation.add_argument("--runs", type=int, default=3)
+    segmentation.set_defaults(run=lambda args: bench_segmentation(args.words, args.runs))
+
+    volumes = subparsers.add_parser("volumes", help="Check that --volume-by pages volumes stay within their size")
+    volumes.add_argument("--rows", type=int, default=921)
+    volumes.add_argument("--sizes", nargs="+", type=float, default=[3, 5, 20])
+    volumes.set_defaults(run=lambda args: check_volumes(args.rows, args.sizes))
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,166 +1,188 @@
-import fitz  # PyMuPDF
 import re
 import csv
-import os
+
+import metrics
+from batch import iter_records
+from documents import scan_document
+from external_sort import RUN_SIZE, Tally, sorted_unique
+from line_features import ends_with, first_upper, lengths, regex_mask, scan_blocks, starts_with, word_counts
 
 # SETTINGS
 pdf_folder = r"C:\Users\BACKY\Downloads\YOUR-FILE-NAME"      # Folder containing all your PDFs
 output_csv = "bullet_point_definitions.csv"
+# Bump to make --memo rescan after a change outside this file (its own source is hashed in)
+EXTRACTOR_VERSION = 1
+
+# Lines mentioning these are headings/citations, not terms
+heading_words = re.compile(r'(?:page|section|chapter|act|law)', re.IGNORECASE)
+# Stop condition while collecting bullet points
+definition_words = re.compile(r'(?:is|are|means|refers|defined|described)', re.IGNORECASE)
+# Bullet characters normalised to '•' by clean_text
+bullet_chars = re.compile(r'[•▪▫◦‣⁃]')
+# Years mark citations rather than terms
+year = re.compile(r'\d{4}')
+# Numbered list items ("1.", "12.")
+numbered_item = re.compile(r'^\d+\.')
+# Words that make a line look like part of an explanation
+linking_words = re.compile(r'(?:and|but|or|so|because|since|however|therefore|also|in addition|furthermore|sharing|little|no longer|joint|several)', re.IGNORECASE)
 
 def clean_text(text):
     """Clean text but preserve structure"""
     if not text:
         return ""
     # Remove weird bullets but keep structure
-    text = re.sub(r'[•▪▫◦‣⁃]', '•', text)  # Normalize bullets
+    text = bullet_chars.sub('•', text)  # Normalize bullets
     text = ' '.join(text.split())
     return text.strip()
 
+def clean_lines(text):
+    """clean_text() applied to every line of a page, with one regex pass for the whole page"""
+    return [' '.join(line.split()) for line in bullet_chars.sub('•', text).split('\n')]
+
+def line_features(lines):
+    """Term, stop and explanation masks for the cleaned lines of one page"""
+    length = lengths(lines)
+    ends_period = ends_with(lines, '.')
+    bulleted = starts_with(lines, ('•', '-', '*'))
+    
+    # Potential terms: short, no full stop or question mark, no year, not a heading/citation
+    term = (length > 2) & (length < 60) & ~ends_period & ~ends_with(lines, '?')
+    term &= ~regex_mask(year, lines, term)
+    term &= ~regex_mask(heading_words, lines, term)
+    
+    # Another major term (capitalised, short, not a bullet) ends the bullet points
+    stop = (length > 2) & (length < 50) & first_upper(lines) & ~ends_period & ~starts_with(lines, ('•', '-'))
+    stop &= ~regex_mask(definition_words, lines, stop)
+    
+    # Bullet points and lines that look like explanations
+    explains = (length > 0) & ~stop
+    numbered = regex_mask(numbered_item, lines, explains & ~bulleted, match=True)
+    wordy = word_counts(lines, length) > 4
+    undecided = explains & ~bulleted & ~numbered & ~wordy
+    explains &= bulleted | numbered | wordy | regex_mask(linking_words, lines, undecided)
+    
+    return term.tolist(), stop.tolist(), explains.tolist()
+
 def extract_bullet_point_definitions(text, source_pdf, page_num):
     """Extract definitions that have bullet points or multi-line structure"""
     definitions = []
-    lines = text.split('\n')
+    lines = clean_lines(text)
+    term_line, stop, explains = line_features(lines)
     
-    i = 0
-    while i < len(lines):
-        line = clean_text(lines[i])
+    def emit(i, kind, explanation):
+        # Clean up the term
+        term = lines[i].strip(' :-')
+        term = re.sub(r'^\d+\.?\s*', '', term)  # Remove leading numbers
         
-        # Look for potential term (short line, not ending with period)
-        if (len(line) > 2 and len(line) < 60 and 
-            not line.endswith('.') and
-            not line.endswith('?') and
-            not re.search(r'\d{4}', line) and  # Skip years
-            not re.search(r'(?:page|section|chapter|act|law)', line, re.IGNORECASE)):
-            
-            # Check if next lines contain bullet points or explanations
-            explanation_lines = []
-            j = i + 1
-            
-            # Look for bullet points or indented explanations in next few lines
-            while j < len(lines) and j < i + 10:  # Look ahead up to 10 lines
-                next_line = clean_text(lines[j])
-                
-                if not next_line:
-                    j += 1
-                    continue
-                
-                # Stop if we hit another major term (capitalized, short, not ending with period)
-                if (len(next_line) > 2 and len(next_line) < 50 and 
-                    next_line[0].isupper() and 
-                    not next_line.endswith('.') and
-                    not re.search(r'(?:is|are|means|refers|defined|described)', next_line, re.IGNORECASE) and
-                    not next_line.startswith('•') and
-                    not next_line.startswith('-')):
-                    break
-                
-                # Include if it's a bullet point or looks like an explanation
-                if (next_line.startswith('•') or 
-                    next_line.startswith('-') or
-                    next_line.startswith('*') or
-                    re.match(r'^\d+\.', next_line) or
-                    re.search(r'(?:and|but|or|so|because|since|however|therefore|also|in addition|furthermore|sharing|little|no longer|joint|several)', next_line, re.IGNORECASE) or
-                    len(next_line.split()) > 4):
-                    
-                    explanation_lines.append(next_line)
-                
-                j += 1
-            
-            # If we found substantial bullet points or explanations
-            if len(explanation_lines) >= 2:
-                # Clean up the term
-                term = line.strip(' :-')
-                term = re.sub(r'^\d+\.?\s*', '', term)  # Remove leading numbers
-                
-                # Format explanations nicely
-                explanations = []
-                for exp in explanation_lines:
-                    exp = exp.lstrip('•-*0123456789.- ').strip()
-                    if exp:
-                        explanations.append(exp)
-                
-                if explanations and term and len(term) > 2:
-                    definitions.append({
-                        'term': term,
-                        'explanations': explanations,
-                        'source_pdf': source_pdf,
-                        'page': page_num + 1,
-                        'line_count': len(explanations)
-                    })
-                    
-                    i = j - 1  # Skip ahead
+        # Format explanations nicely
+        explanations = []
+        for j in explanation:
+            exp = lines[j].lstrip('•-*0123456789.- ').strip()
+            if exp:
+                explanations.append(exp)
         
-        i += 1
+        if not (explanations and term and len(term) > 2):
+            return False
+        definitions.append({
+            'term': term,
+            'explanations': explanations,
+            'source_pdf': source_pdf,
+            'page': page_num + 1,
+            'line_count': len(explanations)
+        })
+        return True
+    
+    # A term needs at least 2 bullet points or explanation lines among the
+    # next 9, up to the next major term
+    scan_blocks([(term_line, stop, explains, 10, 2)], len(lines), emit)
     
     return definitions
 
-def main():
-    print("🎯 BULLET POINT DEFINITION SCRAPER - Looking for term + bullet points...")
-    
-    all_definitions = []
-    
-    # Loop through all PDFs
-    for filename in os.listdir(pdf_folder):
-        if filename.lower().endswith(".pdf"):
-            print(f"📄 Scanning: {filename}")
-            pdf_path = os.path.join(pdf_folder, filename)
-            
-            try:
-                doc = fitz.open(pdf_path)
-                
-                for page_num, page in enumerate(doc):
-                    text = page.get_text("text")
-                    if text.strip():
-                        page_defs = extract_bullet_point_definitions(text, filename, page_num)
-                        all_definitions.extend(page_defs)
-                
-                doc.close()
-                
-            except Exception as e:
-                print(f"❌ Error with {filename}: {e}")
-                continue
-    
-    # Remove duplicates based on term similarity
+def scan_page(text, filename, page_num):
+    """Run the bullet point extractor over the text of one page"""
+    if not text.strip():
+        return []
+    return extract_bullet_point_definitions(text, filename, page_num)
+
+def scan_pdf(pdf_path, filename, data=None):
+    """Run the bullet point extractor over every page of one PDF (running headers/footers stripped)"""
+    return scan_document(scan_page, pdf_path, filename, data)
+
+def dedupe_key(def_item):
+    """Terms are compared ignoring case, spaces and hyphens"""
+    return def_item['term'].lower().replace(' ', '').replace('-', '')
+
+def remove_duplicates(all_definitions):
+    """Remove duplicates based on term similarity"""
     unique_definitions = []
-    seen_terms = set()
+    seen = set()
     
     for def_item in all_definitions:
-        term_key = def_item['term'].lower().replace(' ', '').replace('-', '')
-        if term_key not in seen_terms:
-            seen_terms.add(term_key)
+        key = dedupe_key(def_item)
+        if key not in seen:
+            seen.add(key)
             unique_definitions.append(def_item)
     
-    # Sort by term
-    unique_definitions.sort(key=lambda x: x['term'])
-    
-    # Save to CSV
+    return unique_definitions
+
+def sort_key(def_item):
+    return def_item['term']
+
+def finalize_records(all_definitions):
+    """Dedupe and sort definitions the way they are written to the CSV"""
+    unique_definitions = remove_duplicates(all_definitions)
+    unique_definitions.sort(key=sort_key)
+    return unique_definitions
+
+def finalize_stream(all_definitions, run_size=RUN_SIZE):
+    """Same as finalize_records, but streamed through sorted runs on disk for huge result sets"""
+    return sorted_unique(all_definitions, dedupe_key, sort_key, run_size)
+
+def csv_rows(unique_definitions):
+    """Yield the CSV row for each definition"""
+    for def_item in unique_definitions:
+        # Pad explanations to have consistent columns
+        explanations = def_item['explanations'] + [''] * 4
+        explanations = explanations[:4]  # Take max 4
+        
+        yield [
+            def_item['term'],
+            explanations[0],
+            explanations[1], 
+            explanations[2],
+            explanations[3],
+            def_item['source_pdf'],
+            def_item['page'],
+            def_item['line_count']
+        ]
+
+def save_to_csv(unique_definitions, output_csv):
     with open(output_csv, mode="w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["Term", "Explanation 1", "Explanation 2", "Explanation 3", "Explanation 4", "Source PDF", "Page", "Line Count"])
-        
-        for def_item in unique_definitions:
-            # Pad explanations to have consistent columns
-            explanations = def_item['explanations'] + [''] * 4
-            explanations = explanations[:4]  # Take max 4
-            
-            writer.writerow([
-                def_item['term'],
-                explanations[0],
-                explanations[1], 
-                explanations[2],
-                explanations[3],
-                def_item['source_pdf'],
-                def_item['page'],
-                def_item['line_count']
-            ])
+        writer.writerows(csv_rows(unique_definitions))
+
+def main(pdf_folder=pdf_folder, output_csv=output_csv, run_size=RUN_SIZE, **batch_options):
+    print("🎯 BULLET POINT DEFINITION SCRAPER - Looking for term + bullet points...")
+    
+    # Loop through all PDFs
+    all_definitions = iter_records(scan_pdf, pdf_folder, "Scanning", **batch_options)
+    
+    # Remove duplicates and sort by term, streaming into the CSV
+    unique_definitions = Tally(finalize_stream(all_definitions, run_size), 10,
+                               keep=lambda d: d['line_count'] >= 3)
+    
+    # Save to CSV
+    save_to_csv(unique_definitions, output_csv)
     
     print(f"\n🎯 BULLET POINT EXTRACTION COMPLETE!")
-    print(f"📊 Found {len(unique_definitions)} bullet-point definitions")
+    metrics.record_dedupe(__name__, unique_definitions.count)
+    print(f"📊 Found {unique_definitions.count} bullet-point definitions")
     print(f"💾 Saved to: {output_csv}")
     
     # Show the best examples
     print(f"\n🎯 BEST EXAMPLES:")
-    good_examples = [d for d in unique_definitions if d['line_count'] >= 3]
-    for i, def_item in enumerate(good_examples[:10]):
+    for i, def_item in enumerate(unique_definitions.kept):
         print(f"{i+1:2d}. {def_item['term']} ({def_item['line_count']} points)")
         for j, exp in enumerate(def_item['explanations'][:3]):
             print(f"    • {exp}")
@@ -1,9 +1,15 @@
 import csv
+import time
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.colors import black, darkblue
 
+import metrics
+from contents import add_contents, index_letter, record_entries, report_overhead, tag_entry
+from crossref import CrossReferences
+from segmentation import finish, sentences
+
 def clean_text(text):
     """Clean text for PDF"""
     if not text:
@@ -15,10 +21,9 @@ def clean_text(text):
     text = ' '.join(text.split())
     return text.strip()
 
-def create_bullet_definitions_pdf(csv_file, output_pdf):
-    """Create PDF from bullet point definitions CSV"""
-    
-    doc = SimpleDocTemplate(
+def make_document(output_pdf):
+    """The page setup used for the definitions compilation"""
+    return SimpleDocTemplate(
         output_pdf, 
         pagesize=A4,
         rightMargin=50, 
@@ -26,7 +31,68 @@ def create_bullet_definitions_pdf(csv_file, output_pdf):
         topMargin=50, 
         bottomMargin=30
     )
-    
+
+def read_rows(csv_file):
+    """Yield the data rows of a bullet point definitions CSV"""
+    with open(csv_file, 'r', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        next(reader)  # Skip header
+        yield from reader
+
+def index_fields(row):
+    """(term, source PDF) a row is filed under by csv_index"""
+    return (clean_text(row[0]) if row else "", clean_text(row[5]) if len(row) > 5 else "")
+
+def read_selected(csv_file, letters=None, sources=None, rows=None):
+    """The rows picked by term initial, source PDF and row number, read through the CSV's index"""
+    from csv_index import read_selected
+    return list(read_selected(csv_file, index_fields, "bullet", letters, sources, rows))
+
+def usable_definitions(rows):
+    """Yield cleaned (term, explanations, source PDF, page, line count) for rows worth rendering"""
+    for row in rows:
+        if len(row) >= 6:
+            term = clean_text(row[0])
+            explanations = [clean_text(exp) for exp in row[1:5] if exp]  # First 4 explanation columns
+            source_pdf = clean_text(row[5])
+            page = row[6] if len(row) > 6 else ""
+            line_count = row[7] if len(row) > 7 else ""
+            
+            if term and explanations:
+                yield term, explanations, source_pdf, page, line_count
+
+def bullet_paragraphs(explanations):
+    """The bullet point paragraphs of one definition (long explanations get one per sentence)"""
+    paragraphs = []
+    for exp in explanations:
+        if exp and exp.strip():
+            # Handle long text by splitting sentences
+            if len(exp) > 200:
+                for i, sent in enumerate(sentences(exp)):
+                    if i == 0:
+                        paragraphs.append(f"• {finish(sent)}")
+                    else:
+                        paragraphs.append(f"  {finish(sent)}")
+            else:
+                # Format as bullet point
+                paragraphs.append(f"• {exp}")
+    return paragraphs
+
+def source_text(source_pdf, page, line_count):
+    text = f"Source: {source_pdf.replace('.pdf', '')}"
+    if page:
+        text += f" (Page {page})"
+    if line_count:
+        text += f" - {line_count} points"
+    return text
+
+def build_story(rows, stats, links=None):
+    """Yield the flowables for the title page and one entry per usable row.
+
+    Rows are consumed lazily, so the story can be laid out while later rows
+    are still being produced; stats['entries'] counts the definitions rendered.
+    ``links`` is a CrossReferences over every term, to link mentions.
+    """
     styles = getSampleStyleSheet()
     
     # Custom styles
@@ -78,70 +144,75 @@ def create_bullet_definitions_pdf(csv_file, output_pdf):
         textColor=darkblue
     )
     
-    # Build the story (content)
-    story = []
-    
     # Add title page
-    story.append(Paragraph("Structured Definitions", title_style))
-    story.append(Paragraph("Legal and Business Terms with Detailed Explanations", 
-                          ParagraphStyle('Subtitle', parent=styles['Normal'], 
-                                        fontSize=12, alignment=1, spaceAfter=40)))
-    story.append(PageBreak())
+    yield Paragraph("Structured Definitions", title_style)
+    yield Paragraph("Legal and Business Terms with Detailed Explanations", 
+                    ParagraphStyle('Subtitle', parent=styles['Normal'], 
+                                   fontSize=12, alignment=1, spaceAfter=40))
+    yield PageBreak()
     
     definition_count = 0
+    stats['entries'] = 0
     
-    with open(csv_file, 'r', encoding='utf-8-sig') as file:
-        reader = csv.reader(file)
-        next(reader)  # Skip header
+    for term, explanations, source_pdf, page, line_count in usable_definitions(rows):
+        # Add term name
+        heading = f"<b>{term}</b>"
+        if links:
+            heading = links.heading(term, heading)
+        yield tag_entry(Paragraph(heading, term_style), term, index_letter(term))
+        
+        # Add bullet points
+        for bullet_text in bullet_paragraphs(explanations):
+            if links:
+                bullet_text = links.link(bullet_text, term)
+            yield Paragraph(bullet_text, bullet_style)
+        
+        # Add source information
+        yield Paragraph(f"<i>{source_text(source_pdf, page, line_count)}</i>", source_style)
+        
+        definition_count += 1
+        stats['entries'] = definition_count
         
-        for row_num, row in enumerate(reader, 1):
-            if len(row) >= 6:
-                term = clean_text(row[0])
-                explanations = [clean_text(exp) for exp in row[1:5] if exp]  # First 4 explanation columns
-                source_pdf = clean_text(row[5])
-                page = row[6] if len(row) > 6 else ""
-                line_count = row[7] if len(row) > 7 else ""
-                
-                if term and explanations:
-                    # Add term name
-                    story.append(Paragraph(f"<b>{term}</b>", term_style))
-                    
-                    # Add bullet points
-                    for exp in explanations:
-                        if exp and exp.strip():
-                            # Format as bullet point
-                            bullet_text = f"• {exp}"
-                            # Handle long text by splitting sentences
-                            if len(exp) > 200:
-                                sentences = exp.split('. ')
-                                for i, sent in enumerate(sentences):
-                                    if sent.strip():
-                                        if i == 0:
-                                            story.append(Paragraph(f"• {sent.strip()}.", bullet_style))
-                                        else:
-                                            story.append(Paragraph(f"  {sent.strip()}.", bullet_style))
-                            else:
-                                story.append(Paragraph(bullet_text, bullet_style))
-                    
-                    # Add source information
-                    source_text = f"Source: {source_pdf.replace('.pdf', '')}"
-                    if page:
-                        source_text += f" (Page {page})"
-                    if line_count:
-                        source_text += f" - {line_count} points"
-                    
-                    story.append(Paragraph(f"<i>{source_text}</i>", source_style))
-                    
-                    definition_count += 1
-                    
-                    # Add page break every 15 definitions for better readability
-                    if definition_count % 15 == 0:
-                        story.append(PageBreak())
+        # Add page break every 15 definitions for better readability
+        if definition_count % 15 == 0:
+            yield PageBreak()
+
+def create_bullet_definitions_pdf(csv_file, output_pdf, contents=False, links=False,
+                                  letters=None, sources=None, rows=None):
+    """Create PDF from bullet point definitions CSV.
+
+    ``letters`` ("A-C"), ``sources`` (source PDF names) and ``rows`` ("1-200")
+    render only the matching definitions, seeking straight to them through
+    a byte-offset index of the CSV (see csv_index.py).
+    """
+    
+    doc = make_document(output_pdf)
+    entries = record_entries(doc) if contents else None
+    
+    if letters or sources or rows:
+        subset = read_selected(csv_file, letters, sources, rows)
+        read = lambda: subset
+    else:
+        read = lambda: read_rows(csv_file)
+    
+    if links:
+        links = CrossReferences(term for term, *_ in usable_definitions(read()))
+        print(f"🔗 Linking mentions of {len(links.anchors)} terms")
+    
+    stats = {}
+    story = list(build_story(read(), stats, links or None))
+    definition_count = stats['entries']
     
     # Build the PDF
     print("Building bullet point definitions PDF...")
+    build_start = time.perf_counter()
+    metrics.watch_layout("bullet_definitions_to_pdf", story)
     doc.build(story)
     
+    if contents:
+        build_time = time.perf_counter() - build_start
+        report_overhead(add_contents(output_pdf, entries, "A-Z"), build_time)
+    
     print(f"✅ PDF created successfully: {output_pdf}")
     print(f"📊 Total definitions included: {definition_count}")
     print(f"📄 PDF pages: ~{max(1, definition_count // 15)}")
@@ -0,0 +1,143 @@
+import re
+import csv
+
+import metrics
+from batch import collect_records
+from documents import scan_document
+
+# SETTINGS
+pdf_folder = r"C:\Users\BACKY\Downloads\FILENAME"      # Folder containing all your PDFs
+output_csv = "legal_cases_with_sources.csv"
+# Bump to make --memo rescan after a change outside this file (its own source is hashed in)
+EXTRACTOR_VERSION = 1
+
+# More comprehensive regex for case names.
+# A case name can start at any capital inside a word ("McDonald" -> "McDonald",
+# "xSmith" -> "Smith"), and only the first capital of a word can ever be the
+# leftmost match. Each pattern therefore starts at a word boundary and skips
+# lowercase letters up to that capital; trying every capital separately is
+# quadratic in the word length. The case name itself is the "case" group.
+case_patterns = [
+    re.compile(r"(?<![a-zA-Z])[a-z]*(?P<case>[A-Z][a-zA-Z]+ v\.? [A-Z][a-zA-Z]+(?:\s*\[\d{4}\])?)"),
+    re.compile(r"(?<![a-zA-Z])[a-z]*(?P<case>[A-Z][a-zA-Z]+ [Vv] [A-Z][a-zA-Z]+(?:\s*\[\d{4}\])?)"),
+    re.compile(r"(?<![a-zA-Z])[a-z]*(?P<case>[A-Z][a-zA-Z]+ and [A-Z][a-zA-Z]+(?:\s*\[\d{4}\])?)"),
+]
+
+def clean_text(text):
+    """Remove weird characters and clean up text"""
+    # Remove common bullet characters
+    text = text.replace('', '').replace('•', '').replace('▪', '').replace('▫', '')
+    # Clean up extra whitespace but keep line breaks for processing
+    text = re.sub(r'[ \t]+', ' ', text)
+    # Remove URLs
+    text = re.sub(r'https?://\S+', '', text)
+    return text.strip()
+
+def extract_cases(text, source_pdf):
+    """Extract (case name, explanation, source PDF) tuples from one page of text"""
+    cases = []
+    text = clean_text(text)
+    lines = text.split("\n")
+
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if not line:
+            i += 1
+            continue
+
+        # Try all case patterns
+        match_found = False
+        for pattern in case_patterns:
+            match = pattern.search(line)
+            if match:
+                case_name = match.group('case').strip()
+                explanation_lines = []
+
+                # Grab text immediately after case name
+                j = i + 1
+                while j < len(lines):
+                    next_line = clean_text(lines[j])
+                    if not next_line:
+                        j += 1
+                        continue
+
+                    # Stop if we hit another case or end of content
+                    if any(p.search(next_line) for p in case_patterns):
+                        break
+                    # Stop if line looks like a page number or citation
+                    if re.match(r'^\d+$|^Page \d+|^\[\d{4}\]$', next_line):
+                        break
+                    # Stop if line is very short (likely fragment)
+                    if len(next_line) < 10:
+                        j += 1
+                        continue
+
+                    explanation_lines.append(next_line)
+                    j += 1
+
+                explanation = " ".join(explanation_lines).strip()
+                if explanation and len(explanation) > 20:  # Only keep substantial explanations
+                    cases.append((case_name, explanation, source_pdf))  # Add source PDF
+                    i = j
+                    match_found = True
+                    break
+
+        if not match_found:
+            i += 1
+
+    return cases
+
+def scan_page(text, filename, page_num):
+    """Run the case extractor over the text of one page"""
+    return extract_cases(text, filename)
+
+def scan_pdf(pdf_path, filename, data=None):
+    """Run the case extractor over every page of one PDF (running headers/footers stripped)"""
+    return scan_document(scan_page, pdf_path, filename, data)
+
+def dedupe_key(case):
+    """Cases are unique by name"""
+    return case[0]
+
+def remove_duplicates(cases):
+    """Remove duplicates while preserving order"""
+    seen = set()
+    unique_cases = []
+    for case in cases:
+        key = dedupe_key(case)
+        if key not in seen:
+            seen.add(key)
+            unique_cases.append(case)
+    return unique_cases
+
+def finalize_records(cases):
+    """Dedupe and order cases the way they are written to the CSV"""
+    return remove_duplicates(cases)
+
+def csv_rows(unique_cases):
+    """Yield the CSV row for each case"""
+    for case_name, explanation, source_pdf in unique_cases:
+        yield [case_name, explanation, source_pdf]
+
+def save_to_csv(unique_cases, output_csv):
+    """Save all cases to a single CSV with source information"""
+    with open(output_csv, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Case Name", "Explanation", "Source PDF"])
+        writer.writerows(csv_rows(unique_cases))
+
+def main(pdf_folder=pdf_folder, output_csv=output_csv, **batch_options):
+    print("Scanning PDFs for cases...")
+
+    # Loop through all PDFs in folder
+    cases = collect_records(scan_pdf, pdf_folder, "Processing", **batch_options)
+
+    unique_cases = finalize_records(cases)
+    metrics.record_dedupe(__name__, len(unique_cases))
+    save_to_csv(unique_cases, output_csv)
+
+    print(f"Done! Found {len(unique_cases)} unique cases saved to '{output_csv}'.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Worst-case timing guard for every extractor regex.
+
+    python check_regex_performance.py [--length 10000] [--slack 1.0]
+
+Runs each heuristic pattern and each extractor against adversarial lines
+(very long lines, many colons or dashes, repeated "is", no terminator, ...)
+and fails with exit code 1 if any line takes longer than its budget. Every
+case runs in a worker process that is killed when it overruns badly, so a
+catastrophically backtracking pattern fails the check instead of hanging it.
+The same cases run as tests/test_regex_performance.py, so ``pytest`` fails
+on a backtracking regression too; this script adds the worst case per
+pattern. Run either after touching any of the patterns.
+"""
+import argparse
+import functools
+import multiprocessing
+import random
+import sys
+import time
+
+import aggressive_definition_scraper
+import bullet_definition_scraper
+import case_scraper
+import documents
+import structured_definition_scraper
+
+# Per-line budgets in milliseconds for a --length character line. Linear
+# patterns need 5-20 ms; a quadratic one needs hundreds.
+PATTERN_BUDGET_MS = 100
+EXTRACTOR_BUDGET_MS = 250
+# How many adversarial lines make up the page handed to each extractor
+PAGE_LINES = 8
+
+def patterns():
+    """(name, compiled pattern) for every heuristic regex"""
+    found = []
+    for i, pattern in enumerate(case_scraper.case_patterns):
+        found.append((f"cases.case_patterns[{i}]", pattern))
+    for name in ("dangling_word", "definition_words", "section_break", "linking_words", "numbered_item",
+                 "colon_header", "bullet_chars"):
+        found.append((f"structured.{name}", getattr(structured_definition_scraper, name)))
+    for name in ("heading_words", "definition_words", "year", "numbered_item", "linking_words", "bullet_chars"):
+        found.append((f"bullet.{name}", getattr(bullet_definition_scraper, name)))
+    for i, pattern in enumerate(aggressive_definition_scraper.definition_indicators):
+        found.append((f"aggressive.definition_indicators[{i}]", pattern))
+    found.append(("aggressive.continuation_stop", aggressive_definition_scraper.continuation_stop))
+    found.append(("documents.page_number", documents.page_number))
+    return found
+
+def extractors():
+    """(name, function(text)) for every page extractor"""
+    return [
+        ("extract_cases", lambda text: case_scraper.extract_cases(text, "fuzz.pdf")),
+        ("extract_structured_definitions",
+         lambda text: structured_definition_scraper.extract_structured_definitions(text, "fuzz.pdf", 0)),
+        ("extract_bullet_point_definitions",
+         lambda text: bullet_definition_scraper.extract_bullet_point_definitions(text, "fuzz.pdf", 0)),
+        ("extract_anything_that_looks_like_definition",
+         lambda text: aggressive_definition_scraper.extract_anything_that_looks_like_definition(text, "fuzz.pdf", 0)),
+    ]
+
+def repeat_to(chunk, length):
+    return (chunk * (length // len(chunk) + 1))[:length]
+
+@functools.lru_cache(maxsize=None)
+def adversarial_lines(length):
+    """(label, line) pairs aimed at the backtracking weak spots of the patterns"""
+    lines = [
+        ("long sentence", repeat_to("the court held that the duty of care ", length)),
+        ("one long word", "x" * length),
+        ("one long capitalised word", "X" * length),
+        ("camel case run", repeat_to("Abc", length)),
+        ("many colons", repeat_to(": ", length)),
+        ("colons without space", repeat_to("a:", length)),
+        ("many dashes", repeat_to("a -", length)),
+        ("dash runs", repeat_to("-- ", length)),
+        ("repeated is", repeat_to("is ", length)),
+        ("is without spaces", repeat_to("is", length)),
+        ("articles, no verb", repeat_to("The a an ", length)),
+        ("article then no verb", "A " + repeat_to("term ", length - 2)),
+        ("case names without v", repeat_to("Donoghue Stevenson ", length)),
+        ("dangling v", repeat_to("Abc v ", length)),
+        ("dangling and", repeat_to("Abc and ", length)),
+        ("what is, no answer", repeat_to("What is ", length)),
+        ("definition, no body", repeat_to("Definition ", length)),
+        ("can be, never as", repeat_to("x can be described ", length)),
+        ("page numbers", repeat_to("Page 1 2 ", length)),
+        ("bullets", repeat_to("• - * ", length)),
+        ("whitespace runs", repeat_to("a \t  \t ", length)),
+        ("capital header, no colon", "Term" + repeat_to(" Word", length - 5) + "1"),
+        ("no terminator", repeat_to("the claimant suffered loss because ", length).rstrip(".")),
+    ]
+
+    rng = random.Random(2024)
+    tokens = ["a", "A", "An", "The", "is", "are", "means", "refers to", "v", "v.", "and", ":", "-", "?",
+              "What", "Definition", "can", "be", "described", "as", "Page", "1932", "[1932]", "Smith", "x"]
+    for n in range(5):
+        words, total = [], 0
+        while total < length:
+            word = rng.choice(tokens)
+            words.append(word)
+            total += len(word) + 1
+        lines.append((f"random tokens #{n + 1}", " ".join(words)[:length]))
+    return lines
+
+def build_cases(length):
+    cases = []
+    for label, line in adversarial_lines(length):
+        for name, _ in patterns():
+            cases.append(("pattern", name, label))
+        for name, _ in extractors():
+            cases.append(("extractor", name, label))
+    return cases
+
+def time_case(kind, name, label, length):
+    """Milliseconds per line for one (pattern or extractor, adversarial line) case"""
+    line = dict(adversarial_lines(length))[label]
+    if kind == "pattern":
+        # Every extractor collapses whitespace before matching, so the
+        # patterns only ever see single spaces; the extractors get raw lines.
+        line = " ".join(line.split())
+        pattern = dict(patterns())[name]
+        start = time.perf_counter()
+        pattern.search(line)
+        list(pattern.finditer(line))
+        return (time.perf_counter() - start) * 1000
+
+    extract = dict(extractors())[name]
+    page = "\n".join([line] * PAGE_LINES)
+    start = time.perf_counter()
+    extract(page)
+    return (time.perf_counter() - start) * 1000 / PAGE_LINES
+
+def budget_ms(kind, slack=1.0):
+    """Per-line budget of a "pattern" or "extractor" case"""
+    return (PATTERN_BUDGET_MS if kind == "pattern" else EXTRACTOR_BUDGET_MS) * slack
+
+class CaseRunner:
+    """Times cases in a worker process, which is replaced whenever a case has to be killed"""
+
+    def __init__(self):
+        self.pool = multiprocessing.Pool(1)
+
+    def time(self, kind, name, label, length, budget):
+        """Milliseconds per line for one case; inf if it was killed for running far over ``budget``"""
+        # Kill the case outright once it is clearly pathological
+        hard_limit = max(2.0, budget * (1 if kind == "pattern" else PAGE_LINES) * 20 / 1000)
+        result = self.pool.apply_async(time_case, (kind, name, label, length))
+        try:
+            return result.get(hard_limit)
+        except multiprocessing.TimeoutError:
+            self.pool.terminate()
+            self.pool = multiprocessing.Pool(1)
+            return float("inf")
+
+    def close(self):
+        self.pool.terminate()
+
+def run_checks(length, slack):
+    cases = build_cases(length)
+    failures = []
+    worst = {}
+    runner = CaseRunner()
+    try:
+        for kind, name, label in cases:
+            budget = budget_ms(kind, slack)
+            elapsed = runner.time(kind, name, label, length, budget)
+            if elapsed > worst.get(name, (-1, ""))[0]:
+                worst[name] = (elapsed, label)
+            if elapsed > budget:
+                failures.append((name, label, elapsed, budget))
+    finally:
+        runner.close()
+
+    print(f"🔎 Worst case per pattern/extractor ({length:,} character lines)")
+    for name, (elapsed, label) in worst.items():
+        print(f"  {name:45s} {elapsed:10.2f} ms  ({label})")
+
+    if failures:
+        print(f"\n❌ {len(failures)} case(s) over budget:")
+        for name, label, elapsed, budget in failures:
+            print(f"  {name} on '{label}': {elapsed:.1f} ms > {budget:.0f} ms")
+        return 1
+
+    print(f"\n✅ All {len(cases)} cases within budget")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--length", type=int, default=10000, help="Characters per adversarial line")
+    parser.add_argument("--slack", type=float, default=1.0, help="Multiply all budgets, e.g. for slow CI machines")
+    args = parser.parse_args(argv)
+    return run_checks(args.length, args.slack)
+
+if __name__ == "__main__":
+    sys.exit(main())
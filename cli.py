@@ -0,0 +1,284 @@
+"""One command line entry point for all the scrapers and PDF builders.
+
+    python cli.py cases  PDF_FOLDER_OR_FILE... [-o legal_cases_with_sources.csv]
+        [--include GLOB] [--exclude GLOB] [--max-depth N]   (folders are searched recursively)
+    python cli.py structured | bullet | aggressive  PDF_FOLDER_OR_FILE... [-o out.csv]
+        [--memo extraction_memo.sqlite]   (reruns read unchanged pages back)
+    python cli.py render-cases | render-simple | render-bullet | render-aggressive  IN.csv [-o out.pdf]
+    python cli.py render-cases IN.csv --incremental
+    python cli.py render-cases | render-bullet  IN.csv [--letters A-C] [--source NAME.pdf] [--rows 1-200]
+    python cli.py preview PDF_FOLDER_OR_FILE... [--first N | --random N --seed S]
+    python cli.py render-aggressive IN.csv --volume-by letter|pages|mb [--volume-size N]
+    python cli.py export cases|simple|bullet|aggressive IN.csv -o out.html|out.md
+    python cli.py pipeline cases|structured|bullet|aggressive  PDF_FOLDER_OR_FILE... -o out.pdf [--csv out.csv]
+    python cli.py queue init SCRAPER PDF_FOLDER_OR_FILE... --db jobs.sqlite
+    python cli.py queue work|status --db jobs.sqlite  /  queue merge --db jobs.sqlite -o out.csv
+    (scrapers, renderers, pipeline, queue:)  [--metrics [HOST:]PORT] [--metrics-file PATH]
+
+PyMuPDF and reportlab are slow to import, so nothing heavy is imported at
+module level: each subcommand imports its own module only when it runs.
+"""
+import argparse
+import importlib
+import sys
+
+# subcommand -> (module, help)
+SCRAPERS = {
+    "cases": ("case_scraper", "Extract legal cases with explanations"),
+    "structured": ("structured_definition_scraper", "Extract term + multi-line explanations"),
+    "bullet": ("bullet_definition_scraper", "Extract term + bullet point definitions"),
+    "aggressive": ("aggressive_definition_scraper", "Extract anything that looks like a definition"),
+}
+
+# subcommand -> (module, function, default output PDF, help)
+RENDERERS = {
+    "render-cases": ("advanced_csv_to_pdf", "create_advanced_pdf_from_csv",
+                     "Advanced_Legal_Cases_with_Sources.pdf", "Cases CSV -> formatted PDF with sources"),
+    "render-simple": ("csv_to_pdf", "create_pdf_from_csv",
+                      "Legal_Cases_Compilation.pdf", "Cases CSV -> simple PDF"),
+    "render-bullet": ("bullet_definitions_to_pdf", "create_bullet_definitions_pdf",
+                      "Structured_Definitions.pdf", "Bullet point definitions CSV -> PDF"),
+    "render-aggressive": ("aggressive_to_pdf", "create_aggressive_pdf",
+                          "Complete_Definitions.pdf", "Aggressive definitions CSV -> PDF"),
+}
+
+def load_command(name):
+    """Import (and return) the module behind a subcommand"""
+    if name in SCRAPERS:
+        return importlib.import_module(SCRAPERS[name][0])
+    return importlib.import_module(RENDERERS[name][0])
+
+def run_scraper(args):
+    module = load_command(args.command)
+    output_csv = args.output or module.output_csv
+    options = {"run_size": args.run_size} if getattr(args, "run_size", None) else {}
+    module.main(args.inputs, output_csv, jobs=args.jobs, timeout=args.timeout,
+                quarantine_file=args.quarantine, skip_duplicates=not args.keep_duplicates,
+                shard_pages=args.shard_pages, memo=args.memo, keep_boilerplate=args.keep_boilerplate,
+                prefetch=args.prefetch, prefetch_mb=args.prefetch_mb, **discovery_options(args), **options)
+
+def run_renderer(args):
+    module = load_command(args.command)
+    _, function, default_pdf, _ = RENDERERS[args.command]
+    output_pdf = args.output or default_pdf
+    options = {"contents": True} if getattr(args, "contents", False) else {}
+    selection = {name: getattr(args, name) for name in ("letters", "sources", "rows") if getattr(args, name, None)}
+    if getattr(args, "volume_by", None) or getattr(args, "incremental", False):
+        if args.links:
+            # Links cannot reach into other volume files, and they would tie
+            # every cached page group to the names of all the other cases
+            print("⚠️ --links is ignored with --volume-by and --incremental")
+    elif args.links:
+        options["links"] = True
+    if selection:
+        if getattr(args, "incremental", False):
+            # The cached page groups are those of the whole CSV
+            print("⚠️ --letters, --source and --rows are ignored with --incremental")
+        else:
+            options.update(selection)
+    if getattr(args, "volume_by", None):
+        module.create_aggressive_volumes(args.csv_file, output_pdf, args.volume_by, args.volume_size)
+    elif getattr(args, "incremental", False):
+        module.create_advanced_pdf_incremental(args.csv_file, output_pdf, cache_dir=args.cache_dir, **options)
+    else:
+        getattr(module, function)(args.csv_file, output_pdf, **options)
+
+def run_export(args):
+    import study_export
+
+    study_export.export(args.kind, args.csv_file, args.output, args.format)
+
+def run_pipeline(args):
+    import pipeline
+
+    renderer = RENDERERS[args.renderer][0] if args.renderer else None
+    pipeline.run_pipeline(args.scraper, args.inputs, args.output, output_csv=args.csv, renderer=renderer,
+                          queue_size=args.queue_size, jobs=args.jobs, timeout=args.timeout,
+                          quarantine_file=args.quarantine, skip_duplicates=not args.keep_duplicates,
+                          shard_pages=args.shard_pages, memo=args.memo, keep_boilerplate=args.keep_boilerplate,
+                          **discovery_options(args))
+
+def run_preview(args):
+    import preview
+
+    preview.preview(args.inputs, scrapers=args.scrapers, first=args.first, sample=args.random,
+                    seed=args.seed, examples=args.examples, **discovery_options(args))
+
+def run_queue(args):
+    import jobqueue
+
+    if args.action == "init":
+        if len(args.inputs) < 2 or args.inputs[0] not in SCRAPERS:
+            sys.exit(f"queue init needs a scraper ({', '.join(SCRAPERS)}) and PDF files or folders")
+        jobqueue.init_queue(args.db, args.inputs[0], args.inputs[1:], **discovery_options(args))
+    elif args.action == "work":
+        jobqueue.work_processes(args.db, args.processes, lease_seconds=args.lease, max_attempts=args.max_attempts,
+                                timeout=args.timeout)
+    elif args.action == "status":
+        jobqueue.queue_status(args.db)
+    else:
+        jobqueue.merge(args.db, args.output or load_command(jobqueue.queue_scraper(args.db)).output_csv,
+                       allow_incomplete=args.allow_incomplete)
+
+def discovery_options(args):
+    return {"include": args.include, "exclude": args.exclude, "max_depth": args.max_depth}
+
+def row_spec(spec):
+    """argparse type for --rows: the spec itself, once it is known to parse"""
+    from csv_index import parse_rows
+
+    try:
+        parse_rows(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return spec
+
+def add_discovery_arguments(sub):
+    sub.add_argument("--include", action="append", metavar="GLOB",
+                     help="Only scan files matching this glob (repeatable, default: *.pdf); "
+                          "patterns with a / match the path below the input folder")
+    sub.add_argument("--exclude", action="append", metavar="GLOB",
+                     help="Skip files and folders matching this glob (repeatable)")
+    sub.add_argument("--max-depth", type=int, metavar="N",
+                     help="Subfolder levels to search below each input folder (default: no limit)")
+
+def add_batch_arguments(sub):
+    add_discovery_arguments(sub)
+    sub.add_argument("-j", "--jobs", type=int, default=1,
+                     help="Worker processes; documents are scheduled largest first")
+    sub.add_argument("--timeout", type=float,
+                     help="Per-document wall-clock limit in seconds; slower documents are killed and quarantined")
+    sub.add_argument("--quarantine", metavar="CSV",
+                     help="Record timed-out/crashed documents here and skip them on later runs")
+    sub.add_argument("--keep-duplicates", action="store_true",
+                     help="Scan byte-identical copies of a PDF again instead of skipping them")
+    sub.add_argument("--keep-boilerplate", action="store_true",
+                     help="Keep running headers and footers instead of stripping them before extraction")
+    sub.add_argument("--shard-pages", type=int, metavar="N",
+                     help="With -j: split documents of more than N pages into N-page ranges for separate workers")
+    sub.add_argument("--memo", metavar="SQLITE",
+                     help="Store each page's records here and read unchanged pages back on later runs")
+
+def add_metrics_arguments(sub):
+    sub.add_argument("--metrics", metavar="[HOST:]PORT",
+                     help="Serve live Prometheus metrics at http://HOST:PORT/metrics (HOST defaults to 127.0.0.1)")
+    sub.add_argument("--metrics-file", metavar="PATH",
+                     help="Rewrite live metrics to this file (Prometheus text format) while running")
+    sub.add_argument("--metrics-interval", type=float, default=15, metavar="SECONDS",
+                     help="How often --metrics-file is rewritten (default: 15)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Legal document scraper & study toolkit",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, (_, help_text) in SCRAPERS.items():
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("inputs", nargs="+", help="PDF files or folders containing PDFs")
+        sub.add_argument("-o", "--output", help="Output CSV (defaults to the scraper's usual file name)")
+        add_batch_arguments(sub)
+        sub.add_argument("--prefetch", type=int, default=4, metavar="N",
+                         help="Without -j/--timeout: PDFs read into memory ahead of extraction (0 = off)")
+        sub.add_argument("--prefetch-mb", type=float, default=256, metavar="MB",
+                         help="Most memory the read-ahead PDFs may hold (default: 256)")
+        if name != "cases":
+            sub.add_argument("--run-size", type=int, metavar="N",
+                             help="Records sorted in memory before spilling a run to disk (default: 100000)")
+        add_metrics_arguments(sub)
+        sub.set_defaults(handler=run_scraper)
+
+    for name, (_, _, default_pdf, help_text) in RENDERERS.items():
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("csv_file", help="CSV produced by one of the scrapers")
+        sub.add_argument("-o", "--output", help=f"Output PDF (default: {default_pdf})")
+        sub.add_argument("--links", action="store_true",
+                         help="Link every mention of another entry's name in an explanation to that entry")
+        if name in ("render-cases", "render-bullet"):
+            sub.add_argument("--contents", action="store_true",
+                             help="Add a table of contents, an A-Z index and PDF bookmarks")
+            sub.add_argument("--letters", metavar="A-C",
+                             help="Only entries whose name starts with these letters (e.g. A-C, ADM, '#' for others)")
+            sub.add_argument("--source", action="append", dest="sources", metavar="NAME.pdf",
+                             help="Only entries from this source PDF (repeatable)")
+            sub.add_argument("--rows", type=row_spec, metavar="1-200",
+                             help="Only these CSV data rows (e.g. 1-200,350; 1 = first row after the header)")
+        if name == "render-aggressive":
+            sub.add_argument("--volume-by", choices=["letter", "pages", "mb"],
+                             help="Split the output into volumes plus a master index PDF")
+            sub.add_argument("--volume-size", type=float,
+                             help="Index letters, pages or megabytes per volume (default: 4, 500, 20)")
+        if name == "render-cases":
+            sub.add_argument("--incremental", action="store_true",
+                             help="Re-lay out only changed page groups, reusing cached pages for the rest")
+            sub.add_argument("--cache-dir", help="Page group cache (default: <output>_render_cache)")
+        add_metrics_arguments(sub)
+        sub.set_defaults(handler=run_renderer)
+
+    sub = subparsers.add_parser("export", help="CSV -> static HTML with search, or Markdown (no PDF layout)")
+    sub.add_argument("kind", choices=["cases", "simple", "bullet", "aggressive"],
+                     help="Whose cleaning and paragraph rules to use: render-cases, render-simple, ...")
+    sub.add_argument("csv_file", help="CSV produced by one of the scrapers")
+    sub.add_argument("-o", "--output", required=True, help="Output .html (plus <name>_index.js) or .md")
+    sub.add_argument("--format", choices=["html", "markdown"], help="Default: from the output's extension")
+    sub.set_defaults(handler=run_export)
+
+    sub = subparsers.add_parser("pipeline", help="Extract and render in one overlapped pass (no CSV round-trip)")
+    sub.add_argument("scraper", choices=list(SCRAPERS))
+    sub.add_argument("inputs", nargs="+", help="PDF files or folders containing PDFs")
+    sub.add_argument("-o", "--output", required=True, help="Output PDF")
+    sub.add_argument("--csv", help="Also write the scraper's CSV here")
+    sub.add_argument("--renderer", choices=list(RENDERERS), help="Renderer to use instead of the scraper's default")
+    sub.add_argument("--queue-size", type=int, default=4, help="Documents buffered between extraction and layout")
+    add_batch_arguments(sub)
+    add_metrics_arguments(sub)
+    sub.set_defaults(handler=run_pipeline)
+
+    sub = subparsers.add_parser("preview", help="Hit rates, timing and full-run estimates from a sample of pages")
+    sub.add_argument("inputs", nargs="+", help="PDF files or folders containing PDFs")
+    sub.add_argument("--scrapers", nargs="+", choices=list(SCRAPERS), help="Scrapers to try (default: all)")
+    sample = sub.add_mutually_exclusive_group()
+    sample.add_argument("--first", type=int, metavar="N", help="Preview the first N pages of every PDF")
+    sample.add_argument("--random", type=int, metavar="N", default=200,
+                        help="Preview N pages drawn from the whole corpus (default: 200)")
+    sub.add_argument("--seed", type=int, default=0, help="Seed for --random, so runs are repeatable")
+    sub.add_argument("--examples", type=int, default=3, help="Example records to print per scraper")
+    add_discovery_arguments(sub)
+    sub.set_defaults(handler=run_preview)
+
+    sub = subparsers.add_parser("queue", help="Share one extraction across machines through a SQLite job queue")
+    sub.add_argument("action", choices=["init", "work", "status", "merge"])
+    sub.add_argument("inputs", nargs="*", help="init: the scraper name, then PDF files or folders")
+    sub.add_argument("--db", required=True, help="Queue database on storage every worker can reach")
+    sub.add_argument("-o", "--output", help="merge: output CSV (defaults to the scraper's usual file name)")
+    sub.add_argument("--processes", type=int, default=1, help="work: worker processes to run on this machine")
+    sub.add_argument("--lease", type=float, default=120,
+                     help="work: seconds before an unrenewed claim is handed to another worker")
+    sub.add_argument("--max-attempts", type=int, default=3, help="work: claims per document before it is failed")
+    sub.add_argument("--timeout", type=float, default=600,
+                     help="work: seconds per document before its worker process is killed and the job given back "
+                          "(0 = scan in this process, no limit)")
+    sub.add_argument("--allow-incomplete", action="store_true",
+                     help="merge: merge finished documents even while others are pending")
+    add_discovery_arguments(sub)
+    add_metrics_arguments(sub)
+    sub.set_defaults(handler=run_queue)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    stop_metrics = None
+    if getattr(args, "metrics", None) or getattr(args, "metrics_file", None):
+        import metrics
+        stop_metrics = metrics.start(args.metrics, args.metrics_file, args.metrics_interval)
+    try:
+        args.handler(args)
+    finally:
+        if stop_metrics:
+            stop_metrics()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
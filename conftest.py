@@ -0,0 +1 @@
+"""Lets the tests under tests/ import the scripts in this folder."""
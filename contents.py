@@ -0,0 +1,155 @@
+"""Table of contents, A-Z index and PDF bookmarks for the compilations.
+
+The renderers tag each entry's heading with ``tag_entry``, and
+``record_entries`` notes the page every tagged heading lands on during the
+normal layout of the body. ``add_contents`` then lays out only the few
+contents and index pages, splices them in with PyMuPDF, turns their lines
+into links to the recorded pages and writes the outline. reportlab's
+multiBuild would instead lay out the whole body again until the page numbers
+stop moving.
+"""
+import os
+import time
+from xml.sax.saxutils import escape
+
+def tag_entry(flowable, title, section):
+    """Mark ``flowable`` as the heading of an entry for the contents and index"""
+    flowable.index_entry = (title, section)
+    return flowable
+
+def record_entries(doc):
+    """Collect (title, section, page) for every tagged heading ``doc`` lays out"""
+    entries = []
+
+    def after_flowable(flowable):
+        entry = getattr(flowable, 'index_entry', None)
+        if entry:
+            entries.append((entry[0], entry[1], doc.page))
+
+    doc.afterFlowable = after_flowable
+    return entries
+
+def index_letter(title):
+    """Index heading an entry is filed under ('#' for anything but A-Z)"""
+    first = title[:1].upper()
+    return first if 'A' <= first <= 'Z' else '#'
+
+def sections(entries):
+    """(section, first page) for each run of entries from the same section"""
+    found = []
+    for _, section, page in entries:
+        if not found or found[-1][0] != section:
+            found.append((section, page))
+    return found
+
+def _styles():
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.colors import darkblue
+
+    styles = getSampleStyleSheet()
+    return {
+        'heading': ParagraphStyle('ContentsHeading', parent=styles['Heading1'], fontSize=18,
+                                  spaceAfter=20, textColor=darkblue, fontName='Helvetica-Bold'),
+        'letter': ParagraphStyle('IndexLetter', parent=styles['Heading2'], fontSize=13,
+                                 spaceBefore=12, spaceAfter=6, textColor=darkblue, fontName='Helvetica-Bold'),
+        'line': ParagraphStyle('IndexLine', parent=styles['Normal'], fontSize=9, leading=11),
+    }
+
+def _line(text, page, style):
+    from reportlab.platypus import Paragraph
+
+    # The link target is a placeholder until the pages are spliced together
+    return Paragraph(f'<a href="page:{page}">{escape(text)}, {page}</a>', style)
+
+def _render(flowables, path):
+    """Lay out ``flowables`` as a standalone PDF; returns its tagged headings and page count"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate
+
+    doc = SimpleDocTemplate(path, pagesize=A4, rightMargin=60, leftMargin=60, topMargin=60, bottomMargin=40)
+    headings = record_entries(doc)
+    doc.build(flowables)
+    return headings, doc.page
+
+def add_contents(pdf_path, entries, section_title="Sections"):
+    """Add contents pages after the title page, an A-Z index at the end and bookmarks.
+
+    ``entries`` are the (title, section, page) triples recorded while laying
+    out the body in ``pdf_path``, which is rewritten in place. Returns the
+    seconds spent.
+    """
+    import fitz  # PyMuPDF
+    from reportlab.platypus import Paragraph
+
+    start = time.perf_counter()
+    styles = _styles()
+    front_pdf = f"{pdf_path}.contents.tmp"
+    index_pdf = f"{pdf_path}.index.tmp"
+    output_tmp = f"{pdf_path}.tmp"
+
+    try:
+        # The contents pages push the body back by their own length, so lay
+        # them out again if shifting the page numbers changed that length
+        shift, front_pages = 0, None
+        while front_pages != shift:
+            shift = front_pages or 0
+            front = [Paragraph(section_title, styles['heading'])]
+            front += [_line(section, page + shift, styles['line']) for section, page in sections(entries)]
+            _, front_pages = _render(front, front_pdf)
+
+        index = [Paragraph("Index", styles['heading'])]
+        letter = None
+        for title, _, page in sorted(entries, key=lambda entry: (entry[0].lower(), entry[2])):
+            if index_letter(title) != letter:
+                letter = index_letter(title)
+                index.append(tag_entry(Paragraph(letter, styles['letter']), letter, None))
+            index.append(_line(title, page + shift, styles['line']))
+        letters, _ = _render(index, index_pdf)
+
+        pdf = fitz.open(pdf_path)
+        with fitz.open(front_pdf) as part:
+            pdf.insert_pdf(part, start_at=1)
+        index_start = pdf.page_count
+        with fitz.open(index_pdf) as part:
+            pdf.insert_pdf(part)
+
+        # Point the placeholder links at their pages by editing the link
+        # objects directly; going through Page.insert_link refreshes every
+        # link on the page each time and is quadratic in links per page
+        page_xrefs = {}
+        for number in [*range(1, 1 + shift), *range(index_start, pdf.page_count)]:
+            for xref, annot_type, _ in pdf[number].annot_xrefs():
+                if annot_type != fitz.PDF_ANNOT_LINK:
+                    continue
+                kind, uri = pdf.xref_get_key(xref, "A/URI")
+                if kind == "string" and uri.startswith("page:"):
+                    target = page_xrefs.get(uri)
+                    if target is None:
+                        target = page_xrefs[uri] = pdf.page_xref(int(uri[5:]) - 1)
+                    pdf.xref_set_key(xref, "A", f"<</S/GoTo/D[{target} 0 R/XYZ null null null]>>")
+
+        outline = [[1, section_title, 2]]
+        previous = None
+        for title, section, page in entries:
+            if section != previous:
+                outline.append([1, section, page + shift])
+                previous = section
+            outline.append([2, title, page + shift])
+        outline.append([1, "Index", index_start + 1])
+        outline += [[2, letter, index_start + page] for letter, _, page in letters]
+        pdf.set_toc(outline)
+
+        pdf.save(output_tmp, deflate=True)
+        pdf.close()
+        os.replace(output_tmp, pdf_path)
+    finally:
+        for path in (front_pdf, index_pdf, output_tmp):
+            if os.path.exists(path):
+                os.remove(path)
+
+    return time.perf_counter() - start
+
+def report_overhead(seconds, build_time):
+    """Print what the contents, index and bookmarks added to the build time"""
+    print(f"📑 Contents, A-Z index and bookmarks added in {seconds:.2f}s "
+          f"(+{seconds / max(build_time, 1e-9):.0%} on top of the {build_time:.2f}s layout)")
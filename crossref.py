@@ -0,0 +1,131 @@
+"""Cross-reference links between the entries of a compilation.
+
+Every entry name (case name or term) of the CSV being rendered goes into one
+Aho-Corasick automaton, built once before the layout. Each explanation
+paragraph is then scanned once, whatever the number of names, and every
+mention of another entry becomes a link to that entry's heading.
+
+The automaton runs over words rather than characters: names and text are
+split into lowercased words, so a name only matches whole words ("Duty of
+care" does not match inside "duty of careful") and there are several times
+fewer steps than characters.
+"""
+import re
+
+# Names shorter than this ("Act", "Tax") would link half of every explanation
+MIN_NAME_CHARS = 4
+LINK_COLOR = "#1f4e9c"
+
+words = re.compile(r"\w+(?:['’]\w+)*")
+
+def name_words(name):
+    return tuple(word.lower() for word in words.findall(name))
+
+class Automaton:
+    """Aho-Corasick automaton over word sequences"""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.value = [None]    # value of the name ending at this state
+        self.length = [0]      # its length in words
+        self.output = [0]      # state of the longest name that is a suffix here (0: none)
+
+    def add(self, name, value):
+        """Add a name (a tuple of words); a name added twice keeps its first value"""
+        state = 0
+        for word in name:
+            following = self.goto[state].get(word)
+            if following is None:
+                following = len(self.goto)
+                self.goto[state][word] = following
+                self.goto.append({})
+                self.fail.append(0)
+                self.value.append(None)
+                self.length.append(0)
+                self.output.append(0)
+            state = following
+        if self.value[state] is None:
+            self.value[state] = value
+            self.length[state] = len(name)
+
+    def build(self):
+        """Compute the failure and output links, breadth first"""
+        queue = list(self.goto[0].values())
+        for state in queue:
+            self.output[state] = state if self.value[state] is not None else 0
+        for state in queue:
+            for word, following in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(word, 0)
+                self.fail[following] = target if target != following else 0
+                self.output[following] = following if self.value[following] is not None \
+                    else self.output[self.fail[following]]
+                queue.append(following)
+        return self
+
+    def matches(self, tokens):
+        """(first token, last token + 1, value) of the longest name ending at each token that ends one"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for end, token in enumerate(tokens, 1):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            found = output[state]
+            if found:
+                yield end - self.length[found], end, self.value[found]
+
+class CrossReferences:
+    """Anchors for the entries of one compilation, and links to them from explanation text"""
+
+    def __init__(self, names):
+        self.automaton = Automaton()
+        self.anchors = {}
+        for name in names:
+            key = name_words(name)
+            if key and key not in self.anchors and len(" ".join(key)) >= MIN_NAME_CHARS:
+                self.anchors[key] = f"entry{len(self.anchors)}"
+                self.automaton.add(key, self.anchors[key])
+        self.automaton.build()
+        self.placed = set()
+
+    def heading(self, name, markup):
+        """``markup`` for an entry heading, carrying the anchor of the first entry with this name"""
+        anchor = self.anchors.get(name_words(name))
+        if anchor is None or anchor in self.placed:
+            return markup
+        self.placed.add(anchor)
+        return f'<a name="{anchor}"/>{markup}'
+
+    def link(self, text, current=None):
+        """``text`` with every mention of another entry's name turned into a link to it.
+
+        Mentions are taken earliest first, and the longest name wins where
+        two overlap. ``current`` is the name of the entry the text belongs
+        to, which is not linked to itself.
+        """
+        spans = [match.span() for match in words.finditer(text)]
+        if not spans:
+            return text
+        own = self.anchors.get(name_words(current)) if current else None
+        tokens = [text[start:end].lower() for start, end in spans]
+        found = sorted(self.automaton.matches(tokens), key=lambda match: (match[0], -match[1]))
+
+        pieces = []
+        position = 0
+        taken = 0
+        for first, last, anchor in found:
+            if first < taken or anchor == own:
+                continue
+            start, end = spans[first][0], spans[last - 1][1]
+            pieces.append(text[position:start])
+            pieces.append(f'<a href="#{anchor}" color="{LINK_COLOR}">{text[start:end]}</a>')
+            position = end
+            taken = last
+        if not pieces:
+            return text
+        pieces.append(text[position:])
+        return "".join(pieces)
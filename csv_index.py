@@ -0,0 +1,199 @@
+"""Byte-offset index over a scraper CSV, for rendering a part of it.
+
+    python cli.py render-bullet bullet_point_definitions.csv -o A-C.pdf --letters A-C
+    python cli.py render-cases legal_cases_with_sources.csv --source "Contract Law.pdf" --rows 1-200
+
+The first selective render of a CSV writes two files next to it:
+``<csv>.index.bin`` holds the byte offset of every row (fixed-width, so row
+n's offset is at 8 * n) followed by the row numbers filed under each title
+initial and each source PDF, and ``<csv>.index.json`` is a small header with
+where each initial's and source's row numbers are in the .bin file. Later
+renders memory-map the .bin file and the CSV and read only the row numbers
+and rows that are selected, so a subset costs time in proportion to the
+subset rather than to the whole file. The header remembers the CSV's size
+and modification time, and the index is rebuilt whenever either changed.
+"""
+import bisect
+import csv
+import heapq
+import io
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from contents import index_letter
+
+# Bump after changing the index layout, so old sidecar files are rebuilt
+INDEX_VERSION = 2
+
+def index_paths(csv_file):
+    """(header, binary part) of the CSV's index"""
+    return csv_file + ".index.json", csv_file + ".index.bin"
+
+def _stamp(csv_file):
+    stat = os.stat(csv_file)
+    return stat.st_size, stat.st_mtime_ns
+
+def _lines(mapped):
+    while True:
+        line = mapped.readline()
+        if not line:
+            return
+        yield line.decode("utf-8")
+
+def build_index(csv_file, fields, kind):
+    """Index every data row of ``csv_file``; ``fields(row)`` gives its (title, source PDF). Returns the header."""
+    size, mtime_ns = _stamp(csv_file)
+    offsets = array("Q")
+    letters = {}
+    sources = {}
+    if size:
+        with open(csv_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped[:3] == b"\xef\xbb\xbf":
+                mapped.seek(3)
+            # csv.reader asks for one line at a time and never reads past the
+            # end of a row, so the position between rows is a row boundary
+            reader = csv.reader(_lines(mapped))
+            next(reader, None)  # header
+            while True:
+                start = mapped.tell()
+                row = next(reader, None)
+                if row is None:
+                    break
+                title, source = fields(row)
+                letters.setdefault(index_letter(title), array("I")).append(len(offsets))
+                sources.setdefault(source, array("I")).append(len(offsets))
+                offsets.append(start)
+            offsets.append(mapped.tell())
+
+    header_path, bin_path = index_paths(csv_file)
+    header = {"version": INDEX_VERSION, "kind": kind, "size": size, "mtime_ns": mtime_ns,
+              "byteorder": sys.byteorder, "rows": max(len(offsets) - 1, 0), "letters": {}, "sources": {}}
+    with open(bin_path, "wb") as f:
+        offsets.tofile(f)
+        # Each group is (position in the .bin file, number of rows)
+        for name, groups in (("letters", letters), ("sources", sources)):
+            for key, rows in groups.items():
+                header[name][key] = [f.tell(), len(rows)]
+                rows.tofile(f)
+        header["bin_size"] = f.tell()
+    with open(header_path, "w", encoding="utf-8") as f:
+        json.dump(header, f, ensure_ascii=False)
+    return header
+
+def load_index(csv_file, fields, kind):
+    """The header of the CSV's index, rebuilt first if it is missing or out of date"""
+    header_path, bin_path = index_paths(csv_file)
+    try:
+        with open(header_path, encoding="utf-8") as f:
+            header = json.load(f)
+        if (header["version"], header["kind"], header["size"], header["mtime_ns"], header["byteorder"],
+                header["bin_size"]) == (INDEX_VERSION, kind, *_stamp(csv_file), sys.byteorder,
+                                        os.path.getsize(bin_path)):
+            return header
+    except (OSError, ValueError, KeyError):
+        pass
+    print(f"🗂️ Indexing {csv_file}...")
+    return build_index(csv_file, fields, kind)
+
+def parse_letters(spec):
+    """"A-C" or "ADM" or "A-C,X" -> set of index letters ('#' for anything but A-Z)"""
+    letters = set()
+    for part in spec.upper().replace(" ", "").split(","):
+        if len(part) == 3 and part[1] == "-":
+            letters.update(chr(code) for code in range(ord(part[0]), ord(part[2]) + 1))
+        else:
+            letters.update(part)
+    return letters
+
+def parse_rows(spec):
+    """"1-200,350" -> sorted, merged (start, stop) ranges of 0-based data rows (1 = the first row after the header).
+
+    Raises ValueError for anything but positive row numbers and ranges whose
+    end is not before their start.
+    """
+    ranges = []
+    for part in spec.replace(" ", "").split(","):
+        first, dash, last = part.partition("-")
+        try:
+            first, last = int(first), int(last) if dash else int(first)
+        except ValueError:
+            raise ValueError(f"not a row or range of rows: {part!r}") from None
+        if first < 1:
+            raise ValueError(f"rows are numbered from 1: {part!r}")
+        if last < first:
+            raise ValueError(f"range ends before it starts: {part!r}")
+        ranges.append((first - 1, last))
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+def _source_name(source):
+    source = source.strip().lower()
+    return source[:-4] if source.endswith(".pdf") else source
+
+def _group_rows(groups, mapped):
+    """Row numbers filed under any of ``groups`` ((position, count) in the .bin file), in order"""
+    found = []
+    for position, count in groups:
+        rows = array("I")
+        rows.frombytes(mapped[position:position + 4 * count])
+        found.append(rows)
+    return list(heapq.merge(*found)) if len(found) > 1 else list(found[0]) if found else []
+
+def selected_rows(header, mapped, letters=None, sources=None, rows=None):
+    """Numbers of the rows matching every given filter, in CSV order.
+
+    Only the row numbers of the selected initials and sources are read from
+    the memory-mapped .bin file, and row ranges are clamped to the rows
+    indexed, so the work follows the size of the selection.
+    """
+    count = header["rows"]
+    ranges = [(start, min(stop, count)) for start, stop in parse_rows(rows) if start < count] if rows else None
+    chosen = None
+    if letters:
+        wanted = parse_letters(letters)
+        chosen = _group_rows([group for letter, group in header["letters"].items() if letter in wanted],
+                             mapped)
+    if sources:
+        wanted = {_source_name(source) for source in sources}
+        found = _group_rows([group for source, group in header["sources"].items()
+                             if _source_name(source) in wanted], mapped)
+        if chosen is None:
+            chosen = found
+        else:
+            smaller, larger = sorted((chosen, found), key=len)
+            smaller = set(smaller)
+            chosen = [row for row in larger if row in smaller]
+    if chosen is None:
+        ranges = ranges if ranges is not None else [(0, count)]
+        return [row for start, stop in ranges for row in range(start, stop)]
+    if ranges is not None:
+        starts = [start for start, _ in ranges]
+        chosen = [row for row in chosen
+                  if (i := bisect.bisect_right(starts, row) - 1) >= 0 and row < ranges[i][1]]
+    return chosen
+
+def read_selected(csv_file, fields, kind, letters=None, sources=None, rows=None):
+    """Yield the selected data rows of ``csv_file``, parsed straight from the memory-mapped file"""
+    header = load_index(csv_file, fields, kind)
+    _, bin_path = index_paths(csv_file)
+    if not header["rows"]:
+        print("🗂️ Rendering 0 of 0 rows")
+        return
+    with open(bin_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+        numbers = selected_rows(header, index, letters, sources, rows)
+        print(f"🗂️ Rendering {len(numbers)} of {header['rows']} rows")
+        if not numbers:
+            return
+        with open(csv_file, "rb") as csv_f, mmap.mmap(csv_f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for number in numbers:
+                offsets = array("Q", index[8 * number:8 * number + 16])
+                text = mapped[offsets[0]:offsets[1]].decode("utf-8")
+                yield next(csv.reader(io.StringIO(text, newline="")))
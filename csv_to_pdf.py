@@ -6,14 +6,49 @@ from reportlab.lib.units import inch
 from reportlab.lib.colors import black, darkblue
 import textwrap
 
-def create_pdf_from_csv(csv_file, output_pdf):
-    """Create a clean PDF from the CSV case data"""
-    
-    # Set up the document
-    doc = SimpleDocTemplate(output_pdf, pagesize=A4,
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=18)
+import metrics
+from crossref import CrossReferences
+from segmentation import finish, sentences
+
+def make_document(output_pdf):
+    """The page setup used for the simple cases compilation"""
+    return SimpleDocTemplate(output_pdf, pagesize=A4,
+                             rightMargin=72, leftMargin=72,
+                             topMargin=72, bottomMargin=18)
+
+def read_rows(csv_file):
+    """Yield the data rows of a cases CSV"""
+    with open(csv_file, 'r', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        next(reader)  # Skip header
+        yield from reader
+
+def usable_cases(rows):
+    """Yield (case name, explanation) for rows worth rendering"""
+    for row in rows:
+        if len(row) >= 2:
+            case_name = row[0].strip()
+            explanation = row[1].strip()
+            
+            if case_name and explanation:
+                yield case_name, explanation
+
+def explanation_sentences(explanation):
+    """The sentences an explanation is laid out in, one paragraph each"""
+    # Clean and format explanation
+    # Replace problematic characters and format
+    explanation = explanation.replace('"', '')
+    explanation = explanation.replace("'", "'")
     
+    # Split long explanations into paragraphs
+    return [finish(sentence) for sentence in sentences(explanation)]
+
+def build_story(rows, stats, links=None):
+    """Yield the flowables for the title and one entry per usable row.
+
+    Rows are consumed lazily; stats['entries'] counts the cases rendered.
+    ``links`` is a CrossReferences over every case name, to link mentions.
+    """
     # Get styles
     styles = getSampleStyleSheet()
     
@@ -47,48 +82,48 @@ def create_pdf_from_csv(csv_file, output_pdf):
         leading=14
     )
     
-    # Build the story (content)
-    story = []
-    
     # Add title
-    story.append(Paragraph("Legal Cases Compilation", title_style))
-    story.append(Spacer(1, 20))
+    yield Paragraph("Legal Cases Compilation", title_style)
+    yield Spacer(1, 20)
     
-    # Read CSV and add content
-    with open(csv_file, 'r', encoding='utf-8') as file:
-        reader = csv.reader(file)
-        next(reader)  # Skip header
+    case_count = 0
+    stats['entries'] = 0
+    for case_name, explanation in usable_cases(rows):
+        # Add case name
+        heading = f"<b>{case_name}</b>"
+        if links:
+            heading = links.heading(case_name, heading)
+        yield Paragraph(heading, case_style)
         
-        case_count = 0
-        for row in reader:
-            if len(row) >= 2:
-                case_name = row[0].strip()
-                explanation = row[1].strip()
-                
-                if case_name and explanation:
-                    # Add case name
-                    story.append(Paragraph(f"<b>{case_name}</b>", case_style))
-                    
-                    # Clean and format explanation
-                    # Replace problematic characters and format
-                    explanation = explanation.replace('"', '')
-                    explanation = explanation.replace("'", "'")
-                    
-                    # Split long explanations into paragraphs
-                    sentences = explanation.split('. ')
-                    for sentence in sentences:
-                        if sentence.strip():
-                            if not sentence.endswith('.'):
-                                sentence += '.'
-                            story.append(Paragraph(sentence, explanation_style))
-                    
-                    case_count += 1
-                    
-                    # Add page break every 10 cases for better readability
-                    if case_count % 10 == 0:
-                        story.append(PageBreak())
+        for sentence in explanation_sentences(explanation):
+            if links:
+                sentence = links.link(sentence, case_name)
+            yield Paragraph(sentence, explanation_style)
+        
+        case_count += 1
+        stats['entries'] = case_count
+        
+        # Add page break every 10 cases for better readability
+        if case_count % 10 == 0:
+            yield PageBreak()
+
+def create_pdf_from_csv(csv_file, output_pdf, links=False):
+    """Create a clean PDF from the CSV case data"""
+    
+    # Set up the document
+    doc = make_document(output_pdf)
+    
+    if links:
+        links = CrossReferences(case_name for case_name, _ in usable_cases(read_rows(csv_file)))
+        print(f"🔗 Linking mentions of {len(links.anchors)} case names")
+    
+    # Build the story (content)
+    stats = {}
+    story = list(build_story(read_rows(csv_file), stats, links or None))
+    case_count = stats['entries']
     
     # Build the PDF
+    metrics.watch_layout("csv_to_pdf", story)
     doc.build(story)
     print(f"PDF created successfully: {output_pdf}")
     print(f"Total cases included: {case_count}")
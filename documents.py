@@ -0,0 +1,329 @@
+import fnmatch
+import hashlib
+import os
+import queue
+import re
+import threading
+import time
+from collections import Counter
+
+# Running headers/footers: a line at the top or bottom of at least this share
+# of a document's pages (and of at least BOILERPLATE_MIN_PAGES pages) is
+# stripped before extraction. Set BOILERPLATE_SHARE to None to keep them
+# (or pass --keep-boilerplate, see keep_boilerplate).
+BOILERPLATE_SHARE = 0.6
+BOILERPLATE_MIN_PAGES = 4
+# How far into the page (from either end) a header/footer block can reach
+EDGE_LINES = 3
+# Read-ahead for serial runs: PDFs read into memory ahead of the extractor,
+# and the most memory those read-ahead files may hold (larger files are
+# opened from disk as before)
+PREFETCH_FILES = 4
+PREFETCH_MB = 256
+
+# "12", "- 12 -", "Page 3", "Page 3 of 40", "3/40": the same footer on every page
+page_number = re.compile(r'^[\s\-–—(\[]*(?:page\s*)?\d+(?:\s*(?:of|/)\s*\d+)?[\s\-–—)\]]*$', re.IGNORECASE)
+has_text = re.compile(r'\w')
+
+# Pages extracted by this process so far (the batch runner reports it as a metric)
+pages_scanned = 0
+# page_memo.PageMemo that scan_pages reads unchanged pages back from (see use_memo)
+memo = None
+# False while running headers and footers are kept for this run (see keep_boilerplate)
+strip_headers = True
+
+def _matches(patterns, name, relative):
+    """Glob patterns containing a slash match the path below the input folder, others the bare name"""
+    name, relative = name.lower(), relative.lower()
+    return any(fnmatch.fnmatchcase(relative if '/' in pattern else name, pattern.lower()) for pattern in patterns)
+
+def find_pdfs(paths, include=None, exclude=None, max_depth=None):
+    """Yield (filename, path) for every PDF in the given folders or files.
+
+    ``paths`` may be a single folder/PDF path or a list of them, so the
+    scrapers can be pointed at a whole folder or at one small PDF. Folders
+    are walked recursively with os.scandir and files are yielded as each
+    directory is read, so work can start before a big tree has been walked.
+    ``include`` and ``exclude`` are glob patterns (default: include
+    ``*.pdf``); excluded folders are not entered. ``max_depth`` limits how
+    many levels of subfolders are searched (0 = the folder itself only).
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    include = include or ["*.pdf"]
+    exclude = exclude or []
+
+    for path in paths:
+        if not os.path.isdir(path):
+            name = os.path.basename(path)
+            if _matches(include, name, name) and not _matches(exclude, name, name):
+                yield name, path
+            continue
+
+        # Files of a folder come before its subfolders, so a flat folder is
+        # listed in the same order as before
+        folders = [(path, "", 0)]
+        while folders:
+            folder, relative, depth = folders.pop()
+            try:
+                entries = os.scandir(folder)
+            except OSError as e:
+                print(f"⚠️ Cannot read {folder}: {e}")
+                continue
+            subfolders = []
+            with entries:
+                for entry in entries:
+                    entry_relative = f"{relative}{entry.name}"
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if (max_depth is None or depth < max_depth) and \
+                                    not _matches(exclude, entry.name, entry_relative):
+                                subfolders.append((entry.path, f"{entry_relative}/", depth + 1))
+                        elif _matches(include, entry.name, entry_relative) and \
+                                not _matches(exclude, entry.name, entry_relative) and entry.is_file():
+                            yield entry.name, entry.path
+                    except OSError:
+                        continue
+            folders.extend(reversed(subfolders))
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def skip_duplicate_files(pdf_files, duplicates):
+    """Yield the first copy of each (filename, path); exact duplicates go to ``duplicates``.
+
+    Duplicates are recorded as (path, path of the copy that is kept). A file
+    is only hashed once another file of the same size has been seen, so a
+    folder of distinct PDFs costs one stat per file, and files are passed on
+    as they come rather than after the whole listing.
+    """
+    by_size = {}
+    digests = {}
+    for filename, pdf_path in pdf_files:
+        try:
+            size = os.path.getsize(pdf_path)
+        except OSError:
+            yield filename, pdf_path
+            continue
+        earlier = by_size.setdefault(size, [])
+        original = None
+        if earlier:
+            digest = file_digest(pdf_path)
+            for kept in earlier:
+                if kept not in digests:
+                    digests[kept] = file_digest(kept)
+                if digests[kept] == digest:
+                    original = kept
+                    break
+            digests[pdf_path] = digest
+        if original is None:
+            earlier.append(pdf_path)
+            yield filename, pdf_path
+        else:
+            duplicates.append((pdf_path, original))
+
+def read_pdf(path):
+    """The whole file, or None if it cannot be read (opening it will report why)"""
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def prefetched(pdf_files, files=PREFETCH_FILES, max_mb=PREFETCH_MB):
+    """Yield (filename, path, file contents or None) for (filename, path) pairs.
+
+    A background thread pulls ``pdf_files`` and reads up to ``files`` PDFs
+    (and at most ``max_mb`` megabytes) ahead of the consumer, so waiting on
+    slow storage overlaps with extraction. With ``files`` = 0 each PDF is
+    read when it is needed. Files larger than ``max_mb`` are left on disk
+    (None is yielded for them).
+    """
+    limit = max_mb * 1_000_000
+
+    def load(path):
+        try:
+            if os.path.getsize(path) > limit:
+                return None
+        except OSError:
+            return None
+        return read_pdf(path)
+
+    if files <= 0:
+        for filename, path in pdf_files:
+            yield filename, path, load(path)
+        return
+
+    ready = queue.Queue(maxsize=files)
+    budget = threading.Condition()
+    held = [0]  # bytes read ahead and not yet handed out
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def read_ahead():
+        try:
+            for filename, path in pdf_files:
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    size = 0
+                size = size if size <= limit else 0
+                with budget:
+                    while held[0] and held[0] + size > limit and not stop.is_set():
+                        budget.wait(0.1)
+                data = load(path)
+                with budget:
+                    held[0] += len(data or b"")
+                if not put((filename, path, data)):
+                    return
+            put(done)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=read_ahead, name="pdf-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            with budget:
+                held[0] -= len(item[2] or b"")
+                budget.notify()
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+def _line_key(line):
+    """Header/footer lines are compared exactly, except that page numbers all compare equal"""
+    line = line.strip()
+    return "<page number>" if page_number.match(line) else line
+
+def _edges(lines):
+    """Indexes of the non-blank lines a header or footer could occupy: (from the top, from the bottom)"""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return filled[:EDGE_LINES], filled[::-1][:EDGE_LINES]
+
+def repeated_lines(page_lines):
+    """Line keys found at the top or bottom of most pages of one document"""
+    if not strip_headers or BOILERPLATE_SHARE is None or len(page_lines) < BOILERPLATE_MIN_PAGES:
+        return set()
+    counts = Counter()
+    for lines in page_lines:
+        top, bottom = _edges(lines)
+        counts.update({_line_key(lines[i]) for i in top + bottom if has_text.search(lines[i])})
+    threshold = max(BOILERPLATE_MIN_PAGES, BOILERPLATE_SHARE * len(page_lines))
+    return {key for key, pages in counts.items() if pages >= threshold}
+
+def strip_repeated(lines, repeated):
+    """Drop the runs of repeated lines at the top and bottom of one page; returns (lines, stripped count)"""
+    top, bottom = _edges(lines)
+    drop = set()
+    for edge in (top, bottom):
+        for i in edge:
+            if i in drop or _line_key(lines[i]) not in repeated:
+                break
+            drop.add(i)
+    if not drop:
+        return lines, 0
+    return [line for i, line in enumerate(lines) if i not in drop], len(drop)
+
+def page_count(pdf_path):
+    import fitz  # PyMuPDF
+
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+def page_texts(pdf_path, start=0, stop=None, data=None):
+    """Text of pages ``start`` to ``stop`` (default: the last page) of one PDF.
+
+    Each call opens the document itself, so separate processes can extract
+    different page ranges of the same file.
+    """
+    import fitz  # PyMuPDF
+
+    global pages_scanned
+
+    with (fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(pdf_path)) as doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        texts = [doc[page_num].get_text("text") for page_num in range(start, stop)]
+    pages_scanned += len(texts)
+    return texts
+
+def strip_boilerplate(texts):
+    """Strip the running headers and footers of a whole document's page texts.
+
+    Returns (texts, lines stripped, distinct repeated lines, lines left to scan).
+    """
+    page_lines = [text.split('\n') for text in texts]
+    repeated = repeated_lines(page_lines)
+    stripped = 0
+    if repeated:
+        texts = list(texts)
+        for page_num, lines in enumerate(page_lines):
+            kept, count = strip_repeated(lines, repeated)
+            if count:
+                texts[page_num] = '\n'.join(kept)
+                stripped += count
+    scanned = sum(len(lines) for lines in page_lines) - stripped
+    return texts, stripped, len(repeated), scanned
+
+def keep_boilerplate(keep=True):
+    """Keep running headers and footers in this process's page texts from now on (False: strip them again)"""
+    global strip_headers
+    strip_headers = not keep
+
+def use_memo(path):
+    """Memoize page results in the SQLite file at ``path`` from now on (None: stop)"""
+    global memo
+    if path is None:
+        memo = None
+    elif memo is None or memo.path != path:
+        from page_memo import PageMemo
+        memo = PageMemo(path)
+    return memo
+
+def scan_pages(scan_page, texts, filename, first_page=0):
+    """Run ``scan_page`` over consecutive page texts; returns (records, seconds spent)"""
+    start = time.perf_counter()
+    if memo is not None:
+        return memo.scan_pages(scan_page, texts, filename, first_page), time.perf_counter() - start
+    records = []
+    for page_num, text in enumerate(texts, first_page):
+        records.extend(scan_page(text, filename, page_num))
+    return records, time.perf_counter() - start
+
+def report_stripped(filename, stripped, repeated, scanned, elapsed):
+    if stripped:
+        saved_ms = elapsed / max(scanned, 1) * stripped * 1000
+        print(f"✂️ {filename}: stripped {stripped} repeated header/footer lines "
+              f"({repeated} distinct), ~{saved_ms:.0f} ms of extraction saved")
+
+def scan_document(scan_page, pdf_path, filename, data=None):
+    """Run ``scan_page(text, filename, page_num)`` over every page of one PDF.
+
+    The page texts are extracted in one pass; running headers and footers
+    found on most pages are stripped before the extractor sees them, and
+    the lines and (estimated) extraction time saved are reported. ``data``
+    is the file's contents when it has already been read ahead.
+    """
+    texts, stripped, repeated, scanned = strip_boilerplate(page_texts(pdf_path, data=data))
+    records, elapsed = scan_pages(scan_page, texts, filename)
+    report_stripped(filename, stripped, repeated, scanned, elapsed)
+    return records
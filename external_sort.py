@@ -0,0 +1,141 @@
+"""Out-of-core dedupe and sort for the definition scrapers.
+
+The scrapers keep the first definition seen for each term (compared
+case-insensitively) and then sort by the exact term, so two records that
+collide in the dedupe can end up far apart in the output ("Zebra" sorts
+before "apple"). ``sorted_unique`` therefore makes two passes, each over
+sorted runs of at most ``run_size`` records spilled to temporary files:
+
+1. runs ordered by (dedupe key, discovery order) are k-way merged, and only
+   the first record of each dedupe key survives the merge;
+2. the survivors are spilled again ordered by sort key and merged straight
+   into the caller (normally the CSV writer).
+
+Memory is bounded by the run size rather than by the corpus. When a pass
+never fills a run nothing touches the disk and it is a plain in-memory
+sort, so small result sets cost what they always did.
+"""
+import gc
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+from itertools import islice
+
+# Records held in memory before a sorted run is spilled to disk
+RUN_SIZE = 100_000
+# Records pickled together; a merge holds one chunk per open run
+CHUNK_SIZE = 1024
+
+class RunSorter:
+    """Collect (key, seq, record) items, spilling a sorted run every ``run_size`` items"""
+
+    def __init__(self, run_size, tmp_dir, name):
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+        self.name = name
+        self.buffer = []
+        self.runs = []
+
+    def add(self, item):
+        self.buffer.append(item)
+        if len(self.buffer) >= self.run_size:
+            self._spill()
+
+    def _spill(self):
+        self.buffer.sort()
+        path = os.path.join(self.tmp_dir, f"{self.name}_{len(self.runs):05d}.pickle")
+        with open(path, "wb") as f:
+            for start in range(0, len(self.buffer), CHUNK_SIZE):
+                pickle.dump(self.buffer[start:start + CHUNK_SIZE], f, pickle.HIGHEST_PROTOCOL)
+        self.runs.append(path)
+        self.buffer = []
+
+    def sorted_items(self):
+        """All items in order: sorted in memory if nothing was spilled, else merged from the runs"""
+        if not self.runs:
+            self.buffer.sort()
+            items, self.buffer = self.buffer, []
+            return iter(items)
+        if self.buffer:
+            self._spill()
+        return heapq.merge(*(_read_run(path) for path in self.runs))
+
+def _read_run(path):
+    with open(path, "rb") as f:
+        while True:
+            # Unpickling a chunk allocates thousands of containers at once,
+            # which would otherwise set off a cyclic GC pass every few records
+            gc.disable()
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                break
+            finally:
+                gc.enable()
+            yield from chunk
+
+def sorted_unique(records, dedupe_key, sort_key, run_size=RUN_SIZE):
+    """Yield the first record for each ``dedupe_key`` in ``records``, ordered by ``sort_key``.
+
+    Gives the same sequence as a first-seen dedupe followed by a stable sort,
+    without ever holding more than ``run_size`` records. Keys are compared
+    with the discovery order as tie-breaker, so records themselves are never
+    compared.
+    """
+    records = iter(records)
+    head = list(islice(records, run_size))
+    if len(head) < run_size:
+        # Fits in a single run: the usual in-memory dedupe and sort
+        seen = set()
+        unique = []
+        for record in head:
+            key = dedupe_key(record)
+            if key not in seen:
+                seen.add(key)
+                unique.append(record)
+        del head
+        unique.sort(key=sort_key)
+        yield from unique
+        return
+
+    tmp_dir = tempfile.mkdtemp(prefix="sort_runs_")
+    try:
+        by_key = RunSorter(run_size, tmp_dir, "by_key")
+        for seq, record in enumerate(head):
+            by_key.add((dedupe_key(record), seq, record))
+        del head
+        for seq, record in enumerate(records, run_size):
+            by_key.add((dedupe_key(record), seq, record))
+
+        by_term = RunSorter(run_size, tmp_dir, "by_term")
+        previous = None
+        for key, seq, record in by_key.sorted_items():
+            if key != previous:
+                previous = key
+                by_term.add((sort_key(record), seq, record))
+
+        for _, _, record in by_term.sorted_items():
+            yield record
+        print(f"🗃️ Sorted out of core: {len(by_key.runs) + len(by_term.runs)} run(s) "
+              f"of up to {run_size:,} records")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+class Tally:
+    """Pass ``items`` through once, counting them and keeping the first ``limit`` that pass ``keep``"""
+
+    def __init__(self, items, limit, keep=None):
+        self.items = items
+        self.limit = limit
+        self.keep = keep
+        self.count = 0
+        self.kept = []
+
+    def __iter__(self):
+        for item in self.items:
+            self.count += 1
+            if len(self.kept) < self.limit and (self.keep is None or self.keep(item)):
+                self.kept.append(item)
+            yield item
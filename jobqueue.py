@@ -0,0 +1,299 @@
+"""Coordinator/worker extraction through a SQLite job table.
+
+    python cli.py queue init bullet PDF_FOLDER_OR_FILE... --db jobs.sqlite
+    python cli.py queue work --db jobs.sqlite [--processes 4]      (on any number of hosts)
+    python cli.py queue status --db jobs.sqlite
+    python cli.py queue merge --db jobs.sqlite -o bullet_point_definitions.csv
+
+``init`` records one job per PDF, in discovery order. Workers claim jobs
+(largest first) inside a write transaction, hold them under a lease that a
+heartbeat thread keeps renewing, and write each document's records to a JSON
+file next to the database before marking the job done. Each document is
+scanned in a batch worker process that is killed once it runs past
+``timeout`` seconds, so a document that hangs releases its job instead of
+having its lease renewed forever. A job whose worker dies is claimed again
+once its lease runs out; a document that keeps failing, timing out or
+crashing is given up after ``max_attempts`` claims. ``merge`` reads the partial
+results back in discovery order and applies the scraper's own dedupe and
+sort, so the CSV is the same as a single-process run over the same PDFs.
+
+The database and the partial results must live on a filesystem every worker
+can reach. SQLite relies on the filesystem's locks, which some network
+filesystems implement poorly.
+"""
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import documents
+import metrics
+from batch import _Worker, _worker_context, estimate_cost, report_duplicates
+from cli import SCRAPERS
+from documents import find_pdfs, skip_duplicate_files
+from external_sort import Tally
+
+# Seconds a claim stays valid without a heartbeat; the heartbeat renews it every third of that
+LEASE_SECONDS = 120
+# Claims per document before it is marked failed (covers crashes as well as errors)
+MAX_ATTEMPTS = 3
+# Seconds a document may take before its worker is killed and the job given back (0 = no limit)
+JOB_TIMEOUT = 600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY,         -- discovery order, used by the merge
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE,
+    cost INTEGER NOT NULL,           -- file size, for largest-first claiming
+    status TEXT NOT NULL DEFAULT 'pending',   -- pending, running, done, failed
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    records INTEGER,
+    error TEXT
+);
+"""
+
+def connect(db_path):
+    # Transactions are opened explicitly, so claims can take the write lock up front
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 60000")
+    return conn
+
+def results_dir(db_path):
+    return f"{db_path}.results"
+
+def result_path(db_path, seq):
+    return os.path.join(results_dir(db_path), f"{seq:06d}.json")
+
+def queue_scraper(db_path):
+    """Name of the scraper the queue at ``db_path`` was created for"""
+    conn = connect(db_path)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'scraper'").fetchone()
+    conn.close()
+    return row[0]
+
+def init_queue(db_path, scraper_name, inputs, **discovery):
+    """Create the job table for ``inputs``; PDFs already queued are left alone.
+
+    ``discovery`` (include, exclude, max_depth) is passed to find_pdfs.
+    """
+    conn = connect(db_path)
+    conn.executescript(SCHEMA)
+    conn.execute("BEGIN IMMEDIATE")
+    stored = conn.execute("SELECT value FROM meta WHERE key = 'scraper'").fetchone()
+    if stored and stored[0] != scraper_name:
+        conn.execute("ROLLBACK")
+        raise ValueError(f"{db_path} is a {stored[0]} queue, not {scraper_name}")
+    conn.execute("INSERT OR IGNORE INTO meta VALUES ('scraper', ?)", (scraper_name,))
+    next_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM jobs").fetchone()[0]
+    duplicates = []
+    added = 0
+    for filename, pdf_path in skip_duplicate_files(find_pdfs(inputs, **discovery), duplicates):
+        pdf_path = os.path.abspath(pdf_path)
+        cursor = conn.execute("INSERT OR IGNORE INTO jobs (seq, filename, path, cost) VALUES (?, ?, ?, ?)",
+                              (next_seq + added, filename, pdf_path, estimate_cost(pdf_path)))
+        added += cursor.rowcount
+    conn.execute("COMMIT")
+    conn.close()
+    report_duplicates(duplicates)
+    os.makedirs(results_dir(db_path), exist_ok=True)
+    print(f"🗂️ Queued {added} new document(s) for {scraper_name} in {db_path}")
+    return added
+
+def claim(conn, worker_id, lease_seconds, max_attempts):
+    """Claim the largest unclaimed (or abandoned) job; None when nothing is left to claim"""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("UPDATE jobs SET status = 'failed', error = 'lease expired ' || attempts || ' time(s)' "
+                     "WHERE status = 'running' AND lease_until < ? AND attempts >= ?", (now, max_attempts))
+        row = conn.execute("SELECT seq, filename, path FROM jobs "
+                           "WHERE status = 'pending' OR (status = 'running' AND lease_until < ?) "
+                           "ORDER BY cost DESC, seq LIMIT 1", (now,)).fetchone()
+        if row:
+            conn.execute("UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                         "WHERE seq = ?", (worker_id, now + lease_seconds, row[0]))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return row
+
+def _heartbeat(db_path, seq, worker_id, lease_seconds, stop):
+    """Keep renewing the lease on ``seq`` until ``stop`` is set"""
+    conn = connect(db_path)
+    while not stop.wait(lease_seconds / 3):
+        conn.execute("UPDATE jobs SET lease_until = ? WHERE seq = ? AND worker = ? AND status = 'running'",
+                     (time.time() + lease_seconds, seq, worker_id))
+    conn.close()
+
+def _scan_with_timeout(worker, filename, pdf_path, timeout):
+    """(status, records or error, pages) of one document scanned in ``worker``.
+
+    On "timeout" or "crashed" the worker is unusable and must be replaced.
+    """
+    worker.assign(("document", filename, pdf_path, None))
+    if not worker.conn.poll(timeout):
+        return "timeout", f"no result after {timeout:g}s", 0
+    try:
+        return worker.conn.recv()
+    except (EOFError, OSError):
+        worker.process.join(1)
+        return "crashed", f"worker exited with code {worker.process.exitcode}", 0
+
+def _write_result(path, records):
+    """Write a document's records atomically, so the merge never sees half a file"""
+    partial = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False)
+    os.replace(partial, path)
+
+def _queue_progress(conn):
+    """(unfinished jobs, bytes still to scan, bytes scanned) over the whole queue"""
+    unfinished, left, scanned = conn.execute(
+        "SELECT SUM(status IN ('pending', 'running')), "
+        "SUM(CASE WHEN status IN ('pending', 'running') THEN cost ELSE 0 END), "
+        "SUM(CASE WHEN status = 'done' THEN cost ELSE 0 END) FROM jobs").fetchone()
+    return unfinished or 0, left or 0, scanned or 0
+
+def _report_progress(conn, done_at_start):
+    """Queue-wide progress as metrics: the ETA follows every worker's throughput, not just this one's"""
+    unfinished, left, scanned = _queue_progress(conn)
+    metrics.set_gauge("documents_queued", unfinished)
+    metrics.set_gauge("bytes_done_total", scanned - done_at_start)
+    metrics.set_gauge("bytes_discovered_total", scanned - done_at_start + left)
+
+def work(db_path, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, timeout=JOB_TIMEOUT):
+    """Claim and scan documents until the queue is drained; returns the number scanned.
+
+    With a ``timeout`` each document is scanned in a worker process that is
+    killed after that many seconds; without one it is scanned in this process.
+    """
+    scraper = importlib.import_module(SCRAPERS[queue_scraper(db_path)][0])
+    conn = connect(db_path)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    extractor = scraper.__name__
+    done = 0
+    done_at_start = _queue_progress(conn)[2]
+    metrics.set_gauge("discovery_complete", 1)
+    metrics.mark_started("extract")
+    worker = None
+
+    while True:
+        job = claim(conn, worker_id, lease_seconds, max_attempts)
+        _report_progress(conn, done_at_start)
+        if job is None:
+            break
+        seq, filename, pdf_path = job
+        print(f"📄 [{worker_id}] Scanning: {filename}")
+
+        # Started before the heartbeat thread, so it can still be forked
+        if timeout and worker is None:
+            worker = _Worker(_worker_context(), scraper.scan_pdf)
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=_heartbeat, args=(db_path, seq, worker_id, lease_seconds, stop),
+                                     daemon=True)
+        heartbeat.start()
+        pages_before = documents.pages_scanned
+        pages = 0
+        try:
+            if timeout:
+                status, payload, pages = _scan_with_timeout(worker, filename, pdf_path, timeout)
+                if status in ("timeout", "crashed"):
+                    worker.kill()
+                    worker = None
+            else:
+                status, payload = "ok", scraper.scan_pdf(pdf_path, filename)
+            if status == "ok":
+                _write_result(result_path(db_path, seq), payload)
+        except Exception as e:
+            status, payload = "error", f"{type(e).__name__}: {e}"
+        finally:
+            stop.set()
+            heartbeat.join()
+            metrics.inc("pages_total", pages + documents.pages_scanned - pages_before)
+
+        metrics.inc("documents_total", status=status)
+        if status == "ok":
+            conn.execute("UPDATE jobs SET status = 'done', records = ?, error = NULL, lease_until = NULL "
+                         "WHERE seq = ? AND worker = ?", (len(payload), seq, worker_id))
+            done += 1
+            metrics.inc("records_total", len(payload), extractor=extractor)
+        else:
+            print(f"❌ Error with {filename}: {payload}" if status == "error" else f"⏱️ {filename}: {payload}")
+            conn.execute("UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                         "error = ?, lease_until = NULL WHERE seq = ? AND worker = ?",
+                         (max_attempts, payload if status == "error" else f"{status}: {payload}", seq, worker_id))
+
+    if worker is not None:
+        worker.stop()
+    metrics.mark_finished("extract")
+    conn.close()
+    return done
+
+def work_processes(db_path, processes, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, timeout=JOB_TIMEOUT):
+    """Run ``processes`` local workers against the queue and wait for them"""
+    if processes <= 1:
+        return work(db_path, lease_seconds, max_attempts, timeout)
+    workers = [multiprocessing.Process(target=work, args=(db_path, lease_seconds, max_attempts, timeout))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    # The workers' own counters stay in their processes; the queue's progress
+    # (and so the ETA) is read from the database while waiting for them
+    conn = connect(db_path)
+    done_at_start = _queue_progress(conn)[2]
+    metrics.set_gauge("discovery_complete", 1)
+    metrics.mark_started("extract")
+    for worker in workers:
+        while worker.is_alive():
+            worker.join(5)
+            _report_progress(conn, done_at_start)
+    metrics.mark_finished("extract")
+    conn.close()
+
+def queue_status(db_path):
+    """Job counts per status, printed with any failures"""
+    conn = connect(db_path)
+    counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+    failed = conn.execute("SELECT path, attempts, error FROM jobs WHERE status = 'failed' ORDER BY seq").fetchall()
+    conn.close()
+    print("📋 " + ", ".join(f"{status}: {counts.get(status, 0)}" for status in ("pending", "running", "done", "failed")))
+    for pdf_path, attempts, error in failed:
+        print(f"    [failed after {attempts}] {pdf_path} - {error}")
+    return counts
+
+def merge(db_path, output_csv, allow_incomplete=False):
+    """Merge the partial results in discovery order and write the scraper's CSV; returns the record count"""
+    scraper = importlib.import_module(SCRAPERS[queue_scraper(db_path)][0])
+    conn = connect(db_path)
+    unfinished = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')").fetchone()[0]
+    jobs = conn.execute("SELECT seq, path FROM jobs WHERE status = 'done' ORDER BY seq").fetchall()
+    failed = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'failed'").fetchone()[0]
+    conn.close()
+    if unfinished and not allow_incomplete:
+        raise RuntimeError(f"{unfinished} job(s) still pending or running in {db_path}")
+
+    def records():
+        for seq, _ in jobs:
+            with open(result_path(db_path, seq), encoding="utf-8") as f:
+                yield from json.load(f)
+
+    # The definition scrapers sort through runs on disk, so a merge never
+    # needs the whole corpus's records in memory at once
+    if hasattr(scraper, "finalize_stream"):
+        unique = Tally(scraper.finalize_stream(records()), 0)
+    else:
+        unique = Tally(scraper.finalize_records(list(records())), 0)
+    scraper.save_to_csv(unique, output_csv)
+    if failed:
+        print(f"⚠️ {failed} failed document(s) left out; see 'queue status'")
+    print(f"✅ Merged {len(jobs)} document(s): {unique.count} unique records -> {output_csv}")
+    return unique.count
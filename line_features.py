@@ -0,0 +1,109 @@
+"""Per-page line features for the structured and bullet extractors.
+
+Both extractors look ahead several lines from every candidate term, so a
+line used to be cleaned and tested again for every window it fell into.
+Instead each page's lines are cleaned once and their features computed once
+as NumPy arrays. The cheap features (length, first and last character, word
+count) are combined first, and the regex tests only run on the lines those
+masks leave undecided. The per-line work is done with C-level str methods
+mapped over the lines, never with a Python function per line. NumPy is
+imported by the functions that use it, so importing a scraper (to merge a
+job queue, or in the parent of a -j run) does not load it.
+
+scan_blocks() then walks the headers once (header -> collecting -> emit)
+instead of opening a look-ahead loop at each one, so a header that falls
+short no longer makes the following lines be read again.
+"""
+from bisect import bisect_right
+from itertools import accumulate, compress, repeat
+from operator import itemgetter
+
+_first_char = itemgetter(slice(0, 1))
+
+def lengths(lines):
+    import numpy as np
+
+    return np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+
+def first_upper(lines):
+    """First character is uppercase (False for empty lines)"""
+    import numpy as np
+
+    return np.fromiter(map(str.isupper, map(_first_char, lines)), dtype=bool, count=len(lines))
+
+def starts_with(lines, prefixes):
+    import numpy as np
+
+    return np.fromiter(map(str.startswith, lines, repeat(prefixes)), dtype=bool, count=len(lines))
+
+def ends_with(lines, suffixes):
+    import numpy as np
+
+    return np.fromiter(map(str.endswith, lines, repeat(suffixes)), dtype=bool, count=len(lines))
+
+def word_counts(lines, length):
+    """Words per line, for lines already collapsed to single spaces"""
+    import numpy as np
+
+    spaces = np.fromiter(map(str.count, lines, repeat(' ')), dtype=np.int64, count=len(lines))
+    return spaces + (length > 0)
+
+def regex_mask(pattern, lines, where, match=False, key=None):
+    """Boolean array: ``pattern`` found in the line (or in ``key(line)``), tested only where ``where`` is set"""
+    import numpy as np
+
+    test = pattern.match if match else pattern.search
+    mask = np.zeros(len(lines), dtype=bool)
+    candidates = np.flatnonzero(where)
+    if len(candidates):
+        texts = map(lines.__getitem__, candidates.tolist())
+        if key is not None:
+            texts = map(key, texts)
+        mask[candidates] = np.fromiter(map(bool, map(test, texts)), dtype=bool, count=len(candidates))
+    return mask
+
+def scan_blocks(kinds, count, emit):
+    """Find "header, then explanation lines" blocks in one pass over a page's line masks.
+
+    ``kinds`` is a list of (header mask, stop mask, explanation mask, window,
+    minimum); a line is a header of at most one kind. The block of a header
+    at line i holds the lines after it up to its kind's next stop line, or up
+    to line i + window, whichever comes first. When at least ``minimum`` of
+    those are explanation lines, ``emit(i, kind number, explanation line
+    numbers)`` is called; if it returns true the lines of the block are
+    consumed and headers inside it are skipped, otherwise the next header is
+    tried.
+
+    That is what looking ahead from every header in turn gives, without the
+    look-ahead: a running count of explanation lines and the list of stop
+    lines are built in one pass, after which each header's block bounds and
+    explanation count are a lookup, however much the blocks overlap.
+    """
+    lines = range(count)
+    tables = []
+    headers = None
+    for kind, (header, stop, explains, window, minimum) in enumerate(kinds):
+        if not any(header):
+            tables.append(None)
+            continue
+        # (the end of the page stands in as a last stop line)
+        stops = list(compress(lines, stop))
+        stops.append(count)
+        tables.append((stops, explains, list(accumulate(explains, initial=0)), window, minimum))
+        found = zip(compress(lines, header), repeat(kind))
+        headers = found if headers is None else sorted([*headers, *found])
+    
+    resume = 0
+    for i, kind in headers or ():
+        # Header: skipped when inside a block already emitted
+        if i < resume:
+            continue
+        # Collecting: the block ends at the next stop line or the window's edge
+        stops, explains, seen, window, minimum = tables[kind]
+        end = stops[bisect_right(stops, i)]
+        if end > i + window:
+            end = i + window
+        # Emit
+        if seen[end] - seen[i + 1] >= minimum and \
+                emit(i, kind, list(compress(range(i + 1, end), explains[i + 1:end]))):
+            resume = end
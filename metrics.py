@@ -0,0 +1,191 @@
+"""Live metrics for long extraction and render runs.
+
+    python cli.py bullet PDF_FOLDER --metrics 9108                 (http://127.0.0.1:9108/metrics)
+    python cli.py bullet PDF_FOLDER --metrics-file run.prom [--metrics-interval 15]
+
+The batch runner, the queue workers, the pipeline and the renderers count
+what they do here (in the main process; worker processes report back through
+the batch runner). The counters are exposed in the Prometheus text format,
+either over HTTP on localhost or by rewriting a file every few seconds (the
+format node_exporter's textfile collector reads). Rates and ETAs are
+worked out when the metrics are read, so counting stays cheap.
+"""
+import math
+import os
+import threading
+import time
+
+PREFIX = "legal_scraper_"
+
+# name -> (type, help)
+METRICS = {
+    "documents_discovered_total": ("counter", "PDFs found by discovery (after duplicate and quarantine skips)"),
+    "documents_total": ("counter", "PDFs finished, by status (ok, error, timeout, crashed)"),
+    "documents_skipped_total": ("counter", "PDFs skipped, by reason (duplicate, quarantined)"),
+    "documents_queued": ("gauge", "PDFs discovered but not finished yet"),
+    "discovery_complete": ("gauge", "1 once every input folder has been walked"),
+    "bytes_discovered_total": ("counter", "Size of the PDFs discovered"),
+    "bytes_done_total": ("counter", "Size of the PDFs finished"),
+    "pages_total": ("counter", "Pages extracted"),
+    "pages_per_second": ("gauge", "Pages extracted per second since the first document started"),
+    "records_total": ("counter", "Records found before dedupe, by extractor"),
+    "dedupe_hit_ratio": ("gauge", "Share of records dropped as duplicates, by extractor"),
+    "pipeline_queue_depth": ("gauge", "Documents waiting between extraction and layout in the pipeline"),
+    "layout_progress_ratio": ("gauge", "Share of the story laid out, by renderer"),
+    "eta_seconds": ("gauge", "Estimated seconds left, by stage (extract, layout); NaN while unknown"),
+}
+
+_lock = threading.Lock()
+_values = {}    # (name, sorted label items) -> value
+_started = {}   # stage -> time.monotonic() of its first unit of work
+_finished = {}  # stage -> time.monotonic() when it ran out of work
+_layouts = []   # (renderer, story, flowables at the start, start time)
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def inc(name, amount=1, **labels):
+    with _lock:
+        key = _key(name, labels)
+        _values[key] = _values.get(key, 0) + amount
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _values[_key(name, labels)] = value
+
+def get(name, **labels):
+    with _lock:
+        return _values.get(_key(name, labels), 0)
+
+def mark_started(stage):
+    """Note when a stage first did any work, for its rate and ETA"""
+    with _lock:
+        _started.setdefault(stage, time.monotonic())
+
+def mark_finished(stage):
+    """Freeze a stage's rate once it is done, so the last snapshot keeps the run's figure"""
+    with _lock:
+        _finished[stage] = time.monotonic()
+
+def record_dedupe(extractor, unique):
+    """Set the dedupe hit ratio from the records counted for ``extractor`` and how many survived"""
+    found = get("records_total", extractor=extractor)
+    set_gauge("dedupe_hit_ratio", 1 - unique / found if found else 0.0, extractor=extractor)
+
+def watch_layout(renderer, story):
+    """Follow reportlab laying out ``story`` (a plain list it consumes from the front)"""
+    with _lock:
+        _layouts.append((renderer, story, len(story), time.monotonic()))
+
+def _derived(now):
+    """Rates, progress and ETAs computed from the counters at read time"""
+    derived = {}
+    extract_start = _started.get("extract")
+    if extract_start is not None:
+        elapsed = max(_finished.get("extract", now) - extract_start, 1e-9)
+        if _key("pages_total", {}) in _values:
+            derived[_key("pages_per_second", {})] = _values[_key("pages_total", {})] / elapsed
+        done = _values.get(_key("bytes_done_total", {}), 0)
+        left = _values.get(_key("bytes_discovered_total", {}), 0) - done
+        complete = _values.get(_key("discovery_complete", {}), 0)
+        eta = left / (done / elapsed) if done and complete else math.nan
+        derived[_key("eta_seconds", {"stage": "extract"})] = eta
+
+    for renderer, story, total, start in _layouts:
+        # reportlab pops flowables off the front of the story as it places them
+        placed = total - len(story)
+        progress = placed / total if total else 1.0
+        derived[_key("layout_progress_ratio", {"renderer": renderer})] = progress
+        eta = (now - start) * (1 - progress) / progress if placed else math.nan
+        derived[_key("eta_seconds", {"stage": "layout", "renderer": renderer})] = eta
+    return derived
+
+def _format(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        return repr(round(value, 6))
+    return str(value)
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        values = dict(_values)
+        values.update(_derived(time.monotonic()))
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        samples = sorted((labels, value) for (metric, labels), value in values.items() if metric == name)
+        if not samples:
+            continue
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{PREFIX}{name}{{{label_text}}} {_format(value)}" if label_text
+                         else f"{PREFIX}{name} {_format(value)}")
+    return "\n".join(lines) + "\n"
+
+def write_file(path):
+    """Replace ``path`` with the current metrics in one step, so readers never see half a file"""
+    partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(partial, path)
+
+def serve_http(address):
+    """Serve /metrics on ``address`` ("PORT" or "HOST:PORT", localhost by default) from a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    host, _, port = address.rpartition(":")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"📈 Metrics at http://{host or '127.0.0.1'}:{server.server_address[1]}/metrics")
+    return server.shutdown
+
+def start(address=None, path=None, interval=15):
+    """Start the HTTP endpoint and/or the metrics file; returns a function that stops them.
+
+    The file is written once more when stopped, so it ends with the final counts.
+    """
+    stops = []
+    if address:
+        stops.append(serve_http(address))
+    if path:
+        stop = threading.Event()
+
+        def rewrite():
+            while not stop.wait(interval):
+                write_file(path)
+
+        write_file(path)
+        thread = threading.Thread(target=rewrite, name="metrics-file", daemon=True)
+        thread.start()
+        print(f"📈 Metrics written to {path} every {interval:g}s")
+
+        def stop_file():
+            stop.set()
+            thread.join()
+            write_file(path)
+        stops.append(stop_file)
+
+    def stop_all():
+        for stop_one in stops:
+            stop_one()
+    return stop_all
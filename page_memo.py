@@ -0,0 +1,162 @@
+"""Per-page memo of extraction results, for fast reruns.
+
+    python cli.py bullet PDF_FOLDER --memo extraction_memo.sqlite
+
+Each page's records are stored in a SQLite file under a hash of the page
+text (after header/footer stripping), the file name and page number the
+records carry, and the extractor's fingerprint: its module name, the
+source of its module and of the shared extraction helpers it uses, its
+EXTRACTOR_VERSION and its module-level settings (regexes, word lists,
+thresholds). On a rerun a page whose text and extractor are unchanged is
+read back instead of scanned; anything else is scanned and stored. The
+first run of an extractor with a new fingerprint drops that extractor's
+older entries, which could never be read again.
+
+Any edit to an extractor's module or to a helper it uses (line_features.py)
+is picked up by itself, since their source is hashed in. EXTRACTOR_VERSION
+is only a manual override, for a change made somewhere else (documents.py,
+say) that alters what the extractor finds.
+Worker processes share the file; each opens its own connection.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+# Module-level names that do not affect what an extractor finds
+IGNORED_SETTINGS = {"pdf_folder", "output_csv", "RUN_SIZE"}
+# Shared modules that decide what the extractors using them find: the
+# source of each one an extractor imports from is part of its fingerprint
+EXTRACTION_HELPERS = {"line_features"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,        -- hash of fingerprint, file name, page number and page text
+    extractor TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    records TEXT NOT NULL,       -- JSON list of the page's records
+    created REAL NOT NULL,
+    used REAL NOT NULL           -- last time a run read or wrote the entry
+);
+CREATE INDEX IF NOT EXISTS pages_extractor ON pages (extractor, fingerprint);
+"""
+
+def _setting(value):
+    """A stable, comparable form of a module-level setting (None for functions, modules and the like)"""
+    if isinstance(value, re.Pattern):
+        return ("re", value.pattern, value.flags)
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(_setting(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return ("set", tuple(sorted(repr(_setting(item)) for item in value)))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((repr(k), repr(_setting(v))) for k, v in value.items())))
+    return None
+
+def _helpers(module):
+    """Names of the EXTRACTION_HELPERS modules an extractor imports (or imports names from)"""
+    found = set()
+    for value in vars(module).values():
+        name = value.__name__ if isinstance(value, type(sys)) else getattr(value, "__module__", None)
+        if name in EXTRACTION_HELPERS:
+            found.add(name)
+    return sorted(found)
+
+def _source_hash(module):
+    with open(module.__file__, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+def extractor_fingerprint(module):
+    """Hash of an extractor module's source, EXTRACTOR_VERSION, settings and helper module sources"""
+    digest = hashlib.sha256(f"{module.__name__}|{getattr(module, 'EXTRACTOR_VERSION', 0)}".encode())
+    digest.update(b"\0source=" + _source_hash(module))
+    for helper in _helpers(module):
+        digest.update(f"\0{helper}=".encode() + _source_hash(sys.modules[helper]))
+    for name, value in sorted(vars(module).items()):
+        if name.startswith("_") or name in IGNORED_SETTINGS:
+            continue
+        setting = _setting(value)
+        if setting is not None:
+            digest.update(f"\0{name}={setting!r}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+def page_key(fingerprint, filename, page_num, text):
+    digest = hashlib.sha256(f"{fingerprint}\0{filename}\0{page_num}\0".encode("utf-8"))
+    digest.update(text.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+class PageMemo:
+    """Page records stored in the SQLite file at ``path``"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+        self.pid = None
+        self.fingerprints = {}   # extractor module name -> fingerprint
+
+    def connection(self):
+        # A connection inherited through fork is never reused: each process opens its own
+        if self.pid != os.getpid():
+            self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self.conn.execute("PRAGMA busy_timeout = 60000")
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.executescript(SCHEMA)
+            self.pid = os.getpid()
+            self.fingerprints = {}
+        return self.conn
+
+    def fingerprint(self, extractor):
+        """The extractor's fingerprint; its entries under older fingerprints are dropped the first time"""
+        if extractor not in self.fingerprints:
+            fingerprint = extractor_fingerprint(sys.modules[extractor])
+            self.connection().execute("DELETE FROM pages WHERE extractor = ? AND fingerprint != ?",
+                                      (extractor, fingerprint))
+            self.fingerprints[extractor] = fingerprint
+        return self.fingerprints[extractor]
+
+    def scan_pages(self, scan_page, texts, filename, first_page=0):
+        """``scan_page`` over consecutive page texts, reading unchanged pages back from the memo"""
+        conn = self.connection()
+        extractor = scan_page.__module__
+        fingerprint = self.fingerprint(extractor)
+        keys = [page_key(fingerprint, filename, page_num, text) for page_num, text in enumerate(texts, first_page)]
+        stored = {}
+        # SQLite limits the number of parameters per statement
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            stored.update(conn.execute(f"SELECT key, records FROM pages WHERE key IN ({','.join('?' * len(chunk))})",
+                                       chunk).fetchall())
+
+        records = []
+        scanned = []
+        for key, (page_num, text) in zip(keys, enumerate(texts, first_page)):
+            if key in stored:
+                records.extend(json.loads(stored[key]))
+            else:
+                page_records = scan_page(text, filename, page_num)
+                records.extend(page_records)
+                scanned.append((key, json.dumps(page_records, ensure_ascii=False)))
+
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("UPDATE pages SET used = ? WHERE key = ?", [(now, key) for key in stored])
+            conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                             [(key, extractor, fingerprint, page_records, now, now)
+                              for key, page_records in scanned])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return records
+
+    def summary(self, since):
+        """(pages read back, pages scanned and stored) by every process since ``since`` (a time.time())"""
+        reused, scanned = self.connection().execute(
+            "SELECT SUM(created < ?), SUM(created >= ?) FROM pages WHERE used >= ?", (since, since, since)).fetchone()
+        return reused or 0, scanned or 0
@@ -0,0 +1,138 @@
+"""Overlapped extraction -> PDF rendering, without the CSV round-trip.
+
+A producer thread drives the extraction workers and puts each finished
+document's records on a bounded queue. The main thread dedupes them as they
+arrive and feeds them straight into the renderer's story, which reportlab
+lays out while later documents are still being extracted.
+
+Entries appear in document order (grouped by source PDF) rather than sorted
+by term, because a sorted PDF cannot start until the last document has been
+extracted. The optional CSV is written at the end, deduped and sorted exactly
+like the scraper's own CSV.
+"""
+import importlib
+import queue
+import threading
+import time
+
+import metrics
+from batch import iter_documents
+
+# scraper name -> (scraper module, default renderer module)
+PIPELINES = {
+    "cases": ("case_scraper", "advanced_csv_to_pdf"),
+    "structured": ("structured_definition_scraper", "aggressive_to_pdf"),
+    "bullet": ("bullet_definition_scraper", "bullet_definitions_to_pdf"),
+    "aggressive": ("aggressive_definition_scraper", "aggressive_to_pdf"),
+}
+
+_DONE = object()
+
+class StreamingStory(list):
+    """A story list that refills itself from a flowable iterator.
+
+    reportlab's build() loops ``while len(story)`` and takes flowables off the
+    front, so topping the list up inside __len__ lets it lay out a story that
+    is still being produced. A few flowables of look-ahead are kept so that
+    keepWithNext grouping sees the same neighbours a complete list would.
+    """
+
+    def __init__(self, flowables, lookahead=32):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+
+    def __len__(self):
+        while self._source is not None and super().__len__() < self._lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return super().__len__()
+
+def _produce(extracted, documents, stop):
+    """Producer thread: keep extracting documents and queue their records"""
+    def put(item):
+        while not stop.is_set():
+            try:
+                documents.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for _, records in extracted:
+            if not put(records):
+                break
+    except Exception as e:
+        put(e)
+    finally:
+        extracted.close()
+        put(_DONE)
+
+def _stream_rows(scraper, documents, stats, keep_records):
+    """Yield renderer rows for new unique records as documents arrive"""
+    seen = set()
+    while True:
+        item = documents.get()
+        if item is _DONE:
+            metrics.record_dedupe(scraper.__name__, len(seen))
+            return
+        if isinstance(item, Exception):
+            raise item
+        stats['documents'] += 1
+        metrics.set_gauge("pipeline_queue_depth", documents.qsize())
+        for record in item:
+            key = scraper.dedupe_key(record)
+            if key in seen:
+                continue
+            seen.add(key)
+            if keep_records is not None:
+                keep_records.append(record)
+            # The renderers expect the string values they would read back from the CSV
+            for row in scraper.csv_rows([record]):
+                yield [str(value) for value in row]
+
+def run_pipeline(scraper_name, inputs, output_pdf, output_csv=None, renderer=None, queue_size=4,
+                 **batch_options):
+    """Extract ``inputs`` and render ``output_pdf`` with extraction and layout overlapped.
+
+    Returns the number of entries rendered.
+    """
+    scraper_module, default_renderer = PIPELINES[scraper_name]
+    scraper = importlib.import_module(scraper_module)
+    renderer = importlib.import_module(renderer or default_renderer)
+
+    start = time.perf_counter()
+    documents = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    # Wait for the first document here (layout could not start any earlier
+    # anyway). Workers started before the producer thread exists are forked;
+    # any started later, such as replacements after a timeout or a crash,
+    # are spawned while layout runs in this thread (batch._worker_context).
+    extracted = iter_documents(scraper.scan_pdf, inputs, "Scanning", isolate=True, **batch_options)
+    first = next(extracted, None)
+    if first is not None:
+        documents.put(first[1])
+    producer = threading.Thread(target=_produce, args=(extracted, documents, stop), daemon=True)
+    producer.start()
+
+    stats = {'documents': 0}
+    records = [] if output_csv else None
+    doc = renderer.make_document(output_pdf)
+    try:
+        doc.build(StreamingStory(renderer.build_story(_stream_rows(scraper, documents, stats, records), stats)))
+    finally:
+        stop.set()
+        producer.join()
+    render_done = time.perf_counter()
+
+    if output_csv:
+        scraper.save_to_csv(scraper.finalize_records(records), output_csv)
+        print(f"💾 Saved to: {output_csv}")
+
+    print(f"\n✅ PDF created successfully: {output_pdf}")
+    print(f"📊 {stats['entries']} entries from {stats['documents']} documents")
+    print(f"⏱️ End-to-end: {render_done - start:.2f}s")
+    return stats['entries']
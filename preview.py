@@ -0,0 +1,130 @@
+"""Preview the scrapers on a small deterministic sample of pages.
+
+    python cli.py preview PDF_FOLDER_OR_FILE... [--first 3 | --random 200 --seed 0] [--scrapers bullet structured]
+
+Meant for tuning the heuristics: instead of scanning the whole corpus it
+runs the chosen scrapers over the first N pages of every PDF, or over N
+pages drawn with a fixed seed from the whole corpus, and prints each
+extractor's hit rate and per-page time together with an extrapolation of the
+record count and time of a full run. Running headers and footers are found
+on a bounded sample of each document (its first BOILERPLATE_SAMPLE pages
+plus the sampled ones) and stripped from the sampled pages, so a preview
+extracts a few pages per document rather than whole documents.
+"""
+import importlib
+import random
+import time
+
+from cli import SCRAPERS
+from documents import find_pdfs, repeated_lines, strip_repeated
+
+# Pages from the start of each sampled document that headers/footers are found on
+BOILERPLATE_SAMPLE = 20
+
+def page_counts(pdf_files):
+    """(filename, path, page count) for every readable PDF"""
+    import fitz  # PyMuPDF
+
+    counted = []
+    for filename, pdf_path in pdf_files:
+        try:
+            with fitz.open(pdf_path) as doc:
+                counted.append((filename, pdf_path, doc.page_count))
+        except Exception as e:
+            print(f"❌ Error with {filename}: {e}")
+    return counted
+
+def sample_pages(documents, first=None, sample=None, seed=0):
+    """Pick (filename, path, page number) triples from (filename, path, page count).
+
+    ``first`` takes the first N pages of every document; otherwise
+    ``sample`` pages are drawn from the whole corpus with ``seed``, so the
+    same arguments always preview the same pages.
+    """
+    if first is not None:
+        return [(filename, path, page) for filename, path, pages in documents for page in range(min(first, pages))]
+
+    total = sum(pages for _, _, pages in documents)
+    chosen = sorted(random.Random(seed).sample(range(total), min(sample, total)))
+    picked, offset, chosen_iter = [], 0, iter(chosen)
+    target = next(chosen_iter, None)
+    for filename, path, pages in documents:
+        while target is not None and target < offset + pages:
+            picked.append((filename, path, target - offset))
+            target = next(chosen_iter, None)
+        offset += pages
+    return picked
+
+def load_texts(picked):
+    """Page texts for the sampled pages, with running headers and footers stripped.
+
+    Returns (texts, seconds per extracted page, header/footer lines stripped
+    from the sampled pages). The repeated lines are found on the first
+    BOILERPLATE_SAMPLE pages of each document together with its sampled
+    pages (all of them if it is shorter), and only those pages are extracted.
+    """
+    import fitz  # PyMuPDF
+
+    texts = []
+    stripped = 0
+    extracted = 0
+    start = time.perf_counter()
+    by_document = {}
+    for filename, path, page_num in picked:
+        by_document.setdefault((filename, path), []).append(page_num)
+    for (filename, path), page_nums in by_document.items():
+        with fitz.open(path) as doc:
+            sample = sorted(set(range(min(BOILERPLATE_SAMPLE, doc.page_count))).union(page_nums))
+            page_lines = {page_num: doc[page_num].get_text("text").split('\n') for page_num in sample}
+        extracted += len(sample)
+        repeated = repeated_lines(list(page_lines.values()))
+        for page_num in page_nums:
+            kept, count = strip_repeated(page_lines[page_num], repeated)
+            texts.append((filename, page_num, '\n'.join(kept)))
+            stripped += count
+    return texts, (time.perf_counter() - start) / max(extracted, 1), stripped
+
+def preview(inputs, scrapers=None, first=None, sample=200, seed=0, examples=3, **discovery):
+    """Run ``scrapers`` over a sample of the pages in ``inputs`` and print the estimates"""
+    scrapers = scrapers or list(SCRAPERS)
+    documents = page_counts(find_pdfs(inputs, **discovery))
+    total_pages = sum(pages for _, _, pages in documents)
+    picked = sample_pages(documents, first=first, sample=sample, seed=seed)
+    if not picked:
+        print("❌ No pages to preview")
+        return {}
+
+    how = f"first {first} page(s) of each PDF" if first is not None else f"{len(picked)} random pages, seed {seed}"
+    print(f"🔍 Previewing {len(picked)} of {total_pages} pages in {len(documents)} PDFs ({how})")
+    texts, text_seconds, stripped = load_texts(picked)
+    text_ms = text_seconds * 1000
+    print(f"    text extraction: {text_ms:.2f} ms/page, "
+          f"{stripped} repeated header/footer lines stripped from the sampled pages")
+
+    results = {}
+    for name in scrapers:
+        module = importlib.import_module(SCRAPERS[name][0])
+        hits = records = 0
+        found = []
+        start = time.perf_counter()
+        for filename, page_num, text in texts:
+            page_records = module.scan_page(text, filename, page_num)
+            if page_records:
+                hits += 1
+                records += len(page_records)
+                found.extend(page_records[:max(0, examples - len(found))])
+        extract_ms = (time.perf_counter() - start) * 1000 / len(texts)
+
+        per_page = records / len(texts)
+        full_seconds = (text_ms + extract_ms) * total_pages / 1000
+        results[name] = {'hit_rate': hits / len(texts), 'records_per_page': per_page,
+                         'ms_per_page': extract_ms, 'full_records': per_page * total_pages,
+                         'full_seconds': full_seconds}
+
+        print(f"\n📊 {name}: {hits}/{len(texts)} pages with hits ({hits / len(texts):.0%}), "
+              f"{records} records ({per_page:.2f}/page), {extract_ms:.2f} ms/page")
+        print(f"    full run estimate: ~{per_page * total_pages:,.0f} records before dedupe, "
+              f"~{full_seconds:,.1f}s in one process")
+        for row in module.csv_rows(found):
+            print(f"    e.g. {' | '.join(str(value) for value in row[:2])[:110]}")
+    return results
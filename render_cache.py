@@ -0,0 +1,68 @@
+"""Render cache for incremental PDF rebuilds.
+
+A compilation is cut into groups that always start on a fresh page, so a
+group's pages depend only on its own entries. Each group is rendered once to
+a small PDF named after a hash of its content and the renderer's style
+version; a rebuild renders only the groups whose hash is not cached yet and
+splices all the cached pages together with PyMuPDF.
+"""
+import hashlib
+import json
+import os
+
+def group_key(style_version, entries):
+    """Content hash of one group of entries (tuples of strings)"""
+    from reportlab import Version as reportlab_version
+
+    digest = hashlib.sha256(f"{style_version}|{reportlab_version}".encode())
+    for entry in entries:
+        for field in entry:
+            digest.update(b"\0" + field.encode("utf-8"))
+        digest.update(b"\1")
+    return digest.hexdigest()
+
+def build_from_groups(output_pdf, groups, render_group, cache_dir):
+    """Splice ``groups`` of (key, payload) into ``output_pdf``.
+
+    ``render_group(payload, path)`` is only called for groups missing from
+    ``cache_dir``; whatever JSON-serialisable value it returns is cached
+    with the group's pages. Cached groups that are no longer used are
+    removed afterwards. Returns (groups reused, groups rendered, placed),
+    where placed lists (index of the group's first page, cached value).
+    """
+    import fitz  # PyMuPDF
+
+    os.makedirs(cache_dir, exist_ok=True)
+    used = set()
+    placed = []
+    reused = rendered = 0
+    output = fitz.open()
+    for key, payload in groups:
+        path = os.path.join(cache_dir, f"{key}.pdf")
+        info_path = os.path.join(cache_dir, f"{key}.json")
+        if os.path.exists(path) and os.path.exists(info_path):
+            with open(info_path, encoding="utf-8") as f:
+                info = json.load(f)
+            reused += 1
+        else:
+            # Write under temporary names so an interrupted build never
+            # leaves a truncated group behind in the cache
+            partial = f"{path}.{os.getpid()}.tmp"
+            info = render_group(payload, partial)
+            with open(f"{info_path}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            os.replace(partial, path)
+            os.replace(f"{info_path}.{os.getpid()}.tmp", info_path)
+            rendered += 1
+        used.update((os.path.basename(path), os.path.basename(info_path)))
+        placed.append((output.page_count, info))
+        with fitz.open(path) as part:
+            output.insert_pdf(part)
+
+    output.save(output_pdf, deflate=True)
+    output.close()
+
+    for name in os.listdir(cache_dir):
+        if name.endswith((".pdf", ".json")) and name not in used:
+            os.remove(os.path.join(cache_dir, name))
+    return reused, rendered, placed
@@ -0,0 +1,109 @@
+"""Sentence and paragraph segmentation shared by the renderers.
+
+Sentence ends are found in one regular-expression pass over the text; each
+candidate (a word ending in ".", "!" or "?") is then accepted or rejected by
+looking only at that word and the first character after it, so the work
+stays linear however long an explanation is. A full stop does not end a
+sentence after a legal or common abbreviation ("v.", "s.", "Ltd.", "cf."),
+after initials ("A.C.", "J."), or when the next word starts with a
+lowercase letter or a digit ("s. 2", "[1932] A.C. 562").
+
+Paragraphs are packed from whole sentences; a sentence too long for one
+paragraph is broken at commas and semicolons, and a clause still too long
+at spaces. Every piece goes through the same running length, so no
+paragraph is longer than the limit unless a single word is.
+"""
+import re
+
+# Words that end in a full stop without ending the sentence (lowercased, without the final ".")
+ABBREVIATIONS = {
+    # case names, companies and courts
+    "v", "vs", "ltd", "co", "corp", "inc", "plc", "bros", "nv", "bv", "pty", "llp",
+    "lj", "ljj", "cj", "mr", "mrs", "ms", "dr", "st", "hon", "rt",
+    # statutes and reports
+    "s", "ss", "art", "arts", "para", "paras", "reg", "regs", "sch", "ch", "cl", "pt",
+    "sec", "r", "rr", "no", "nos", "vol", "p", "pp", "n", "fn", "ed", "eds",
+    # citations and Latin
+    "cf", "eg", "ie", "viz", "al", "ibid", "op", "cit", "approx", "esp",
+}
+OPENERS = "([\"'‘“"
+
+# Terminal punctuation (plus closing quotes or brackets) at the end of a word
+sentence_end = re.compile(r"[.!?]+[)\]\"'’”]*(?!\S)")
+last_word = re.compile(r"\S*\Z")
+next_word = re.compile(r"\s*(\S)")
+clause_end = re.compile(r"(?<=[,;])\s+")
+initials = re.compile(r"[A-Za-z](?:\.[A-Za-z])+|[A-Z]")
+# Only this many characters before a full stop are looked at: longer words
+# are neither abbreviations nor initials
+STEM_CHARS = 12
+
+def ends_sentence(text, match):
+    """Whether the punctuation of a ``sentence_end`` match closes a sentence"""
+    punctuation = match.group()
+    if "!" in punctuation or "?" in punctuation:
+        return True
+    following = next_word.match(text, match.end())
+    if following is None:
+        return True
+    if following.group(1).islower() or following.group(1).isdigit():
+        return False
+    window_start = max(match.start() - STEM_CHARS, 0)
+    stem = last_word.search(text, window_start, match.start())
+    if stem.start() == window_start and window_start and not text[window_start - 1].isspace():
+        return True
+    stem = stem.group().lstrip(OPENERS)
+    return stem.lower() not in ABBREVIATIONS and not initials.fullmatch(stem)
+
+def sentences(text):
+    """The sentences of ``text``, each with its own punctuation"""
+    found = []
+    start = 0
+    for match in sentence_end.finditer(text):
+        if ends_sentence(text, match):
+            sentence = text[start:match.end()].strip()
+            if sentence:
+                found.append(sentence)
+            start = match.end()
+    rest = text[start:].strip()
+    if rest:
+        found.append(rest)
+    return found
+
+def finish(sentence):
+    """``sentence`` with a full stop added unless it already ends in punctuation or a quote"""
+    return sentence if sentence.endswith(('.', '!', '?', '"', "'")) else sentence + '.'
+
+def _pieces(sentence, max_chars):
+    """A sentence, or its clauses (and the words of over-long clauses) if it is too long"""
+    if len(sentence) <= max_chars:
+        yield sentence
+        return
+    for clause in clause_end.split(sentence):
+        if len(clause) <= max_chars:
+            yield clause
+        else:
+            yield from clause.split()
+
+def paragraphs(text, max_chars=300):
+    """Split ``text`` into paragraphs of at most ``max_chars`` characters.
+
+    Short sentences are gathered into one paragraph; a sentence longer than
+    ``max_chars`` starts a new paragraph and is split at clauses, then words.
+    """
+    found = []
+    parts = []
+    length = 0  # length of ' '.join(parts)
+    for sentence in sentences(text):
+        if len(sentence) > max_chars and parts:
+            found.append(' '.join(parts))
+            parts, length = [], 0
+        for piece in _pieces(sentence, max_chars):
+            if parts and length + 1 + len(piece) > max_chars:
+                found.append(' '.join(parts))
+                parts, length = [], 0
+            length += len(piece) + (1 if parts else 0)
+            parts.append(piece)
+    if parts:
+        found.append(' '.join(parts))
+    return found
@@ -1,185 +1,190 @@
-import fitz  # PyMuPDF
 import re
 import csv
-import os
+
+import metrics
+from batch import iter_records
+from documents import scan_document
+from external_sort import RUN_SIZE, Tally, sorted_unique
+from line_features import ends_with, first_upper, lengths, regex_mask, scan_blocks, starts_with, word_counts
 
 # SETTINGS
 pdf_folder = r"C:\Users\BACKY\Downloads\YOUR-FILE-NAME"      # Folder containing all your PDFs
 output_csv = "structured_definitions.csv"
+# Bump to make --memo rescan after a change outside this file (its own source is hashed in)
+EXTRACTOR_VERSION = 1
+
+# Header lines never end on a dangling connective/preposition
+dangling_word = re.compile(r'(?:the|and|or|but|in|on|at|to|for|with|by|from|up|about|into|through|during|before|after|above|below|between|among|under|over|above)\s*$')
+# Stop conditions while collecting explanation lines
+definition_words = re.compile(r'(?:is|are|means|refers|defined|described)', re.IGNORECASE)
+section_break = re.compile(r'^(?:Page \d+|\d+|Section|Chapter)', re.IGNORECASE)
+# Words that make a line look like part of an explanation
+linking_words = re.compile(r'(?:and|but|or|so|because|since|however|therefore|also|in addition|furthermore)', re.IGNORECASE)
+# Bullet characters removed by clean_text
+bullet_chars = re.compile(r'[•▪▫◦‣⁃■●○◆◇]')
+# Numbered list items ("1.", "12.")
+numbered_item = re.compile(r'^\d+\.')
+# "Term:" on a line of its own
+colon_header = re.compile(r'^([A-Z][a-zA-Z\s]+):?\s*$')
+# Kinds of header given to scan_blocks
+HEADER, COLON_HEADER = 0, 1
 
 def clean_text(text):
     """Basic text cleaning"""
     if not text:
         return ""
-    text = re.sub(r'[•▪▫◦‣⁃■●○◆◇]', '', text)
+    text = bullet_chars.sub('', text)
     text = ' '.join(text.split())
     return text.strip()
 
+def clean_lines(text):
+    """clean_text() applied to every line of a page, with one regex pass for the whole page"""
+    return [' '.join(line.split()) for line in bullet_chars.sub('', text).split('\n')]
+
+def line_features(lines):
+    """Header, stop and explanation masks for the cleaned lines of one page"""
+    length = lengths(lines)
+    upper = first_upper(lines)
+    ends_period = ends_with(lines, '.')
+    bulleted = starts_with(lines, ('•', '-', '*', '–', '—'))
+    
+    # Potential term headers: short, capitalised (or bulleted/numbered), no full stop, no dangling word
+    header = (length > 3) & (length < 50) & ~ends_period
+    numbered = regex_mask(numbered_item, lines, header & ~upper & ~bulleted, match=True)
+    header &= upper | starts_with(lines, '•') | numbered
+    header &= ~regex_mask(dangling_word, lines, header, key=str.lower)
+    
+    # Another major term (capitalised, short) or a page number/section header ends an explanation
+    stop = (length > 3) & (length < 40) & upper & ~ends_period
+    stop &= ~regex_mask(definition_words, lines, stop)
+    stop |= regex_mask(section_break, lines, (length > 0) & ~stop, match=True)
+    
+    # Lines that look like part of an explanation
+    explains = (length > 5) & ~stop
+    numbered = regex_mask(numbered_item, lines, explains & ~bulleted, match=True)
+    wordy = word_counts(lines, length) > 3
+    undecided = explains & ~bulleted & ~numbered & ~wordy
+    explains &= bulleted | numbered | wordy | regex_mask(linking_words, lines, undecided)
+    
+    # "Term:" headers are only tried where the header test failed; their
+    # explanation is any longer line, and a short one ends it
+    colon = regex_mask(colon_header, lines, ~header & upper, match=True)
+    colon_explains = length > 5
+    colon_stop = (length > 0) & ~colon_explains
+    
+    return (header.tolist(), stop.tolist(), explains.tolist(),
+            colon.tolist(), colon_stop.tolist(), colon_explains.tolist())
+
 def extract_structured_definitions(text, source_pdf, page_num):
     """Extract definitions with bullet points or multi-line explanations"""
     definitions = []
-    lines = text.split('\n')
+    lines = clean_lines(text)
+    header, stop, explains, colon, colon_stop, colon_explains = line_features(lines)
     
-    i = 0
-    while i < len(lines):
-        line = clean_text(lines[i])
-        
-        # Look for potential term headers (short, capitalized, followed by explanation)
-        if (len(line) > 3 and len(line) < 50 and 
-            (line[0].isupper() or line.startswith('•') or re.match(r'^\d+\.', line)) and
-            not line.endswith('.') and
-            not re.search(r'(?:the|and|or|but|in|on|at|to|for|with|by|from|up|about|into|through|during|before|after|above|below|between|among|under|over|above)\s*$', line.lower())):
-            
-            term = line.lstrip('•0123456789.- ').strip()
-            
-            # Look ahead for bullet points or explanations
-            explanation_lines = []
-            j = i + 1
-            
-            # Collect next few lines that look like explanations
-            while j < len(lines) and j < i + 8:  # Look at next 7 lines max
-                next_line = clean_text(lines[j])
-                
-                # Stop conditions
-                if not next_line:
-                    j += 1
-                    continue
-                    
-                # Stop if we hit another major term (capitalized, short)
-                if (len(next_line) > 3 and len(next_line) < 40 and 
-                    next_line[0].isupper() and 
-                    not next_line.endswith('.') and
-                    not re.search(r'(?:is|are|means|refers|defined|described)', next_line, re.IGNORECASE)):
-                    break
-                
-                # Stop if we hit a page number or section header
-                if re.match(r'^(?:Page \d+|\d+|Section|Chapter)', next_line, re.IGNORECASE):
-                    break
-                
-                # Include this line if it looks like an explanation
-                if (len(next_line) > 5 and 
-                    (next_line.startswith(('•', '-', '*', '–', '—')) or
-                     re.match(r'^\d+\.', next_line) or
-                     re.search(r'(?:and|but|or|so|because|since|however|therefore|also|in addition|furthermore)', next_line, re.IGNORECASE) or
-                     len(next_line.split()) > 3)):
-                    
-                    explanation_lines.append(next_line)
-                
-                j += 1
-            
-            # If we found substantial explanations, save it
-            if len(explanation_lines) >= 2:  # At least 2 explanation lines
-                full_explanation = ' | '.join(explanation_lines)
-                
-                # Clean up the term
-                term = re.sub(r'^\d+\.?\s*', '', term)  # Remove leading numbers
-                term = term.strip(' :-')
-                
-                if term and len(term) > 2:
-                    definitions.append({
-                        'term': term,
-                        'explanation': full_explanation,
-                        'source_pdf': source_pdf,
-                        'page': page_num + 1,
-                        'lines_found': len(explanation_lines)
-                    })
-                    
-                    i = j - 1  # Skip ahead since we processed these lines
+    def emit(i, kind, explanation):
+        explanation_lines = [lines[j] for j in explanation]
+        if kind == HEADER:
+            # Clean up the term
+            term = lines[i].lstrip('•0123456789.- ').strip()
+            term = re.sub(r'^\d+\.?\s*', '', term)  # Remove leading numbers
+            term = term.strip(' :-')
+            if not term or len(term) <= 2:
+                return False
         else:
-            # Also look for "Term:" followed by explanations
-            colon_match = re.match(r'^([A-Z][a-zA-Z\s]+):?\s*$', line)
-            if colon_match:
-                term = colon_match.group(1).strip()
-                
-                # Look for explanations after the colon
-                explanation_lines = []
-                j = i + 1
-                
-                while j < len(lines) and j < i + 6:
-                    next_line = clean_text(lines[j])
-                    if next_line and len(next_line) > 5:
-                        explanation_lines.append(next_line)
-                    elif not next_line:
-                        j += 1
-                        continue
-                    else:
-                        break
-                    j += 1
-                
-                if len(explanation_lines) >= 2:
-                    definitions.append({
-                        'term': term,
-                        'explanation': ' | '.join(explanation_lines),
-                        'source_pdf': source_pdf,
-                        'page': page_num + 1,
-                        'lines_found': len(explanation_lines)
-                    })
-                    i = j - 1
-        
-        i += 1
+            term = colon_header.match(lines[i]).group(1).strip()
+        definitions.append({
+            'term': term,
+            'explanation': ' | '.join(explanation_lines),
+            'source_pdf': source_pdf,
+            'page': page_num + 1,
+            'lines_found': len(explanation_lines)
+        })
+        return True
+    
+    # Short capitalised headers: explanation lines among the next 7, up to the
+    # next term or section break. "Term:" headers: the next 5 lines, up to the
+    # first short one. Either needs at least 2 explanation lines.
+    scan_blocks([(header, stop, explains, 8, 2), (colon, colon_stop, colon_explains, 6, 2)], len(lines), emit)
     
     return definitions
 
-def main():
-    print("🎯 STRUCTURED DEFINITION SCRAPER - Looking for multi-line explanations...")
-    
-    all_definitions = []
-    
-    # Loop through all PDFs
-    for filename in os.listdir(pdf_folder):
-        if filename.lower().endswith(".pdf"):
-            print(f"📄 Scanning: {filename}")
-            pdf_path = os.path.join(pdf_folder, filename)
-            
-            try:
-                doc = fitz.open(pdf_path)
-                
-                for page_num, page in enumerate(doc):
-                    text = page.get_text("text")
-                    if text.strip():
-                        page_defs = extract_structured_definitions(text, filename, page_num)
-                        all_definitions.extend(page_defs)
-                
-                doc.close()
-                
-            except Exception as e:
-                print(f"❌ Error with {filename}: {e}")
-                continue
-    
-    # Remove duplicates
+def scan_page(text, filename, page_num):
+    """Run the structured extractor over the text of one page"""
+    if not text.strip():
+        return []
+    return extract_structured_definitions(text, filename, page_num)
+
+def scan_pdf(pdf_path, filename, data=None):
+    """Run the structured extractor over every page of one PDF (running headers/footers stripped)"""
+    return scan_document(scan_page, pdf_path, filename, data)
+
+def dedupe_key(def_item):
+    """Definitions are unique by term (case-insensitive)"""
+    return def_item['term'].lower()
+
+def remove_duplicates(all_definitions):
+    """Keep the first definition seen for each term (case-insensitive)"""
     unique_definitions = []
     seen = set()
     
     for def_item in all_definitions:
-        key = def_item['term'].lower()
+        key = dedupe_key(def_item)
         if key not in seen:
             seen.add(key)
             unique_definitions.append(def_item)
     
-    # Sort by term
-    unique_definitions.sort(key=lambda x: x['term'])
-    
-    # Save to CSV
+    return unique_definitions
+
+def sort_key(def_item):
+    return def_item['term']
+
+def finalize_records(all_definitions):
+    """Dedupe and sort definitions the way they are written to the CSV"""
+    unique_definitions = remove_duplicates(all_definitions)
+    unique_definitions.sort(key=sort_key)
+    return unique_definitions
+
+def finalize_stream(all_definitions, run_size=RUN_SIZE):
+    """Same as finalize_records, but streamed through sorted runs on disk for huge result sets"""
+    return sorted_unique(all_definitions, dedupe_key, sort_key, run_size)
+
+def csv_rows(unique_definitions):
+    """Yield the CSV row for each definition"""
+    for def_item in unique_definitions:
+        yield [
+            def_item['term'],
+            def_item['explanation'],
+            def_item['source_pdf'],
+            def_item['page'],
+            def_item['lines_found']
+        ]
+
+def save_to_csv(unique_definitions, output_csv):
     with open(output_csv, mode="w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["Term", "Explanation", "Source PDF", "Page", "Lines Found"])
-        
-        for def_item in unique_definitions:
-            writer.writerow([
-                def_item['term'],
-                def_item['explanation'],
-                def_item['source_pdf'],
-                def_item['page'],
-                def_item['lines_found']
-            ])
+        writer.writerows(csv_rows(unique_definitions))
+
+def main(pdf_folder=pdf_folder, output_csv=output_csv, run_size=RUN_SIZE, **batch_options):
+    print("🎯 STRUCTURED DEFINITION SCRAPER - Looking for multi-line explanations...")
+    
+    # Loop through all PDFs
+    all_definitions = iter_records(scan_pdf, pdf_folder, "Scanning", **batch_options)
+    
+    # Remove duplicates and sort by term, streaming into the CSV
+    unique_definitions = Tally(finalize_stream(all_definitions, run_size), 10)
+    
+    # Save to CSV
+    save_to_csv(unique_definitions, output_csv)
     
     print(f"\n🎯 STRUCTURED EXTRACTION COMPLETE!")
-    print(f"📊 Found {len(unique_definitions)} structured definitions")
+    metrics.record_dedupe(__name__, unique_definitions.count)
+    print(f"📊 Found {unique_definitions.count} structured definitions")
     print(f"💾 Saved to: {output_csv}")
     
     # Show examples
     print(f"\n🎯 EXAMPLES FOUND:")
-    for i, def_item in enumerate(unique_definitions[:10]):
+    for i, def_item in enumerate(unique_definitions.kept):
         print(f"{i+1:2d}. {def_item['term']}")
         print(f"    {def_item['explanation'][:80]}...")
         print(f"    ({def_item['lines_found']} lines from {def_item['source_pdf']})")
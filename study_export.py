@@ -0,0 +1,147 @@
+"""Stream the scrapers' CSVs into static HTML or Markdown study pages.
+
+    python cli.py export cases legal_cases_with_sources.csv -o cases.html
+    python cli.py export bullet bullet_point_definitions.csv -o definitions.md
+
+Entries are cleaned and split into paragraphs by the same functions the PDF
+renderers use (``cases`` follows render-cases, ``simple`` render-simple, and
+so on), so the text reads as in the PDFs; only the reportlab layout is
+skipped. Rows are written out as they are read, so memory stays flat however
+big the CSV is. The HTML page searches a JSON index of titles and opening
+words, written next to it as ``<name>_index.js`` (a script rather than a
+bare .json file, so the page also works when opened straight from disk).
+"""
+import html
+import json
+import os
+import re
+import time
+
+# kind -> title of the compilation (the same as on the PDF's title page)
+TITLES = {
+    "cases": "Legal Cases Compilation",
+    "simple": "Legal Cases Compilation",
+    "bullet": "Structured Definitions",
+    "aggressive": "Complete Definition Collection",
+}
+# Characters of the first paragraph stored in the search index with each title
+SNIPPET_CHARS = 120
+
+def entries(kind, csv_file):
+    """Yield (title, paragraphs, source line) for every entry the kind's PDF renderer lays out"""
+    if kind == "cases":
+        import advanced_csv_to_pdf as renderer
+        for case_name, explanation, source_pdf in renderer.usable_cases(renderer.read_rows(csv_file)):
+            yield case_name, renderer.explanation_paragraphs(explanation), renderer.source_text(source_pdf)
+    elif kind == "simple":
+        import csv_to_pdf as renderer
+        for case_name, explanation in renderer.usable_cases(renderer.read_rows(csv_file)):
+            yield case_name, renderer.explanation_sentences(explanation), ""
+    elif kind == "bullet":
+        import bullet_definitions_to_pdf as renderer
+        for term, explanations, source_pdf, page, line_count in renderer.usable_definitions(renderer.read_rows(csv_file)):
+            yield term, renderer.bullet_paragraphs(explanations), renderer.source_text(source_pdf, page, line_count)
+    else:
+        import aggressive_to_pdf as renderer
+        for term, definition, source in renderer.usable_entries(renderer.read_rows(csv_file)):
+            yield term, renderer.definition_paragraphs(definition), f"Source: {source}" if source else ""
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>
+body {{ font-family: Helvetica, Arial, sans-serif; max-width: 50em; margin: 0 auto; padding: 1em; line-height: 1.45; }}
+h1 {{ color: #00008b; text-align: center; }}
+h2 {{ color: #00008b; font-size: 1.15em; margin: 1.6em 0 0.5em; }}
+article {{ content-visibility: auto; contain-intrinsic-size: auto 12em; }}
+article p {{ margin: 0.4em 1.5em; }}
+p.source {{ color: #00008b; font-style: italic; font-size: 0.85em; }}
+#search {{ position: sticky; top: 0; background: #fff; padding: 0.5em 0; border-bottom: 1px solid #ccc; }}
+#search input {{ width: 100%; font-size: 1em; padding: 0.3em; box-sizing: border-box; }}
+#results a {{ display: block; padding: 0.1em 0; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<div id="search"><input type="search" placeholder="Search titles and opening words" autofocus><div id="results"></div></div>
+"""
+
+HTML_TAIL = """<script src="{index}"></script>
+<script>
+(function () {{
+  var index = (window.SEARCH_INDEX || []).map(function (entry) {{ return (entry[0] + " " + entry[1]).toLowerCase(); }});
+  var input = document.querySelector("#search input"), results = document.getElementById("results");
+  input.addEventListener("input", function () {{
+    var words = input.value.toLowerCase().split(/\\s+/).filter(Boolean), found = [];
+    results.textContent = "";
+    if (!words.length) return;
+    for (var i = 0; i < index.length && found.length < 50; i++) {{
+      if (words.every(function (word) {{ return index[i].indexOf(word) >= 0; }})) found.push(i);
+    }}
+    found.forEach(function (i) {{
+      var link = document.createElement("a");
+      link.href = "#e" + i;
+      link.textContent = window.SEARCH_INDEX[i][0];
+      results.appendChild(link);
+    }});
+  }});
+}})();
+</script>
+</body>
+</html>
+"""
+
+def export_html(kind, csv_file, output_html):
+    """Write ``output_html`` and its search index; returns the number of entries"""
+    index_path = os.path.splitext(output_html)[0] + "_index.js"
+    title = html.escape(TITLES[kind])
+    count = 0
+    with open(output_html, "w", encoding="utf-8") as page, open(index_path, "w", encoding="utf-8") as index:
+        page.write(HTML_HEAD.format(title=title))
+        index.write("SEARCH_INDEX = [\n")
+        for name, paragraphs, source in entries(kind, csv_file):
+            body = "".join(f"<p>{html.escape(para)}</p>" for para in paragraphs)
+            if source:
+                body += f'<p class="source">{html.escape(source)}</p>'
+            page.write(f'<article id="e{count}"><h2>{html.escape(name)}</h2>{body}</article>\n')
+            snippet = paragraphs[0][:SNIPPET_CHARS] if paragraphs else ""
+            index.write(("," if count else "") + json.dumps([name, snippet], ensure_ascii=False) + "\n")
+            count += 1
+        index.write("];\n")
+        page.write(HTML_TAIL.format(index=html.escape(os.path.basename(index_path))))
+    return count
+
+markdown_special = re.compile(r'([\\`*_\[\]<>#|])')
+
+def markdown_escape(text):
+    return markdown_special.sub(r'\\\1', text)
+
+def export_markdown(kind, csv_file, output_md):
+    """Write ``output_md``; returns the number of entries"""
+    count = 0
+    with open(output_md, "w", encoding="utf-8") as f:
+        f.write(f"# {TITLES[kind]}\n\n")
+        for name, paragraphs, source in entries(kind, csv_file):
+            f.write(f"## {markdown_escape(name)}\n\n")
+            for para in paragraphs:
+                f.write(f"{markdown_escape(para.strip())}\n\n")
+            if source:
+                f.write(f"*{markdown_escape(source)}*\n\n")
+            count += 1
+    return count
+
+def export(kind, csv_file, output, output_format=None):
+    """Export ``csv_file`` as HTML or Markdown (chosen from the output's extension by default)"""
+    if output_format is None:
+        output_format = "markdown" if output.lower().endswith((".md", ".markdown")) else "html"
+    start = time.perf_counter()
+    if output_format == "html":
+        count = export_html(kind, csv_file, output)
+    else:
+        count = export_markdown(kind, csv_file, output)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Exported {count} entries to {output} in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} entries/s)")
+    return count
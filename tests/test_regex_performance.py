@@ -0,0 +1,27 @@
+"""Per-line time budgets for every extractor regex and extractor on adversarial lines.
+
+A pattern that starts backtracking catastrophically fails its cases here
+instead of stalling a scan. REGEX_BUDGET_SLACK multiplies the budgets (for
+slow CI machines); check_regex_performance.py runs the same cases by hand.
+"""
+import os
+
+import pytest
+
+import check_regex_performance as perf
+
+LENGTH = 10000
+SLACK = float(os.environ.get("REGEX_BUDGET_SLACK", "1.0"))
+
+@pytest.fixture(scope="module")
+def runner():
+    runner = perf.CaseRunner()
+    yield runner
+    runner.close()
+
+@pytest.mark.parametrize("kind, name, label", perf.build_cases(LENGTH),
+                         ids=lambda value: value.replace(" ", "_"))
+def test_within_budget(runner, kind, name, label):
+    budget = perf.budget_ms(kind, SLACK)
+    elapsed = runner.time(kind, name, label, LENGTH, budget)
+    assert elapsed <= budget, f"{name} took {elapsed:.1f} ms per line on '{label}' (budget {budget:.0f} ms)"